@@ -17,6 +17,11 @@ from routes.auth_routes import auth_bp
 from routes.rating_routes import rating_bp
 from routes.profile_routes import profile_bp
 from routes.search_routes import search_bp
+from routes.cover_routes import cover_bp
+from routes.media_routes import media_bp
+from routes.leaderboard_routes import leaderboard_bp
+from routes.recommendation_routes import recommendation_bp
+from routes.transfer_routes import transfer_bp
 
 load_dotenv()
 
@@ -34,6 +39,8 @@ def create_app():
                 ]
             }
         },
+        # paging / search hints the frontend reads from response headers
+        expose_headers=["X-Next-Cursor", "X-Page", "X-Page-Size", "X-Did-You-Mean"],
     )
 
     # existing blueprints
@@ -46,10 +53,16 @@ def create_app():
     # local auth under /login, /register
     app.register_blueprint(auth_bp)
 
-    # ratings, profile, search
+    # ratings, profile, search, cover images, homepage lists, leaderboards,
+    # recommendations, import / export
     app.register_blueprint(rating_bp)
     app.register_blueprint(profile_bp)
     app.register_blueprint(search_bp)
+    app.register_blueprint(cover_bp)
+    app.register_blueprint(media_bp)
+    app.register_blueprint(leaderboard_bp)
+    app.register_blueprint(recommendation_bp)
+    app.register_blueprint(transfer_bp)
 
     @app.get("/")
     def health():
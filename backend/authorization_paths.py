@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from authorization import create_user, verify_token, delete_user
-import requests
+from upstream import firebase
 import os
 
 auth_blueprint = Blueprint("auth", __name__)
@@ -47,7 +47,7 @@ def login_user():
             "password": password,
             "returnSecureToken": True
         }
-        response = requests.post(url, json=payload)
+        response = firebase.post(url, json=payload)
         result = response.json()
 
         if response.status_code == 200:
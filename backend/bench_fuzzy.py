@@ -0,0 +1,90 @@
+# backend/bench_fuzzy.py
+#
+# Benchmark the "did you mean" index on synthetic titles.
+# Run with: python bench_fuzzy.py [number_of_titles]   (default 1,000,000)
+# Reports build time, memory growth and query latency (p50/p95/p99).
+
+import random
+import resource
+import string
+import sys
+import time
+
+from fuzzy_index import FuzzyIndex
+
+
+def fake_words(n, rng):
+    words = set()
+    while len(words) < n:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+    return sorted(words)
+
+
+def fake_titles(n, words, rng):
+    for _ in range(n):
+        yield " ".join(rng.choices(words, k=rng.randint(1, 5))).title(), rng.choice(["Game", "Movie"]), 1
+
+
+def misspell(word, rng):
+    """One random typo: drop, swap, replace or insert a letter."""
+    i = rng.randrange(len(word))
+    kind = rng.choice(["drop", "swap", "replace", "insert"])
+    if kind == "drop":
+        return word[:i] + word[i + 1:]
+    if kind == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == "insert":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(180)
+    words = fake_words(max(1000, n // 10), rng)
+    titles = list(fake_titles(n, words, rng))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = FuzzyIndex(max_titles=n)
+    started = time.perf_counter()
+    index.add_many(titles)
+    build_s = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queries = []
+    for title, _, _ in rng.sample(titles, 1000):
+        query_words = title.lower().split()
+        k = rng.randrange(len(query_words))
+        if len(query_words[k]) > 3:
+            query_words[k] = misspell(query_words[k], rng)
+        queries.append(" ".join(query_words))
+
+    latencies = []
+    fixed = 0
+    for query in queries:
+        started = time.perf_counter()
+        corrected = index.correct(query)
+        if corrected:
+            index.titles_matching(corrected)
+            fixed += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    print(f"titles:       {len(index):,}  ({index.stats()['words']:,} words)")
+    print(f"build:        {build_s:.1f} s")
+    print(f"memory:       ~{(rss_after - rss_before) / 1024:.0f} MB (max RSS growth)")
+    print(f"corrected:    {fixed}/{len(queries)} misspelled queries")
+    print(
+        "query ms:     "
+        f"p50={percentile(latencies, 0.50):.2f} "
+        f"p95={percentile(latencies, 0.95):.2f} "
+        f"p99={percentile(latencies, 0.99):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
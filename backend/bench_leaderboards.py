@@ -0,0 +1,118 @@
+# backend/bench_leaderboards.py
+#
+# How long a full leaderboard recompute takes at scale.
+#   python bench_leaderboards.py [--ratings 10000000] [--media 200000] [--python]
+#   python bench_leaderboards.py --mongo-uri mongodb://localhost:27017
+#
+# Synthesizes the media_stats a catalog with that many ratings would have
+# (popularity falls off like a Zipf curve) and times the ranking step, with
+# NumPy when it is installed (or plain Python with --python). --mongo-uri
+# also times a real rebuild and an incremental refresh end to end against a
+# scratch database, which is dropped afterwards.
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import leaderboards
+from leaderboards import Leaderboards, media_type_of, rank, year_of
+
+SCRATCH_DB = "bench_leaderboards"
+
+
+def synthetic_stats(total_ratings, n_media, seed=180):
+    """media_stats-like documents whose counts add up to about total_ratings."""
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) ** 0.9 for i in range(n_media)]
+    scale = total_ratings / sum(weights)
+    docs = []
+    for i, w in enumerate(weights):
+        count = max(1, round(w * scale))
+        mean = min(5.0, max(1.0, rng.gauss(3.6, 0.7)))
+        docs.append({
+            "_id": f"bench:{i}",
+            "count": count,
+            "sum": round(count * mean),
+            "title": f"Title {i}",
+            "type": "Game" if i % 3 else "Movie",
+            "year": str(1980 + rng.randrange(45)),
+            "cover_url": "",
+            "updated_at": datetime.utcnow(),
+        })
+    return docs
+
+
+def time_rank(docs, prior_votes, depth):
+    types = [media_type_of(d["type"]) for d in docs]
+    years = [year_of(d["year"]) for d in docs]
+    counts = [d["count"] for d in docs]
+    sums = [d["sum"] for d in docs]
+    started = time.perf_counter()
+    boards, _, _ = rank(types, years, counts, sums, prior_votes, depth)
+    return time.perf_counter() - started, len(boards)
+
+
+def time_mongo(uri, docs, prior_votes, depth):
+    from pymongo import MongoClient
+
+    client = MongoClient(uri)
+    client.drop_database(SCRATCH_DB)
+    db = client[SCRATCH_DB]
+    for i in range(0, len(docs), 10_000):
+        db["media_stats"].insert_many(docs[i:i + 10_000], ordered=False)
+    db["media_stats"].create_index("updated_at")
+
+    boards = Leaderboards(db["leaderboards"], db["media_stats"], prior_votes, depth)
+    started = time.perf_counter()
+    written = boards.rebuild()
+    rebuild_s = time.perf_counter() - started
+
+    # steady state: the last pass has seen everything, then 1,000 media
+    # get new ratings and one incremental pass takes them in
+    db["leaderboards"].update_one(
+        {"_id": "_meta"}, {"$set": {"seen_until": datetime.utcnow()}}
+    )
+    db["media_stats"].update_many(
+        {"_id": {"$in": [d["_id"] for d in docs[::max(1, len(docs) // 1000)]]}},
+        {"$inc": {"count": 1, "sum": 5}, "$currentDate": {"updated_at": True}},
+    )
+    started = time.perf_counter()
+    boards.refresh()
+    refresh_s = time.perf_counter() - started
+
+    client.drop_database(SCRATCH_DB)
+    return rebuild_s, refresh_s, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark leaderboard recomputes.")
+    parser.add_argument("--ratings", type=int, default=10_000_000)
+    parser.add_argument("--media", type=int, default=200_000)
+    parser.add_argument("--prior-votes", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=100)
+    parser.add_argument("--python", action="store_true", help="rank without NumPy")
+    parser.add_argument("--mongo-uri", help="also time a real rebuild on a scratch database")
+    args = parser.parse_args()
+
+    if args.python:
+        leaderboards.np = None
+    started = time.perf_counter()
+    docs = synthetic_stats(args.ratings, args.media)
+    print(
+        f"{sum(d['count'] for d in docs):,} ratings over {len(docs):,} media "
+        f"(generated in {time.perf_counter() - started:.1f}s)"
+    )
+
+    seconds, n_boards = time_rank(docs, args.prior_votes, args.depth)
+    engine = "numpy" if leaderboards.np is not None else "python"
+    print(f"rank ({engine}): {seconds * 1000:,.0f} ms for {n_boards:,} boards")
+
+    if args.mongo_uri:
+        rebuild_s, refresh_s, written = time_mongo(args.mongo_uri, docs, args.prior_votes, args.depth)
+        print(f"mongo rebuild: {rebuild_s:.2f}s ({written:,} boards written)")
+        print(f"mongo refresh after 1,000 changed media: {refresh_s * 1000:,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
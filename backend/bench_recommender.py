@@ -0,0 +1,93 @@
+# backend/bench_recommender.py
+#
+# Build time and memory of the item-item neighbour computation at scale.
+#   python bench_recommender.py [--users 1000000] [--media 100000]
+#                               [--per-user 20] [--sample 5000] [--block 2000]
+#
+# Synthesizes ratings with popularity falling off like a Zipf curve and a
+# hidden taste per user, then times item_neighbors() on --sample media
+# (0 = all of them) and extrapolates to the whole catalog. Needs NumPy and
+# SciPy; reads nothing from Mongo.
+
+import argparse
+import resource
+import sys
+import time
+from array import array
+
+import recommender
+from recommender import item_neighbors
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def synthetic_ratings(n_users, n_media, per_user, seed=180):
+    """(rows, cols, stars) as the arrays load_ratings() builds, one rating per pair."""
+    np = recommender.np
+    rng = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, n_media + 1) ** 0.8
+    popularity /= popularity.sum()
+    counts = np.maximum(1, rng.poisson(per_user, n_users))
+    rows = np.repeat(np.arange(n_users, dtype=np.intc), counts)
+    cols = rng.choice(n_media, size=len(rows), p=popularity).astype(np.intc)
+
+    # one rating per (user, media)
+    pairs = np.unique(rows.astype(np.int64) * n_media + cols)
+    rows, cols = (pairs // n_media).astype(np.intc), (pairs % n_media).astype(np.intc)
+
+    # stars from a user taste x media flavour match, plus quality and noise
+    taste = rng.standard_normal((n_users, 4)).astype(np.float32)
+    flavour = rng.standard_normal((n_media, 4)).astype(np.float32)
+    quality = rng.normal(3.4, 0.6, n_media).astype(np.float32)
+    match = np.einsum("ij,ij->i", taste[rows], flavour[cols]) / 2
+    noise = rng.normal(0, 0.5, len(rows)).astype(np.float32)
+    stars = np.clip(np.rint(quality[cols] + match + noise), 1, 5).astype(np.float32)
+    return array("i", rows.tobytes()), array("i", cols.tobytes()), array("f", stars.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation build.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--media", type=int, default=100_000)
+    parser.add_argument("--per-user", type=int, default=20, help="mean ratings per user")
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--block", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=5000, help="media to time (0 = all)")
+    args = parser.parse_args()
+
+    if recommender.np is None:
+        sys.exit("bench_recommender.py needs NumPy and SciPy installed")
+
+    started = time.perf_counter()
+    rows, cols, stars = synthetic_ratings(args.users, args.media, args.per_user)
+    print(
+        f"{len(stars):,} ratings, {args.users:,} users x {args.media:,} media "
+        f"(generated in {time.perf_counter() - started:.1f}s, peak RSS {peak_rss_mb():,.0f} MB)"
+    )
+
+    # the most rated media first: they are the expensive ones
+    sample = args.sample or args.media
+    targets = list(range(min(sample, args.media)))
+    started = time.perf_counter()
+    found = 0
+    for _, similar in item_neighbors(
+        args.users, args.media, rows, cols, stars, targets,
+        k=args.neighbors, block=args.block,
+    ):
+        found += len(similar)
+    seconds = time.perf_counter() - started
+
+    print(
+        f"neighbours for {len(targets):,} media in {seconds:.1f}s "
+        f"({found / max(len(targets), 1):.1f} per media), peak RSS {peak_rss_mb():,.0f} MB"
+    )
+    if len(targets) < args.media:
+        # targets are the most popular, so this over-estimates the tail
+        print(f"whole catalog: at most ~{seconds * args.media / len(targets):,.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# backend/bench_search.py
+#
+# Load benchmark for /search and /movies.
+# Start fake_upstream.py and point the backend at it (see that file), then:
+#   python bench_search.py [--base http://127.0.0.1:5000] [--concurrency 16]
+#                          [--requests 2000] [--cold]
+# Reports throughput, error counts and p50/p95/p99 latency per endpoint.
+#
+# By default queries repeat, so most answers come from the local catalog
+# or the search cache. --cold makes every request's cache key unique (a
+# different page_size or page each time), so nothing is served from the
+# search cache. The local catalog (media_items) is asked before the cache,
+# though, so to measure the upstream path start the backend with the
+# catalog turned off as well:
+#   CATALOG_MIN_RESULTS=1000000000 python app.py
+# Otherwise --cold measures catalog + upstream together.
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_upstream import GAMES_FIXTURE, MOVIES_FIXTURE, load_fixture
+from search_filters import MAX_PAGE_SIZE
+
+ENDPOINTS = {"/search": GAMES_FIXTURE, "/movies": MOVIES_FIXTURE}
+
+
+def fixture_queries(path, rng):
+    """One or two words taken from each recorded title."""
+    queries = set()
+    for row in load_fixture(path):
+        words = (row.get("name") or row.get("Title") or "").split()
+        if words:
+            start = rng.randrange(len(words))
+            queries.add(" ".join(words[start:start + rng.choice([1, 2])]))
+    return sorted(queries)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run(base, endpoint, queries, total, concurrency, cold):
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    latencies, errors = [], {}
+    lock = threading.Lock()
+
+    def one(i):
+        params = {"q": queries[i % len(queries)]}
+        if cold:
+            rounds = i // len(queries)
+            params["page_size"] = 1 + rounds % MAX_PAGE_SIZE
+            params["page"] = 1 + rounds // MAX_PAGE_SIZE
+        started = time.perf_counter()
+        try:
+            r = session.get(base + endpoint, params=params, timeout=30)
+            status = r.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "seconds": round(wall, 2),
+        "req_per_s": round(total / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /search and /movies.")
+    parser.add_argument("--base", default=os.getenv("BENCH_BASE", "http://127.0.0.1:5000"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="per endpoint")
+    parser.add_argument("--cold", action="store_true",
+                        help="bypass the search cache (start the backend with CATALOG_MIN_RESULTS="
+                             "1000000000 to bypass the local catalog too)")
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    args = parser.parse_args()
+
+    rng = random.Random(180)
+    results = []
+    for endpoint, fixture in ENDPOINTS.items():
+        queries = fixture_queries(fixture, rng)
+        results.append(run(args.base, endpoint, queries, args.requests, args.concurrency, args.cold))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"concurrency={args.concurrency} requests={args.requests} cold={args.cold}")
+    for r in results:
+        print(
+            f"{r['endpoint']:<8} {r['req_per_s']:>8.1f} req/s  "
+            f"p50={r['p50_ms']:.1f} p95={r['p95_ms']:.1f} p99={r['p99_ms']:.1f} ms  "
+            f"ok={r['ok']} errors={r['errors'] or 0}"
+        )
+
+
+if __name__ == "__main__":
+    main()
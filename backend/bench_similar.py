@@ -0,0 +1,84 @@
+# backend/bench_similar.py
+#
+# Build time, file size and query latency of the similar-titles index.
+#   python bench_similar.py [--titles 500000] [--queries 2000] [--python]
+#
+# Synthesizes catalog cards (summary words drawn from a Zipf-like
+# vocabulary, a few platforms, a year and a type each), builds the index
+# into a temporary file, maps it the way a web worker does and times
+# SimilarIndex.similar() on random titles. --python queries without NumPy.
+# Reads nothing from Mongo.
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import similar_titles
+from similar_titles import SimilarIndex, build_index
+
+PLATFORMS = ["PC", "PlayStation", "PlayStation 2", "Xbox", "Switch", "Wii", "N64", "SNES"]
+
+
+def synthetic_cards(n_titles, vocabulary=50_000, seed=180):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocabulary)]
+    titles = vocab[:5000]
+    cumulative = list(itertools.accumulate(1 / (i + 1) for i in range(vocabulary)))
+    cards = []
+    for i in range(n_titles):
+        game = i % 3 != 0
+        cards.append({
+            "media_id": f"{'game' if game else 'movie'}:{i:07d}",
+            "title": " ".join(rng.choices(titles, k=rng.randint(1, 4))),
+            "summary": " ".join(rng.choices(vocab, cum_weights=cumulative, k=rng.randint(10, 60))),
+            "platforms": rng.sample(PLATFORMS, rng.randint(1, 3)) if game else ["Theaters", "Streaming"],
+            "year": str(rng.randint(1975, 2024)),
+            "type": "Game" if game else "Movie",
+        })
+    cards.sort(key=lambda c: c["media_id"])
+    return cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similar-titles index.")
+    parser.add_argument("--titles", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--python", action="store_true", help="query without NumPy")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    cards = synthetic_cards(args.titles)
+    print(f"{len(cards):,} cards generated in {time.perf_counter() - started:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similar.bin")
+        build_index(lambda: iter(cards), path)
+
+        if args.python:
+            similar_titles.np = None
+        started = time.perf_counter()
+        index = SimilarIndex(path)
+        print(f"mapped in {(time.perf_counter() - started) * 1000:,.1f} ms")
+
+        rng = random.Random(7)
+        picks = [rng.choice(cards)["media_id"] for _ in range(args.queries)]
+        timings = []
+        for media_id in picks:
+            started = time.perf_counter()
+            index.similar(media_id, args.limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        engine = "numpy" if similar_titles.np is not None else "python"
+        print(
+            f"query ({engine}): p50 {statistics.median(timings):.2f} ms, "
+            f"p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms, max {timings[-1]:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,90 @@ OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 if not CLIENT_ID or not CLIENT_SECRET:
     raise RuntimeError("Missing CLIENT_ID or CLIENT_SECRET for IGDB API.")
 
+# Where each upstream lives; point these at fake_upstream.py for benchmarks
+TWITCH_TOKEN_URL = os.getenv("TWITCH_TOKEN_URL", "https://id.twitch.tv/oauth2/token")
+IGDB_API_URL = os.getenv("IGDB_API_URL", "https://api.igdb.com/v4").rstrip("/")
+OMDB_API_URL = os.getenv("OMDB_API_URL", "https://www.omdbapi.com/")
+
+# ---------------------------
+#       SEARCH CACHE
+# ---------------------------
+# How many searches each worker keeps in memory, and for how long (seconds)
+# a cached result counts as fresh / may still be served while refreshing.
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "500"))
+SEARCH_CACHE_FRESH_TTL = int(os.getenv("SEARCH_CACHE_FRESH_TTL", "900"))
+SEARCH_CACHE_STALE_TTL = int(os.getenv("SEARCH_CACHE_STALE_TTL", "86400"))
+
+# ---------------------------
+#       LOCAL CATALOG
+# ---------------------------
+# Answer a search from media_items when it has at least this many matches
+CATALOG_MIN_RESULTS = int(os.getenv("CATALOG_MIN_RESULTS", "5"))
+
+# ---------------------------
+#       SHARED IGDB TOKEN
+# ---------------------------
+# "mongo" shares one Twitch token across every worker and host;
+# "file" shares it between workers on one host through a lock file.
+TOKEN_STORE = os.getenv("TOKEN_STORE", "mongo")
+TOKEN_STORE_PATH = os.getenv(
+    "TOKEN_STORE_PATH",
+    "/dev/shm/retrorewind_igdb_token.json"
+    if os.path.isdir("/dev/shm")
+    else os.path.join(os.path.dirname(__file__), ".igdb_token.json"),
+)
+
+# ---------------------------
+#       COVER PROXY
+# ---------------------------
+# Where /covers keeps downloaded cover art, and how big it may grow.
+# With COVER_PROXY on, search results point at /covers instead of IGDB/Amazon.
+COVER_CACHE_DIR = os.getenv(
+    "COVER_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cover_cache")
+)
+COVER_CACHE_MAX_MB = int(os.getenv("COVER_CACHE_MAX_MB", "512"))
+COVER_PROXY = os.getenv("COVER_PROXY", "0") == "1"
+
+# ---------------------------
+#       HOMEPAGE LISTS
+# ---------------------------
+# How often (seconds) /media/top lists are rebuilt from OMDb / ratings
+TOP_TITLES_REFRESH = int(os.getenv("TOP_TITLES_REFRESH", "21600"))
+
+# ---------------------------
+#       LEADERBOARDS
+# ---------------------------
+# Votes of evidence a title needs to move away from its type's mean star,
+# and how often (seconds) boards take in new ratings / are fully rebuilt
+LEADERBOARD_PRIOR_VOTES = int(os.getenv("LEADERBOARD_PRIOR_VOTES", "10"))
+LEADERBOARD_REFRESH = int(os.getenv("LEADERBOARD_REFRESH", "60"))
+LEADERBOARD_REBUILD = int(os.getenv("LEADERBOARD_REBUILD", "3600"))
+
+# ---------------------------
+#       RECOMMENDATIONS
+# ---------------------------
+# Neighbours kept per media, and how many co-raters it takes before two
+# media's similarity counts at half strength (built by recommender.py)
+RECS_NEIGHBORS = int(os.getenv("RECS_NEIGHBORS", "50"))
+RECS_SHRINK = int(os.getenv("RECS_SHRINK", "10"))
+
+# ---------------------------
+#       SIMILAR TITLES
+# ---------------------------
+# The content-based index file similar_titles.py writes (workers map it
+# read-only), and how many of the most rated titles get stored answers
+SIMILAR_INDEX_PATH = os.getenv(
+    "SIMILAR_INDEX_PATH", os.path.join(os.path.dirname(__file__), ".similar_index.bin")
+)
+SIMILAR_POPULAR = int(os.getenv("SIMILAR_POPULAR", "20000"))
+
+# ---------------------------
+#       BULK IMPORT
+# ---------------------------
+# Largest ratings / library upload accepted, and rows per bulk_write
+IMPORT_MAX_MB = int(os.getenv("IMPORT_MAX_MB", "50"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
 # ---------------------------
 # Exports
 # ---------------------------
@@ -46,4 +130,26 @@ __all__ = [
     "CLIENT_ID",
     "CLIENT_SECRET",
     "OMDB_API_KEY",
+    "TWITCH_TOKEN_URL",
+    "IGDB_API_URL",
+    "OMDB_API_URL",
+    "SEARCH_CACHE_SIZE",
+    "SEARCH_CACHE_FRESH_TTL",
+    "SEARCH_CACHE_STALE_TTL",
+    "CATALOG_MIN_RESULTS",
+    "TOKEN_STORE",
+    "TOKEN_STORE_PATH",
+    "COVER_CACHE_DIR",
+    "COVER_CACHE_MAX_MB",
+    "COVER_PROXY",
+    "TOP_TITLES_REFRESH",
+    "LEADERBOARD_PRIOR_VOTES",
+    "LEADERBOARD_REFRESH",
+    "LEADERBOARD_REBUILD",
+    "RECS_NEIGHBORS",
+    "RECS_SHRINK",
+    "SIMILAR_INDEX_PATH",
+    "SIMILAR_POPULAR",
+    "IMPORT_MAX_MB",
+    "IMPORT_BATCH_SIZE",
 ]
@@ -5,6 +5,7 @@ from bson import ObjectId
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from ids import thread_key, user_key
 
 load_dotenv()
 
@@ -29,34 +30,29 @@ def post_comment():
     if not content or not thread_id:
         return jsonify({"error": "Content and thread_id are required"}), 400
 
+    thread_oid = thread_key(thread_id)
+    if thread_oid is None:
+        return jsonify({"error": "Invalid thread_id"}), 400
+
     # Look up username if we have a user_id
     username = "Unknown"
-    if user_id:
-        try:
-            uid = ObjectId(user_id)
-            user = users_collection.find_one({"_id": uid})
-            if user:
-                username = user.get("username", "Unknown")
-        except Exception:
-            # leave username = "Unknown" if ObjectId or lookup fails
-            pass
+    uid = user_key(user_id) if user_id else None
+    if uid is not None:
+        user = users_collection.find_one({"_id": uid})
+        if user:
+            username = user.get("username", "Unknown")
 
     # build comment doc
-    new_comment = Comment(content, thread_id, user_id)
+    new_comment = Comment(content, thread_oid, uid)
     comment_data = new_comment.to_dict()
     comment_data["username"] = username   # 👈 add username field
 
     result = comments_collection.insert_one(comment_data)
 
     # Link the comment to its thread by _id
-    try:
-        thread_oid = ObjectId(thread_id)
-    except Exception:
-        return jsonify({"error": "Invalid thread_id"}), 400
-
     threads_collection.update_one(
         {"_id": thread_oid},
-        {"$push": {"comments": str(result.inserted_id)}}
+        {"$push": {"comments": result.inserted_id}}
     )
 
     return jsonify({"message": "Comment added successfully"}), 201
@@ -67,15 +63,20 @@ def post_comment():
 
 def get_comments_by_thread(thread_id):
     """Fetch all comments for a given thread."""
-    docs = comments_collection.find({"thread_id": thread_id})
+    thread_oid = thread_key(thread_id)
+    if thread_oid is None:
+        return jsonify([]), 200
+
+    docs = comments_collection.find({"thread_id": thread_oid})
     comments = []
     for doc in docs:
+        user_id = doc.get("user_id")
         comment = {
             "id": str(doc["_id"]),
             "content": doc.get("content", ""),
             "date_created": doc.get("date_created"),
-            "thread_id": doc.get("thread_id"),
-            "user_id": doc.get("user_id"),
+            "thread_id": str(doc.get("thread_id")),
+            "user_id": str(user_id) if user_id is not None else None,
             "username": doc.get("username"),      # 👈 new
             "deleted": doc.get("deleted", False),
         }
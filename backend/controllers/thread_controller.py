@@ -5,6 +5,7 @@ from bson import ObjectId
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from ids import user_key
 
 load_dotenv()
 
@@ -49,7 +50,7 @@ def create_thread():
         "title": title,
         "content": content,
         "category": category,
-        "user_id": str(oid),
+        "user_id": oid,
         "username": username,
         "date_created": datetime.utcnow(),
         "comments": [],
@@ -67,6 +68,15 @@ def create_thread():
 
 
 
+def shape_thread(doc):
+    """Thread document -> JSON, with ids as strings."""
+    doc["id"] = str(doc.pop("_id"))
+    if "user_id" in doc:
+        doc["user_id"] = str(doc["user_id"])
+    doc["comments"] = [str(c) for c in doc.get("comments", [])]
+    return doc
+
+
 def get_all_threads():
     """Fetch threads with simple pagination."""
     try:
@@ -93,19 +103,12 @@ def get_all_threads():
 
     threads = []
     for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        del doc["_id"]
-
         # backfill username if missing
         if "username" not in doc and "user_id" in doc:
-            try:
-                uid = ObjectId(doc["user_id"])
-                user = users_collection.find_one({"_id": uid})
-                doc["username"] = user.get("username", "Unknown") if user else "Unknown"
-            except Exception:
-                doc["username"] = "Unknown"
+            user = users_collection.find_one({"_id": user_key(doc["user_id"])})
+            doc["username"] = user.get("username", "Unknown") if user else "Unknown"
 
-        threads.append(doc)
+        threads.append(shape_thread(doc))
 
     return jsonify(threads), 200
 
@@ -121,9 +124,7 @@ def get_thread_by_id(thread_id):
     if not doc:
         return jsonify({"error": "Thread not found"}), 404
 
-    doc["id"] = str(doc["_id"])
-    del doc["_id"]
-    return jsonify(doc), 200
+    return jsonify(shape_thread(doc)), 200
 
 
 def update_thread(thread_id):
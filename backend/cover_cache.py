@@ -0,0 +1,245 @@
+# backend/cover_cache.py
+#
+# Local, content-addressed copies of cover images (IGDB covers and the
+# Amazon-hosted OMDb posters) so cards don't hotlink third parties.
+#
+# On disk:
+#   <dir>/keys/<key>                    -> "<sha256> <content type>" of the original
+#   <dir>/objects/ab/<sha256>           -> original image
+#   <dir>/objects/ab/<sha256>.w320.webp -> resized / WebP variants
+#
+# Files are touched on every read, so eviction removes the least recently
+# used images first once the directory grows past max_bytes (leaving alone
+# anything read in the last few seconds, which may be about to be sent).
+
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+
+from single_flight import SingleFlight
+from upstream import images
+
+try:  # Pillow is optional; without it we only serve the original bytes
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# key prefix -> (regex for the rest of the key, upstream URL template)
+COVER_SOURCES = {
+    "igdb": (
+        re.compile(r"^[A-Za-z0-9_]+$"),
+        "https://images.igdb.com/igdb/image/upload/t_cover_big/{}.jpg",
+    ),
+    "imdb": (
+        re.compile(r"^[A-Za-z0-9@._,+-]+\.jpg$"),
+        "https://m.media-amazon.com/images/M/{}",
+    ),
+}
+URL_PATTERNS = [
+    ("igdb", re.compile(r"^https://images\.igdb\.com/igdb/image/upload/t_[a-z0-9_]+/([A-Za-z0-9_]+)\.jpg$")),
+    ("imdb", re.compile(r"^https://m\.media-amazon\.com/images/M/([A-Za-z0-9@._,+-]+\.jpg)$")),
+]
+WIDTHS = (160, 320, 640)  # the only resize targets, so the cache stays small
+DEFAULT_TYPE = "image/jpeg"  # for key files written before types were recorded
+RECENT_SECONDS = 10  # files used this recently are never evicted
+
+
+class CoverNotFound(Exception):
+    """Unknown key, or upstream has no such image."""
+
+
+class CoverUnusable(Exception):
+    """Upstream answered with something that isn't a readable image."""
+
+
+def cover_key(url):
+    """"igdb-co1abc" style key for an upstream cover URL, or None if we don't proxy it."""
+    for source, pattern in URL_PATTERNS:
+        match = pattern.match(url or "")
+        if match:
+            return f"{source}-{match.group(1)}"
+    return None
+
+
+class CoverCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._fetches = SingleFlight()
+        self._lock = threading.Lock()
+        self._size = None  # total bytes on disk, computed lazily
+
+    # ---------------- public API ---------------- #
+
+    def path_for(self, key, width=None, webp=False):
+        """
+        Local file for a cover (fetching it first if needed).
+        Returns (path, etag, mimetype).
+        """
+        source_url = self._source_url(key)
+        digest, mimetype = self._digest_for(key)
+        original = self._object_path(digest) if digest else ""
+        if not os.path.isfile(original):
+            digest, mimetype = self._fetch(key, source_url)
+            original = self._object_path(digest)
+
+        if Image is None or (width is None and not webp):
+            self._touch(original)
+            return original, digest, mimetype
+
+        width = min(WIDTHS, key=lambda w: abs(w - width)) if width else None
+        suffix = f".w{width or 'full'}.{'webp' if webp else 'jpg'}"
+        variant = original + suffix
+        if not os.path.exists(variant):
+            self._make_variant(key, original, variant, width, webp)
+        self._touch(variant)
+        return variant, digest + suffix, "image/webp" if webp else "image/jpeg"
+
+    def stats(self):
+        return {"bytes": self._disk_size(), "max_bytes": self.max_bytes}
+
+    # ---------------- fetching ---------------- #
+
+    def _digest_for(self, key):
+        """(sha256, content type) recorded for a key, or ("", "") if there is none."""
+        try:
+            with open(self._key_path(key)) as f:
+                digest, _, mimetype = f.read().strip().partition(" ")
+        except OSError:
+            return "", ""
+        return digest, mimetype or DEFAULT_TYPE
+
+    def _source_url(self, key):
+        """Upstream URL for a key; only the hosts in COVER_SOURCES are allowed."""
+        source, _, rest = key.partition("-")
+        if source not in COVER_SOURCES or not COVER_SOURCES[source][0].match(rest):
+            raise CoverNotFound(key)
+        return COVER_SOURCES[source][1].format(rest)
+
+    def _fetch(self, key, source_url):
+        return self._fetches.do(key, self._download, key, source_url)
+
+    def _download(self, key, source_url):
+        r = images.get(source_url)
+        if r.status_code == 404:
+            raise CoverNotFound(key)
+        r.raise_for_status()
+        # e.g. an HTML error page sent with a 200: don't cache it as a cover
+        mimetype = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if not mimetype.startswith("image/"):
+            raise CoverUnusable(f"{key}: upstream sent {mimetype or 'no content type'}")
+
+        data = r.content
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):  # same bytes under two keys are stored once
+            self._write(path, data)
+        self._write(self._key_path(key), f"{digest} {mimetype}".encode(), counted=False)
+        self._evict_if_needed()
+        return digest, mimetype
+
+    def _make_variant(self, key, original, variant, width, webp):
+        try:
+            with Image.open(original) as img:
+                img = img.convert("RGB")
+                if width and img.width > width:
+                    img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+                out = io.BytesIO()
+                img.save(out, "WEBP" if webp else "JPEG", quality=82)
+        except FileNotFoundError:
+            raise  # evicted meanwhile; the caller asks again
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # not an image after all, or truncated: forget it so it is fetched again
+            for path in (original, self._key_path(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            with self._lock:
+                self._size = None
+            raise CoverUnusable(f"{key}: {e}")
+        self._write(variant, out.getvalue())
+        self._evict_if_needed()
+
+    # ---------------- disk ---------------- #
+
+    def _key_path(self, key):
+        return os.path.join(self.directory, "keys", key)
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _write(self, path, data, counted=True):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # never serve a half-written file
+        with self._lock:
+            if counted and self._size is not None:
+                self._size += len(data)
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _object_files(self):
+        root = os.path.join(self.directory, "objects")
+        for folder, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _disk_size(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._object_files())
+            return self._size
+
+    def _evict_if_needed(self):
+        """Delete least recently used files until we are under 90% of max_bytes."""
+        if self._disk_size() <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        recent = time.time() - RECENT_SECONDS
+        evicted = set()
+        with self._lock:
+            files = sorted(self._object_files(), key=lambda f: f[2])
+            for path, size, mtime in files:
+                if self._size <= target or mtime >= recent:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._size -= size
+                evicted.add(os.path.basename(path))
+        self._remove_keys(evicted)
+
+    def _remove_keys(self, digests):
+        """Delete the key files of evicted originals (variants' names have a suffix)."""
+        if not digests:
+            return
+        root = os.path.join(self.directory, "keys")
+        try:
+            names = os.listdir(root)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                with open(path) as f:
+                    digest = f.read().partition(" ")[0].strip()
+                if digest in digests:
+                    os.remove(path)
+            except OSError:
+                continue
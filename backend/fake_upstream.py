@@ -0,0 +1,203 @@
+# backend/fake_upstream.py
+#
+# A local stand-in for Twitch, IGDB and OMDb, answering from recorded
+# fixtures, so search can be benchmarked without spending quota.
+#
+#   python fake_upstream.py [--port 5055] [--latency-ms 80] [--jitter-ms 40]
+#                           [--error-rate 0.02] [--throttle-rate 0.01]
+#   python fake_upstream.py record halo zelda matrix   (needs real credentials)
+#
+# Then start the backend with:
+#   TWITCH_TOKEN_URL=http://127.0.0.1:5055/oauth2/token
+#   IGDB_API_URL=http://127.0.0.1:5055/v4
+#   OMDB_API_URL=http://127.0.0.1:5055/omdb/
+#
+# Supports: POST /oauth2/token, POST /v4/games, POST /v4/multiquery,
+# GET /omdb/?s=... (search) and ?i=... (lookup).
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from flask import Flask, jsonify, request
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "upstream")
+GAMES_FIXTURE = os.path.join(FIXTURE_DIR, "igdb_games.json")
+MOVIES_FIXTURE = os.path.join(FIXTURE_DIR, "omdb_movies.json")
+OMDB_PAGE_SIZE = 10
+
+
+def load_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _words(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _matches(query, title):
+    """Every query word appears in the title (roughly what both APIs do)."""
+    title_words = set(_words(title))
+    return all(w in title_words for w in _words(query))
+
+
+# ---------------- APICalypse ---------------- #
+
+def _number(pattern, body, default):
+    match = re.search(pattern, body)
+    return int(match.group(1)) if match else default
+
+
+def run_apicalypse(body, games):
+    """Answer one IGDB games query: search, where (year / platform), limit, offset."""
+    search = re.search(r'search\s+"([^"]*)"', body)
+    limit = _number(r"limit\s+(\d+)", body, 10)
+    offset = _number(r"offset\s+(\d+)", body, 0)
+    after = re.search(r"first_release_date\s*>=\s*(\d+)", body)
+    before = re.search(r"first_release_date\s*<\s*(\d+)", body)
+    platform = re.search(r'platforms\.name\s*~\s*\*"([^"]*)"\*', body)
+
+    found = []
+    for g in games:
+        if search and not _matches(search.group(1), g["name"]):
+            continue
+        released = g.get("first_release_date") or 0
+        if after and released < int(after.group(1)):
+            continue
+        if before and released >= int(before.group(1)):
+            continue
+        if platform and not any(
+            platform.group(1).lower() in p["name"].lower() for p in g.get("platforms", [])
+        ):
+            continue
+        found.append(g)
+    return found[offset:offset + limit]
+
+
+def split_multiquery(body):
+    """[(name, endpoint, inner body)] from 'query games "q0" { ... };' blocks."""
+    return re.findall(r'query\s+(\w+)\s+"([^"]+)"\s*\{(.*?)\};', body, re.S)
+
+
+# ---------------- server ---------------- #
+
+def create_fake_app(latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0, seed=None):
+    app = Flask(__name__)
+    games = load_fixture(GAMES_FIXTURE)
+    movies = load_fixture(MOVIES_FIXTURE)
+    rng = random.Random(seed)
+    counts = {"requests": 0, "errors": 0, "throttled": 0}
+
+    @app.before_request
+    def inject_latency_and_errors():
+        if request.path == "/stats":
+            return None
+        counts["requests"] += 1
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        roll = rng.random()
+        if roll < error_rate:
+            counts["errors"] += 1
+            return jsonify({"message": "injected failure"}), 503
+        if roll < error_rate + throttle_rate:
+            counts["throttled"] += 1
+            return jsonify({"message": "Too Many Requests"}), 429, {"Retry-After": "0.2"}
+        return None
+
+    @app.post("/oauth2/token")
+    def token():
+        return jsonify({"access_token": "fake-token", "expires_in": 5_000_000, "token_type": "bearer"})
+
+    @app.post("/v4/games")
+    def igdb_games():
+        return jsonify(run_apicalypse(request.get_data(as_text=True), games))
+
+    @app.post("/v4/multiquery")
+    def igdb_multiquery():
+        results = []
+        for endpoint, name, body in split_multiquery(request.get_data(as_text=True)):
+            found = run_apicalypse(body, games) if endpoint == "games" else []
+            results.append({"name": name, "result": found})
+        return jsonify(results)
+
+    @app.get("/omdb/")
+    def omdb():
+        if request.args.get("i"):
+            for m in movies:
+                if m["imdbID"] == request.args["i"]:
+                    return jsonify({**m, "Response": "True"})
+            return jsonify({"Response": "False", "Error": "Incorrect IMDb ID."})
+
+        query = request.args.get("s", "")
+        year = request.args.get("y")
+        found = [
+            m for m in movies
+            if _matches(query, m["Title"]) and (not year or m["Year"].startswith(year))
+        ]
+        page = max(int(request.args.get("page", 1) or 1), 1)
+        hits = found[(page - 1) * OMDB_PAGE_SIZE:page * OMDB_PAGE_SIZE]
+        if not hits:
+            return jsonify({"Response": "False", "Error": "Movie not found!"})
+        return jsonify({"Search": hits, "totalResults": str(len(found)), "Response": "True"})
+
+    @app.get("/stats")
+    def stats():
+        return jsonify(counts)
+
+    return app
+
+
+# ---------------- recording ---------------- #
+
+def record(queries):
+    """Fetch real IGDB / OMDb results for `queries` and merge them into the fixtures."""
+    from config import OMDB_API_KEY, OMDB_API_URL
+    from routes.search_routes import igdb_post
+    from upstream import omdb
+
+    games = {g["id"]: g for g in load_fixture(GAMES_FIXTURE)}
+    movies = {m["imdbID"]: m for m in load_fixture(MOVIES_FIXTURE)}
+    for q in queries:
+        body = (
+            f'search "{q}"; fields name, first_release_date, platforms.name, '
+            "summary, cover.image_id; limit 50;"
+        )
+        for g in igdb_post("games", body):
+            games[g["id"]] = g
+        r = omdb.get(OMDB_API_URL, params={"apikey": OMDB_API_KEY, "s": q, "type": "movie"})
+        r.raise_for_status()
+        for m in r.json().get("Search", []):
+            movies[m["imdbID"]] = m
+        print(f"{q}: {len(games)} games, {len(movies)} movies recorded")
+
+    for path, rows in ((GAMES_FIXTURE, games), (MOVIES_FIXTURE, movies)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(rows.values()), f, indent=1)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        record(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Fake Twitch / IGDB / OMDb for benchmarks.")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_fake_app(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.seed)
+    app.run(host="127.0.0.1", port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# backend/fuzzy_index.py
+#
+# Typo-tolerant lookups over titles we already know, for "did you mean".
+#
+# Two structures:
+#   - word vocabulary + trigram postings, to fix each misspelled word
+#     ("ocarnia" -> "ocarina") by edit distance among words sharing trigrams
+#   - word -> title ids postings (compact arrays), to list known titles that
+#     contain every word of the corrected query
+#
+# Like the suggest index, it holds at most max_titles and evicts the least
+# popular title to make room for a more popular one.
+#
+# bench_fuzzy.py measures build time, memory and query latency at 1M titles.
+
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import heappop, heappush, heapreplace
+
+from title_index import normalize_title
+
+CANDIDATES_PER_WORD = 30  # closest-by-trigram words we run edit distance on
+
+
+def trigrams(word: str):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _contains(sorted_ids, title_id) -> bool:
+    """Membership test on an ascending array of title ids."""
+    pos = bisect_left(sorted_ids, title_id)
+    return pos < len(sorted_ids) and sorted_ids[pos] == title_id
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment) distance, so a swapped
+    pair of letters counts as one typo. Gives up early once every path is
+    over `limit` and returns limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class FuzzyIndex:
+    def __init__(self, max_titles=200_000):
+        self.max_titles = max_titles
+        self._titles = {}  # title id -> [display title, type, weight, key]
+        self._ids = {}  # "type:normalized" (key) -> title id
+        self._next_id = 0  # ids only grow, so postings stay ascending
+        self._word_titles = {}  # word -> ascending array of title ids
+        self._gram_words = {}  # trigram -> list of words
+        # (weight, title id), least popular first, one per title; a weight
+        # here can be older (lower) than the title's and is refreshed on pop
+        self._by_weight = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def add(self, title, media_type="", weight=1):
+        self.add_many([(title, media_type, weight)])
+
+    def add_many(self, rows):
+        """Add (title, type, weight) rows, or bump the weight of titles we have."""
+        with self._lock:
+            for title, media_type, weight in rows:
+                normalized = normalize_title(title)
+                if not normalized:
+                    continue
+                key = f"{(media_type or '').lower()}:{normalized}"
+                title_id = self._ids.get(key)
+                if title_id is not None:
+                    self._titles[title_id][2] += weight
+                    continue
+                if len(self._titles) >= self.max_titles and not self._evict_below(weight):
+                    continue  # everything stored is more popular than this one
+
+                title_id = self._ids[key] = self._next_id
+                self._next_id += 1
+                self._titles[title_id] = [title, media_type, weight, key]
+                heappush(self._by_weight, (weight, title_id))
+                for word in set(normalized.split()):
+                    postings = self._word_titles.get(word)
+                    if postings is None:
+                        postings = self._word_titles[word] = array("I")
+                        for gram in trigrams(word):
+                            self._gram_words.setdefault(gram, []).append(word)
+                    postings.append(title_id)
+
+    def _evict_below(self, weight) -> bool:
+        """Drop the least popular title if it is less popular than `weight`."""
+        while True:
+            heap_weight, victim_id = self._by_weight[0]
+            victim = self._titles[victim_id]
+            if victim[2] == heap_weight:
+                break
+            heapreplace(self._by_weight, (victim[2], victim_id))  # bumped since
+        if victim[2] >= weight:
+            return False
+        heappop(self._by_weight)
+        del self._titles[victim_id]
+        del self._ids[victim[3]]
+        for word in set(victim[3].split(":", 1)[1].split()):
+            postings = self._word_titles[word]
+            del postings[bisect_left(postings, victim_id)]
+            if not postings:
+                del self._word_titles[word]
+                for gram in trigrams(word):
+                    words = self._gram_words[gram]
+                    words.remove(word)
+                    if not words:
+                        del self._gram_words[gram]
+        return True
+
+    # ---------------- queries ---------------- #
+
+    def correct_word(self, word: str) -> str:
+        """The known word closest to `word` (itself if known or nothing is close)."""
+        if word in self._word_titles or len(word) < 3:
+            return word
+        limit = 1 if len(word) <= 4 else 2
+
+        hits = Counter()
+        for gram in trigrams(word):
+            hits.update(self._gram_words.get(gram, ()))
+
+        best, best_rank = word, None
+        for candidate, _ in hits.most_common(CANDIDATES_PER_WORD):
+            distance = edit_distance(word, candidate, limit)
+            if distance > limit:
+                continue
+            # closer first, then the word used in more titles
+            rank = (distance, -len(self._word_titles[candidate]))
+            if best_rank is None or rank < best_rank:
+                best, best_rank = candidate, rank
+        return best
+
+    def correct(self, query: str):
+        """Corrected query, or None if every word was already known (or unfixable)."""
+        words = normalize_title(query).split()
+        with self._lock:
+            fixed = [self.correct_word(w) for w in words]
+        return " ".join(fixed) if fixed != words else None
+
+    def titles_matching(self, query: str, limit=10, media_type=None):
+        """Known titles containing every word of `query` (shortest titles first)."""
+        words = normalize_title(query).split()
+        if not words:
+            return []
+        with self._lock:
+            postings = [self._word_titles.get(w) for w in words]
+            if any(p is None for p in postings):
+                return []
+            # walk the rarest word's titles and binary-search the rest
+            postings.sort(key=len)
+            matches = []
+            for title_id in postings[0]:
+                if all(_contains(other, title_id) for other in postings[1:]):
+                    title, title_type = self._titles[title_id][:2]
+                    if media_type is None or title_type == media_type:
+                        matches.append({"title": title, "type": title_type})
+            matches.sort(key=lambda m: len(m["title"]))
+            return matches[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "titles": len(self._titles),
+                "words": len(self._word_titles),
+                "trigrams": len(self._gram_words),
+            }
+
+
+# The one index each worker keeps (filled by known_titles with the suggest index)
+did_you_mean_index = FuzzyIndex()
+
+
+def did_you_mean(query: str, media_type=None, limit=10):
+    """{"query": corrected, "titles": [...]} or None when there is no better query."""
+    corrected = did_you_mean_index.correct(query)
+    if not corrected:
+        return None
+    return {
+        "query": corrected,
+        "titles": did_you_mean_index.titles_matching(corrected, limit, media_type),
+    }
@@ -0,0 +1,27 @@
+# backend/ids.py
+#
+# The one stored form of every id that points at another document:
+#   - users:       ObjectId (what users._id is); ids that aren't valid
+#                  ObjectIds (old or external accounts) stay strings
+#   - threads:     ObjectId, for comments.thread_id / threads.comments
+#   - media:       string, for ratings.media_id and library item ids
+#                  (IGDB ids arrive as ints, OMDb ids as "tt..." strings)
+#
+# Everything that writes an id goes through these, and migrate_ids.py
+# rewrites older documents to match, so every read is one equality match
+# on one index instead of a guess at how the id was stored.
+
+from bson import ObjectId
+
+
+def user_key(user_id):
+    return ObjectId(user_id) if ObjectId.is_valid(user_id) else str(user_id)
+
+
+def thread_key(thread_id):
+    """ObjectId, or None when thread_id can't be one."""
+    return ObjectId(thread_id) if ObjectId.is_valid(thread_id) else None
+
+
+def media_key(media_id) -> str:
+    return str(media_id).strip()
@@ -0,0 +1,194 @@
+# backend/igdb_scheduler.py
+#
+# Every IGDB request goes through one scheduler per worker so we stay under
+# IGDB's limits (4 requests/second, 8 open requests) instead of getting 429s.
+# Requests wait in a queue until the rate limiter lets them out, and requests
+# queued at the same moment are packed into one /v4/multiquery call
+# (up to 10 queries count as a single request).
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+IGDB_RATE = 4  # requests per second, across all workers
+IGDB_MAX_OPEN = 8  # concurrent requests IGDB allows
+MULTIQUERY_MAX = 10  # queries IGDB accepts in one multiquery
+
+
+class IgdbBusy(TimeoutError):
+    """A queued request hit its deadline before IGDB capacity freed up."""
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline) -> bool:
+        """Block until a token is free; False if that would pass `deadline`."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class _Pending:
+    def __init__(self, endpoint, body, deadline):
+        self.endpoint = endpoint
+        self.body = body
+        self.deadline = deadline
+        self.future = Future()
+
+
+class IgdbScheduler:
+    """
+    query(endpoint, body) queues an APICalypse query and waits for its result.
+
+    `post(path, body)` does the actual HTTP call and returns parsed JSON;
+    `ledger` (optional QuotaLedger) makes the rate limit global across
+    workers rather than per worker.
+    """
+
+    def __init__(self, post, ledger=None, rate=IGDB_RATE, max_open=IGDB_MAX_OPEN,
+                 batch_window=0.02, default_timeout=8):
+        self.post = post
+        self.ledger = ledger
+        self.rate = rate
+        self.batch_window = batch_window
+        self.default_timeout = default_timeout
+
+        self.bucket = TokenBucket(rate)
+        self._open = threading.BoundedSemaphore(max_open)
+        self._senders = ThreadPoolExecutor(max_workers=max_open, thread_name_prefix="igdb")
+        self._queue = []
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self.stats = {"queries": 0, "requests": 0, "batched": 0, "timeouts": 0}
+
+    # ---------------- public API ---------------- #
+
+    def query(self, endpoint, body, timeout=None):
+        """Run one query (e.g. endpoint="games") and return IGDB's JSON list."""
+        timeout = timeout or self.default_timeout
+        pending = _Pending(endpoint, body, time.monotonic() + timeout)
+        with self._cond:
+            self._start_dispatcher()
+            self._queue.append(pending)
+            self.stats["queries"] += 1
+            self._cond.notify()
+        # the deadline only covers queueing; once sent, the HTTP client's own
+        # timeouts bound how long we wait
+        return pending.future.result()
+
+    def snapshot(self):
+        with self._cond:
+            return {**self.stats, "queued": len(self._queue)}
+
+    # ---------------- dispatcher ---------------- #
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(
+                target=self._run, name="igdb-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            # give requests arriving at the same moment a chance to share a batch
+            time.sleep(self.batch_window)
+            with self._cond:
+                batch = self._queue[:MULTIQUERY_MAX]
+                del self._queue[:MULTIQUERY_MAX]
+
+            batch = self._drop_expired(batch)
+            if not batch:
+                continue
+            deadline = min(p.deadline for p in batch)
+            if not self._wait_for_capacity(deadline):
+                self._fail(batch, IgdbBusy("IGDB is busy, try again shortly"))
+                continue
+            self._senders.submit(self._send, batch)
+
+    def _drop_expired(self, batch):
+        now = time.monotonic()
+        alive = []
+        for p in batch:
+            if p.deadline <= now:
+                self._fail([p], IgdbBusy("IGDB is busy, try again shortly"))
+            else:
+                alive.append(p)
+        return alive
+
+    def _fail(self, batch, error):
+        with self._cond:
+            self.stats["timeouts"] += len(batch)
+        for p in batch:
+            if not p.future.done():
+                p.future.set_exception(error)
+
+    def _wait_for_capacity(self, deadline) -> bool:
+        """Rate token, then a free connection slot, then the global ledger."""
+        if not self.bucket.acquire(deadline):
+            return False
+        if not self._open.acquire(timeout=max(0, deadline - time.monotonic())):
+            return False
+        if self.ledger is None:
+            return True
+        try:
+            # other workers may have used this second's budget already
+            while self.ledger.add("igdb") > self.rate:
+                self.ledger.add("igdb", -1)  # hand back the slot we couldn't use
+                next_second = time.time() // 1 + 1
+                if time.monotonic() + (next_second - time.time()) > deadline:
+                    self._open.release()
+                    return False
+                time.sleep(next_second - time.time())
+        except Exception:
+            pass  # the ledger is advisory; the local bucket still applies
+        return True
+
+    def _send(self, batch):
+        try:
+            with self._cond:
+                self.stats["requests"] += 1
+                if len(batch) > 1:
+                    self.stats["batched"] += len(batch)
+            if len(batch) == 1:
+                p = batch[0]
+                p.future.set_result(self.post(p.endpoint, p.body))
+                return
+
+            results = self.post("multiquery", multiquery_body(batch))
+            by_name = {r.get("name"): r.get("result", []) for r in results}
+            for i, p in enumerate(batch):
+                p.future.set_result(by_name.get(f"q{i}", []))
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+        finally:
+            self._open.release()
+
+
+def multiquery_body(batch) -> str:
+    """Wrap each pending query as a named sub-query: query games "q0" { ... };"""
+    return "\n".join(
+        f'query {p.endpoint} "q{i}" {{ {p.body} }};' for i, p in enumerate(batch)
+    )
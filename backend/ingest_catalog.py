@@ -0,0 +1,188 @@
+# backend/ingest_catalog.py
+#
+# Bulk-load IGDB / OMDb catalog dumps into media_items.
+# Run with: python ingest_catalog.py <dump.jsonl|dump.csv>[.gz] [options]
+#
+# Records are streamed one at a time, shaped into search cards and upserted
+# in batches (unordered bulk_write), so memory stays flat whatever the dump
+# size. After every batch the number of records consumed is checkpointed;
+# running the same command again resumes from there.
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+from media_catalog import MediaCatalog, NO_COVER, shape_game, shape_movie
+
+
+def open_dump(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def dump_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+def read_records(path, skip=0):
+    """
+    Yield raw records (dicts) from a JSONL or CSV dump, skipping the first
+    `skip`. Skipped JSONL lines are not even parsed, so resuming is cheap.
+    Unparseable lines are yielded as None so they still count as consumed.
+    """
+    with open_dump(path) as f:
+        if dump_format(path) == "csv":
+            for n, row in enumerate(csv.DictReader(f)):
+                if n >= skip:
+                    yield row
+            return
+        for n, line in enumerate(f):
+            if n < skip:
+                continue
+            if not line.strip():
+                yield None
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def _split_list(value):
+    """Platforms arrive as a list, a list of {"name"}, or "N64|PC" in CSV."""
+    if isinstance(value, list):
+        return [v.get("name") if isinstance(v, dict) else v for v in value if v]
+    if isinstance(value, str) and value:
+        return [v.strip() for v in value.replace("|", ",").split(",") if v.strip()]
+    return []
+
+
+def normalize_record(raw):
+    """
+    Shape one dump record like a search result, or None if it can't be.
+    Understands raw IGDB games, raw OMDb movies and records already in
+    card form (id / title / type).
+    """
+    if not isinstance(raw, dict):
+        return None
+
+    if raw.get("imdbID"):
+        return shape_movie(raw)
+
+    if raw.get("name") is not None and raw.get("id") is not None:
+        game = dict(raw)
+        if isinstance(game["id"], str) and game["id"].isdigit():
+            game["id"] = int(game["id"])  # CSV ids match the ints IGDB returns
+        game["platforms"] = [{"name": p} for p in _split_list(raw.get("platforms"))]
+        if raw.get("cover_image_id") and not raw.get("cover"):
+            game["cover"] = {"image_id": raw["cover_image_id"]}
+        if isinstance(game.get("first_release_date"), str):
+            try:
+                game["first_release_date"] = int(game["first_release_date"])
+            except ValueError:
+                game["first_release_date"] = None
+        return shape_game(game)
+
+    if raw.get("id") and raw.get("title") and raw.get("type") in ("Game", "Movie"):
+        return {
+            "id": raw["id"],
+            "title": raw["title"],
+            "year": raw.get("year") or "",
+            "platforms": _split_list(raw.get("platforms")),
+            "summary": raw.get("summary") or "No summary available.",
+            "coverUrl": raw.get("coverUrl") or NO_COVER,
+            "type": raw["type"],
+        }
+    return None
+
+
+# ---------------- checkpoints ---------------- #
+
+def checkpoint_path(path):
+    return path + ".checkpoint.json"
+
+
+def load_checkpoint(path):
+    """Records already consumed from this dump (0 if it changed or is new)."""
+    try:
+        with open(checkpoint_path(path)) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if saved.get("size") != os.path.getsize(path):
+        return 0  # a different dump under the same name: start over
+    return saved.get("records", 0)
+
+
+def save_checkpoint(path, records):
+    tmp = checkpoint_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"size": os.path.getsize(path), "records": records}, f)
+    os.replace(tmp, checkpoint_path(path))
+
+
+# ---------------- pipeline ---------------- #
+
+def ingest(path, catalog, batch_size=1000, restart=False, report_every=5.0, out=sys.stdout):
+    """Stream `path` into the catalog. Returns a stats dict."""
+    done = 0 if restart else load_checkpoint(path)
+    stats = {"resumed_at": done, "records": 0, "written": 0, "invalid": 0}
+    started = last_report = time.monotonic()
+
+    batch = []
+    for raw in read_records(path, skip=done):
+        stats["records"] += 1
+        card = normalize_record(raw)
+        if card is None or card.get("id") is None or not card.get("title"):
+            stats["invalid"] += 1
+        else:
+            batch.append(card)
+
+        if len(batch) >= batch_size:
+            stats["written"] += catalog.upsert_many(batch)
+            batch = []
+            save_checkpoint(path, done + stats["records"])
+            if time.monotonic() - last_report >= report_every:
+                last_report = time.monotonic()
+                _report(stats, last_report - started, out)
+
+    if batch:
+        stats["written"] += catalog.upsert_many(batch)
+    save_checkpoint(path, done + stats["records"])
+
+    stats["seconds"] = round(time.monotonic() - started, 1)
+    _report(stats, stats["seconds"], out)
+    return stats
+
+
+def _report(stats, elapsed, out):
+    rate = stats["records"] / elapsed if elapsed else 0
+    print(
+        f"{stats['resumed_at'] + stats['records']:,} records "
+        f"({rate:,.0f}/s), {stats['written']:,} written, {stats['invalid']:,} invalid",
+        file=out,
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a catalog dump into media_items.")
+    parser.add_argument("path", help="JSONL or CSV dump, optionally .gz")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    args = parser.parse_args()
+
+    from config import db  # only needed when run for real
+
+    catalog = MediaCatalog(db["media_items"])
+    ingest(args.path, catalog, batch_size=args.batch_size, restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/known_titles.py
+#
+# Keeps the in-memory title indexes (typeahead + "did you mean") filled with
+# the titles Mongo already knows about, and fed as new ones arrive.
+
+import threading
+
+from pymongo.errors import PyMongoError
+
+from fuzzy_index import did_you_mean_index
+from title_index import suggest_index
+
+INDEXES = (suggest_index, did_you_mean_index)
+
+_build_started = threading.Event()
+
+
+def known_title_rows(db):
+    """
+    (title, type, weight) for every title we know, weighted by popularity:
+    each rating counts 3, each library entry 2, each catalog title 1.
+    """
+    for row in db["ratings"].aggregate([
+        {"$match": {"title": {"$nin": ["", None]}}},
+        {"$group": {"_id": {"title": "$title", "type": "$type"}, "n": {"$sum": 1}}},
+    ]):
+        yield row["_id"]["title"], row["_id"].get("type", ""), 3 * row["n"]
+
+    for row in db["library"].aggregate([
+        {"$match": {"title": {"$nin": ["", None]}}},
+        {"$group": {"_id": {"title": "$title", "type": "$type"}, "n": {"$sum": 1}}},
+    ]):
+        yield row["_id"]["title"], row["_id"].get("type", ""), 2 * row["n"]
+
+    # users whose embedded library hasn't been moved yet (see user_library.py)
+    for row in db["users"].aggregate([
+        {"$match": {"profile.library.0": {"$exists": True}}},
+        {"$unwind": "$profile.library"},
+        {"$group": {
+            "_id": {"title": "$profile.library.title", "type": "$profile.library.type"},
+            "n": {"$sum": 1},
+        }},
+    ]):
+        yield row["_id"].get("title"), row["_id"].get("type", ""), 2 * row["n"]
+
+    for doc in db["media_items"].find({}, {"title": 1, "type": 1, "_id": 0}):
+        yield doc.get("title"), doc.get("type", ""), 1
+
+
+def load_known_titles(db):
+    rows = list(known_title_rows(db))
+    for index in INDEXES:
+        index.add_many(rows)
+
+
+def start_background_build(db):
+    """Fill the indexes in a background thread, once per worker."""
+    if _build_started.is_set():
+        return
+    _build_started.set()
+
+    def build():
+        try:
+            load_known_titles(db)
+        except PyMongoError:
+            _build_started.clear()  # try again on the next request
+
+    threading.Thread(target=build, name="title-indexes", daemon=True).start()
+
+
+def remember_title(title, media_type="", weight=1):
+    """Add one newly seen title (or bump its popularity) in every index."""
+    for index in INDEXES:
+        index.add(title, media_type, weight)
@@ -0,0 +1,394 @@
+# backend/leaderboards.py
+#
+# Top-rated boards sliced by type and year, one document per slice in
+# "leaderboards":
+#     {_id: "Movie:1999", type, year, items: [...], built_at}
+#     {_id: "_meta", full_built_at, seen_until, priors, lease_owner, lease_until}
+# A missing part of a slice id is "all": "all:all", "Game:all", "all:2004".
+#
+# Scores are Bayesian averages, (sum + m * C) / (count + m), where C is the
+# mean star of the media's type and m (prior_votes) is how many votes it
+# takes to pull a title away from that mean, so a single 5-star rating
+# doesn't outrank hundreds of 4.6s.
+#
+# The input is the per-media aggregates in media_stats, never "ratings".
+# A full rebuild scores every media at once (vectorized when NumPy is
+# installed). In between, refresh() merges just the media whose stats
+# changed into the boards they sit on. Boards keep `depth` entries, more
+# than a page, so a title dropping off still leaves a full page behind
+# until the next rebuild.
+
+import heapq
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from media_catalog import NO_COVER
+from shared_state import WORKER_ID
+from single_flight import SingleFlight
+
+try:  # NumPy is optional; plain Python is fine for a small catalog
+    import numpy as np
+except ImportError:
+    np = None
+
+ALL = "all"
+META_ID = "_meta"
+MEDIA_TYPES = ("Game", "Movie")
+STATS_FIELDS = {
+    "count": 1, "sum": 1, "title": 1, "type": 1, "year": 1, "cover_url": 1, "updated_at": 1,
+}
+WRITE_BATCH = 500
+# changed media re-read on every refresh, in case a write landed out of order
+REFRESH_OVERLAP = timedelta(seconds=30)
+# past this many changed media, a full rebuild is cheaper than merging
+REFRESH_MAX_CHANGED = 50_000
+
+
+def slice_id(media_type=None, year=None):
+    return f"{media_type or ALL}:{year or ALL}"
+
+
+def media_type_of(value):
+    return value if value in MEDIA_TYPES else ""
+
+
+def year_of(value):
+    """"1999", "1999–2003" and "1999-11-05" all mean 1999; "" if there is no year."""
+    match = re.match(r"\s*(\d{4})", str(value or ""))
+    return match.group(1) if match else ""
+
+
+def slices_of(media_type, year):
+    """Every board a media with this (normalized) type and year belongs on."""
+    ids = [slice_id()]
+    if media_type:
+        ids.append(slice_id(media_type=media_type))
+    if year:
+        ids.append(slice_id(year=year))
+    if media_type and year:
+        ids.append(slice_id(media_type, year))
+    return ids
+
+
+def bayesian(count, total, prior_mean, prior_votes):
+    return (total + prior_votes * prior_mean) / (count + prior_votes)
+
+
+def board_item(media_id, doc, score):
+    """A board entry, shaped like the cards /media/top serves."""
+    return {
+        "id": media_id,
+        "title": doc.get("title") or "",
+        "year": doc.get("year") or "",
+        "platforms": [],
+        "summary": "",
+        "coverUrl": doc.get("cover_url") or NO_COVER,
+        "type": doc.get("type") or "",
+        "average_stars": round(doc["sum"] / doc["count"], 2),
+        "rating_count": doc["count"],
+        "score": round(score, 4),
+    }
+
+
+# ---------------- ranking ---------------- #
+
+def rank(types, years, counts, sums, prior_votes, depth):
+    """
+    Score every media and pick each slice's best `depth`.
+    Returns (boards {slice id: [row, ...] best first}, scores, priors).
+    Ties go to the media with more votes.
+    """
+    if not counts:
+        return {}, [], {ALL: 0.0}
+    if np is not None:
+        return _rank_numpy(types, years, counts, sums, prior_votes, depth)
+    return _rank_python(types, years, counts, sums, prior_votes, depth)
+
+
+def _priors(totals):
+    """{type: mean star} from {type: [count, sum]}, plus the overall mean under "all"."""
+    count = sum(c for c, _ in totals.values())
+    priors = {ALL: sum(s for _, s in totals.values()) / count}
+    for media_type, (c, s) in totals.items():
+        if media_type and c:
+            priors[media_type] = s / c
+    return priors
+
+
+def _rank_python(types, years, counts, sums, prior_votes, depth):
+    totals = {}
+    for t, c, s in zip(types, counts, sums):
+        entry = totals.setdefault(t, [0, 0])
+        entry[0] += c
+        entry[1] += s
+    priors = _priors(totals)
+    scores = [
+        bayesian(c, s, priors.get(t, priors[ALL]), prior_votes)
+        for t, c, s in zip(types, counts, sums)
+    ]
+
+    members = {}
+    for row, (t, y) in enumerate(zip(types, years)):
+        for sid in slices_of(t, y):
+            members.setdefault(sid, []).append(row)
+    boards = {
+        sid: heapq.nlargest(depth, rows, key=lambda r: (scores[r], counts[r]))
+        for sid, rows in members.items()
+    }
+    return boards, scores, priors
+
+
+def _rank_numpy(types, years, counts, sums, prior_votes, depth):
+    counts = np.asarray(counts, dtype=np.float64)
+    sums = np.asarray(sums, dtype=np.float64)
+    type_names, type_codes = np.unique(np.asarray(types, dtype=str), return_inverse=True)
+    year_names, year_codes = np.unique(np.asarray(years, dtype=str), return_inverse=True)
+
+    type_counts = np.bincount(type_codes, weights=counts)
+    type_sums = np.bincount(type_codes, weights=sums)
+    priors = _priors({
+        str(t): (type_counts[i], type_sums[i]) for i, t in enumerate(type_names)
+    })
+    prior_means = np.array([priors.get(str(t), priors[ALL]) for t in type_names])
+    scores = (sums + prior_votes * prior_means[type_codes]) / (counts + prior_votes)
+
+    # one global order, best first; a stable sort by group keeps it per group
+    order = np.lexsort((-counts, -scores))
+
+    def grouped(codes):
+        """(group code, that group's best rows) for every value in `codes`."""
+        ranked = order[np.argsort(codes[order], kind="stable")]
+        sorted_codes = codes[ranked]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ends = np.r_[starts[1:], len(ranked)]
+        for start, end in zip(starts, ends):
+            yield sorted_codes[start], ranked[start:min(end, start + depth)]
+
+    boards = {slice_id(): order[:depth].tolist()}
+    for code, rows in grouped(type_codes):
+        if type_names[code]:
+            boards[slice_id(media_type=str(type_names[code]))] = rows.tolist()
+    for code, rows in grouped(year_codes):
+        if year_names[code]:
+            boards[slice_id(year=str(year_names[code]))] = rows.tolist()
+    n_years = len(year_names)
+    for code, rows in grouped(type_codes * n_years + year_codes):
+        t, y = type_names[code // n_years], year_names[code % n_years]
+        if t and y:
+            boards[slice_id(str(t), str(y))] = rows.tolist()
+    return boards, scores.tolist(), priors
+
+
+# ---------------- materialized boards ---------------- #
+
+class Leaderboards:
+    def __init__(self, collection, stats, prior_votes=10, depth=100,
+                 refresh_every=60, rebuild_every=3600):
+        self.collection = collection
+        self.stats = stats  # the media_stats collection
+        self.prior_votes = prior_votes
+        self.depth = depth
+        self.refresh_every = refresh_every
+        self.rebuild_every = rebuild_every
+        self._built = False
+        self._indexed = False
+        self._builds = SingleFlight()
+        self._scheduler_started = threading.Event()
+
+    def get(self, media_type=None, year=None):
+        """
+        {"items", "built_at"} for one slice (no items if nothing in it was
+        rated). Builds the boards first if they have never been built.
+        """
+        self.start_scheduler()
+        if not self._built:
+            if self._meta() is None:
+                self._builds.do("rebuild", self.rebuild)
+            if self._meta() is None:
+                raise RuntimeError("leaderboards are not built yet")
+            self._built = True
+        doc = self.collection.find_one(
+            {"_id": slice_id(media_type, year)}, {"items": 1, "built_at": 1}
+        )
+        if doc is None:
+            return {"items": [], "built_at": self._meta()["full_built_at"]}
+        return doc
+
+    def rebuild(self):
+        """Recompute every board. Returns how many were written (None: leased elsewhere)."""
+        if not self._try_lease(seconds=600):
+            return None
+        try:
+            return self._rebuild()
+        finally:
+            self._release()
+
+    def refresh(self):
+        """Merge media whose stats changed since the last pass into their boards."""
+        if not self._try_lease():
+            return None
+        try:
+            meta = self._meta()
+            if meta is None or "seen_until" not in meta:
+                return self._rebuild()
+            return self._refresh(meta)
+        finally:
+            self._release()
+
+    def _rebuild(self):
+        ids, docs, types, years, counts, sums = [], [], [], [], [], []
+        latest = None
+        for doc in self.stats.find({"count": {"$gt": 0}}, STATS_FIELDS):
+            ids.append(doc.pop("_id"))
+            docs.append(doc)
+            types.append(media_type_of(doc.get("type")))
+            years.append(year_of(doc.get("year")))
+            counts.append(doc["count"])
+            sums.append(doc["sum"])
+            if doc.get("updated_at") and (latest is None or doc["updated_at"] > latest):
+                latest = doc["updated_at"]
+
+        boards, scores, priors = rank(types, years, counts, sums, self.prior_votes, self.depth)
+        stamp = datetime.utcnow()
+        ops = []
+        for sid, rows in boards.items():
+            media_type, year = _slice_parts(sid)
+            ops.append(ReplaceOne({"_id": sid}, {
+                "type": media_type,
+                "year": year,
+                "items": [board_item(ids[r], docs[r], scores[r]) for r in rows],
+                "built_at": stamp,
+            }, upsert=True))
+            if len(ops) >= WRITE_BATCH:
+                self.collection.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        # slices nothing is rated in any more
+        self.collection.delete_many({"_id": {"$ne": META_ID}, "built_at": {"$lt": stamp}})
+
+        self._set_meta({
+            "full_built_at": stamp,
+            "seen_until": (latest or stamp) - REFRESH_OVERLAP,
+            "priors": priors,
+        })
+        return len(boards)
+
+    def _refresh(self, meta):
+        if not self._indexed:
+            self.stats.create_index("updated_at")
+            self._indexed = True
+        changed = list(
+            self.stats.find({"updated_at": {"$gte": meta["seen_until"]}}, STATS_FIELDS)
+            .limit(REFRESH_MAX_CHANGED + 1)
+        )
+        if len(changed) > REFRESH_MAX_CHANGED:
+            return self._rebuild()
+        if not changed:
+            return 0
+
+        priors = meta["priors"]
+        updates = {}  # slice id -> {media_id: new item, or None to drop it}
+        for doc in changed:
+            media_type = media_type_of(doc.get("type"))
+            item = None
+            if doc.get("count", 0) > 0:
+                prior = priors.get(media_type, priors[ALL])
+                item = board_item(
+                    doc["_id"], doc, bayesian(doc["count"], doc["sum"], prior, self.prior_votes)
+                )
+            for sid in slices_of(media_type, year_of(doc.get("year"))):
+                updates.setdefault(sid, {})[doc["_id"]] = item
+
+        current = {
+            d["_id"]: d.get("items", [])
+            for d in self.collection.find({"_id": {"$in": list(updates)}}, {"items": 1})
+        }
+        now = datetime.utcnow()
+        ops = []
+        for sid, moved in updates.items():
+            items = [i for i in current.get(sid, []) if i["id"] not in moved]
+            items += [i for i in moved.values() if i is not None]
+            items.sort(key=lambda i: (i["score"], i["rating_count"]), reverse=True)
+            media_type, year = _slice_parts(sid)
+            ops.append(UpdateOne({"_id": sid}, {"$set": {
+                "type": media_type,
+                "year": year,
+                "items": items[:self.depth],
+                "built_at": now,
+            }}, upsert=True))
+        self.collection.bulk_write(ops, ordered=False)
+
+        latest = max(d["updated_at"] for d in changed)
+        self._set_meta({"seen_until": max(latest - REFRESH_OVERLAP, meta["seen_until"])})
+        return len(ops)
+
+    def _meta(self):
+        return self.collection.find_one(
+            {"_id": META_ID, "full_built_at": {"$exists": True}},
+            {"full_built_at": 1, "seen_until": 1, "priors": 1},
+        )
+
+    def _set_meta(self, fields):
+        self.collection.update_one({"_id": META_ID}, {"$set": fields}, upsert=True)
+
+    # ---------------- schedule ---------------- #
+
+    def start_scheduler(self):
+        """Refresh (and periodically rebuild) in a background thread, once per worker."""
+        if self._scheduler_started.is_set():
+            return
+        self._scheduler_started.set()
+        threading.Thread(target=self._run, name="leaderboards", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                meta = self._meta()
+                age = (datetime.utcnow() - meta["full_built_at"]).total_seconds() if meta else None
+                if age is None or age > self.rebuild_every:
+                    self._builds.do("rebuild", self.rebuild)
+                else:
+                    self.refresh()
+            except Exception:
+                pass  # boards keep serving as they are; retry next round
+            time.sleep(self.refresh_every)
+
+    # ---------------- lease ---------------- #
+
+    def _try_lease(self, seconds=120) -> bool:
+        now = time.time()
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "_id": META_ID,
+                    "$or": [
+                        {"lease_until": {"$exists": False}},
+                        {"lease_until": {"$lt": now}},
+                        {"lease_owner": WORKER_ID},
+                    ],
+                },
+                {"$set": {"lease_owner": WORKER_ID, "lease_until": now + seconds}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        return doc is not None and doc.get("lease_owner") == WORKER_ID
+
+    def _release(self):
+        self.collection.update_one(
+            {"_id": META_ID, "lease_owner": WORKER_ID},
+            {"$unset": {"lease_owner": "", "lease_until": ""}},
+        )
+
+
+def _slice_parts(sid):
+    """(type or None, year or None) from a slice id."""
+    media_type, year = sid.split(":")
+    return (None if media_type == ALL else media_type), (None if year == ALL else year)
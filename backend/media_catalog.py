@@ -0,0 +1,193 @@
+# backend/media_catalog.py
+
+import re
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+
+# Fields that make up a search card (same shape search_routes returns)
+CARD_FIELDS = ["id", "title", "year", "platforms", "summary", "coverUrl", "type"]
+NO_COVER = "https://placehold.co/200x280?text=No+Cover"
+
+
+def fmt_unix_date(ts):
+    """Turn IGDB's Unix timestamp into YYYY-MM-DD."""
+    if not ts:
+        return None
+    try:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def cover_url(image_id):
+    """Build the IGDB cover URL or a placeholder."""
+    return (
+        f"https://images.igdb.com/igdb/image/upload/t_cover_small_2x/{image_id}.jpg"
+        if image_id
+        else NO_COVER
+    )
+
+
+def shape_game(g):
+    """Turn one raw IGDB game into the card format the frontend uses."""
+    return {
+        "id": g.get("id"),
+        "title": g.get("name"),
+        "year": fmt_unix_date(g.get("first_release_date")) or "—",
+        "platforms": [
+            p.get("name")
+            for p in (g.get("platforms") or [])
+            if p.get("name")
+        ],
+        "summary": g.get("summary") or "No summary available.",
+        "coverUrl": cover_url((g.get("cover") or {}).get("image_id")),
+        "type": "Game",
+    }
+
+
+def shape_movie(m):
+    """Turn one raw OMDb movie (search hit or full record) into a card."""
+    return {
+        "id": m.get("imdbID"),
+        "title": m.get("Title"),
+        "year": m.get("Year"),
+        "platforms": ["Theaters", "Streaming"],
+        "summary": m.get("Plot") or "No summary available.",
+        "coverUrl": m.get("Poster") if m.get("Poster") not in (None, "", "N/A") else NO_COVER,
+        "type": "Movie",
+    }
+
+
+def canonical_media_id(item) -> str:
+    """One id per title across sources, e.g. "game:1942" or "movie:tt0133093"."""
+    return f"{(item.get('type') or 'media').lower()}:{item.get('id')}"
+
+
+def release_year(year):
+    """Pull a 4-digit year out of "1998-11-21", "1999", "2001–2003", etc."""
+    match = re.match(r"\s*(\d{4})", str(year or ""))
+    return int(match.group(1)) if match else None
+
+
+class MediaCatalog:
+    """
+    Our own copy of every title an upstream search has returned.
+
+    Documents live in "media_items", keyed by a canonical "media_id", with a
+    text index over title / summary / platforms / year so most searches can
+    be answered from Mongo without calling IGDB or OMDb.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [("media_id", ASCENDING)], unique=True, sparse=True, name="media_id_unique"
+        )
+        self.collection.create_index(
+            [("title", TEXT), ("summary", TEXT), ("platforms", TEXT), ("year", TEXT)],
+            weights={"title": 10, "platforms": 3, "year": 2, "summary": 1},
+            default_language="english",
+            name="catalog_text",
+        )
+        self._indexes_ready = True
+
+    def upsert_many(self, items):
+        """Insert or refresh search cards. Returns how many were written."""
+        now = datetime.utcnow()
+        ops = []
+        for item in items:
+            if item.get("id") is None or not item.get("title"):
+                continue
+            doc = {field: item.get(field) for field in CARD_FIELDS}
+            doc["media_id"] = canonical_media_id(item)
+            doc["release_year"] = release_year(item.get("year"))
+            doc["updated_at"] = now
+            ops.append(
+                UpdateOne(
+                    {"media_id": doc["media_id"]},
+                    {"$set": doc, "$setOnInsert": {"created_at": now}},
+                    upsert=True,
+                )
+            )
+        if not ops:
+            return 0
+
+        self.ensure_indexes()
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def _criteria(self, query, media_type=None, filters=None):
+        """
+        Mongo filter for a text search. Every word in the query must appear
+        (each is sent as its own phrase), so "zelda ocarina" doesn't match
+        every Zelda game.
+        """
+        words = re.findall(r"\w+", (query or "").lower())
+        if not words:
+            return None
+
+        criteria = {"$text": {"$search": " ".join(f'"{w}"' for w in words)}}
+        if media_type:
+            criteria["type"] = media_type
+        if filters:
+            years = {}
+            if filters.get("year_from") is not None:
+                years["$gte"] = filters["year_from"]
+            if filters.get("year_to") is not None:
+                years["$lte"] = filters["year_to"]
+            if years:
+                criteria["release_year"] = years
+            if filters.get("platform"):
+                criteria["platforms"] = {
+                    "$regex": re.escape(filters["platform"]), "$options": "i"
+                }
+        return criteria
+
+    def count(self, query, media_type=None, filters=None):
+        criteria = self._criteria(query, media_type, filters)
+        if criteria is None:
+            return 0
+        self.ensure_indexes()
+        return self.collection.count_documents(criteria)
+
+    def search(self, query, media_type=None, filters=None, limit=20):
+        """
+        Text search over the catalog, best match first unless filters ask
+        for another sort. filters also supply page / page_size.
+        """
+        criteria = self._criteria(query, media_type, filters)
+        if criteria is None:
+            return []
+
+        skip = 0
+        order = [("score", {"$meta": "textScore"})]
+        if filters:
+            limit = filters["page_size"]
+            skip = (filters["page"] - 1) * limit
+            order = {
+                "title": [("title", ASCENDING)],
+                "year": [("release_year", ASCENDING)],
+                "-year": [("release_year", DESCENDING)],
+            }.get(filters["sort"], order)
+
+        self.ensure_indexes()
+        cursor = (
+            self.collection.find(
+                criteria,
+                {**{f: 1 for f in CARD_FIELDS}, "_id": 0, "score": {"$meta": "textScore"}},
+            )
+            .sort(order)
+            .skip(skip)
+            .limit(limit)
+        )
+        results = []
+        for doc in cursor:
+            doc.pop("score", None)
+            results.append(doc)
+        return results
@@ -0,0 +1,183 @@
+# backend/media_stats.py
+#
+# Running rating aggregates per media, so averages never need a scan:
+#     {_id: media_id, count, sum, hist: {"1": n, ..., "5": n}, last_rated,
+#      title, type, year, cover_url, updated_at}
+# The card fields let leaderboards slice by type / year without touching
+# "ratings"; updated_at (server time) tells them which media moved.
+# Kept current with $inc from the rating routes; rebuild() recomputes the
+# whole collection from "ratings" if it ever drifts.
+# Run the repair with: python media_stats.py
+
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+STAR_VALUES = (1, 2, 3, 4, 5)
+CARD_FIELDS = ("title", "type", "year", "cover_url")
+
+
+def valid_stars(stars):
+    """The star value as an int 1-5, or None if it isn't one."""
+    try:
+        stars = int(stars)
+    except (TypeError, ValueError):
+        return None
+    return stars if stars in STAR_VALUES else None
+
+
+class MediaStats:
+    def __init__(self, collection):
+        self.collection = collection
+
+    # ---------------- incremental updates ---------------- #
+
+    def added(self, media_id, stars, when, card=None):
+        self.collection.update_one(
+            {"_id": str(media_id)}, _added(stars, when, card), upsert=True
+        )
+
+    def changed(self, media_id, old_stars, new_stars):
+        if old_stars == new_stars:
+            return
+        self.collection.update_one({"_id": str(media_id)}, _changed(old_stars, new_stars))
+
+    def removed(self, media_id, stars):
+        # last_rated stays: it is the latest rating ever made, not the latest kept
+        self.collection.update_one(
+            {"_id": str(media_id)},
+            {
+                "$inc": {"count": -1, "sum": -stars, f"hist.{stars}": -1},
+                "$currentDate": {"updated_at": True},
+            },
+        )
+
+    def apply_many(self, changes, when):
+        """
+        Many added / changed ratings in one bulk_write. `changes` holds
+        (media_id, old stars or None if new, new stars, card) tuples.
+        """
+        ops = []
+        for media_id, old_stars, new_stars, card in changes:
+            if old_stars is None:
+                ops.append(UpdateOne(
+                    {"_id": str(media_id)}, _added(new_stars, when, card), upsert=True
+                ))
+            elif old_stars != new_stars:
+                ops.append(UpdateOne({"_id": str(media_id)}, _changed(old_stars, new_stars)))
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    # ---------------- reads ---------------- #
+
+    def summary(self, media_id):
+        doc = self.collection.find_one({"_id": str(media_id)}) or {}
+        return shape_summary(str(media_id), doc)
+
+    def summaries(self, media_ids):
+        """{media_id: summary} for many media in one $in query."""
+        media_ids = [str(m) for m in media_ids]
+        docs = {d["_id"]: d for d in self.collection.find({"_id": {"$in": media_ids}})}
+        return {m: shape_summary(m, docs.get(m, {})) for m in media_ids}
+
+    # ---------------- repair ---------------- #
+
+    def rebuild(self, ratings, batch_size=1000):
+        """
+        Recompute every media's stats from the ratings collection.
+        Returns how many media documents were written.
+        """
+        pipeline = [
+            # the same rule as valid_stars() / media_key(), so legacy "4" or 7 count too
+            {"$project": {
+                "media_id": {"$trim": {"input": {"$toString": "$media_id"}}},
+                "stars": {"$convert": {"input": "$stars", "to": "int", "onError": None, "onNull": None}},
+                "date_created": 1,
+                **{f: 1 for f in CARD_FIELDS},
+            }},
+            {"$match": {"stars": {"$in": list(STAR_VALUES)}}},
+            {"$group": {
+                "_id": "$media_id",
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$stars"},
+                "last_rated": {"$max": "$date_created"},
+                # $max prefers a filled-in value over ""
+                **{f: {"$max": f"${f}"} for f in CARD_FIELDS},
+                **{
+                    f"h{s}": {"$sum": {"$cond": [{"$eq": ["$stars", s]}, 1, 0]}}
+                    for s in STAR_VALUES
+                },
+            }},
+        ]
+        stamp = datetime.utcnow()
+        ops = []
+        written = 0
+        for row in ratings.aggregate(pipeline, allowDiskUse=True):
+            ops.append(UpdateOne(
+                {"_id": str(row["_id"])},
+                {
+                    "$set": {
+                        "count": row["count"],
+                        "sum": row["sum"],
+                        "hist": {str(s): row[f"h{s}"] for s in STAR_VALUES},
+                        "last_rated": row["last_rated"],
+                        **{f: row.get(f) or "" for f in CARD_FIELDS},
+                        "rebuilt_at": stamp,
+                    },
+                    "$currentDate": {"updated_at": True},
+                },
+                upsert=True,
+            ))
+            if len(ops) >= batch_size:
+                self.collection.bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+        # media with no ratings left, whether a rebuild or a live update wrote them
+        self.collection.delete_many({"rebuilt_at": {"$ne": stamp}})
+        return written
+
+
+def _added(stars, when, card=None):
+    update = {
+        "$inc": {"count": 1, "sum": stars, f"hist.{stars}": 1},
+        "$max": {"last_rated": when},
+        "$currentDate": {"updated_at": True},
+    }
+    card = {f: card[f] for f in CARD_FIELDS if (card or {}).get(f)}
+    if card:
+        update["$set"] = card
+    return update
+
+
+def _changed(old_stars, new_stars):
+    return {
+        "$inc": {
+            "sum": new_stars - old_stars,
+            f"hist.{old_stars}": -1,
+            f"hist.{new_stars}": 1,
+        },
+        "$currentDate": {"updated_at": True},
+    }
+
+
+def shape_summary(media_id, doc):
+    count = doc.get("count", 0)
+    hist = doc.get("hist", {})
+    return {
+        "media_id": media_id,
+        "count": count,
+        "average": round(doc.get("sum", 0) / count, 2) if count > 0 else None,
+        "histogram": {str(s): hist.get(str(s), 0) for s in STAR_VALUES},
+        "last_rated": doc.get("last_rated"),
+    }
+
+
+if __name__ == "__main__":
+    from config import db
+
+    n = MediaStats(db["media_stats"]).rebuild(db["ratings"])
+    print(f"rebuilt stats for {n:,} media")
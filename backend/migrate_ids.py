@@ -0,0 +1,329 @@
+# backend/migrate_ids.py
+#
+# Rewrites stored ids into the one form ids.py defines, online and in batches.
+#   python migrate_ids.py [--only ratings,library] [--batch 1000] [--pause 0.05]
+#   python migrate_ids.py --status
+#
+# Each step walks one collection in _id order and rewrites the documents
+# that still hold an old form (a user id saved as a string, a media id
+# saved as an int, ...). Updates are compare-and-set: the filter repeats
+# the old value, so anything the app writes in the meantime is never
+# overwritten, and a document that changed under us is read again and
+# retried. Where each step has got to is saved after every batch:
+#     {_id: "canonical_ids", steps: {name: {last_id, scanned, fixed,
+#      merged, done, docs_per_second}}, updated_at}
+# so a stopped run resumes where it left off and --status (from any
+# machine) shows how far it is. --pause sleeps between batches to leave
+# room for live traffic.
+#
+# A rating whose canonical (user, media) pair already exists is a
+# duplicate made by the old mixed ids: it is dropped ("merged") and
+# media_stats is told. Those twins are found by the unique
+# (user_id, media_id) index, so before the ratings step exact duplicates
+# (same ids, same types) are merged and that index is built; if it still
+# can't be, the migration stops rather than rewrite twins into identical
+# rows. The other indexes the simplified reads rely on are created once
+# every step is done.
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from ids import media_key, thread_key, user_key
+from media_stats import valid_stars
+
+MIGRATION_ID = "canonical_ids"
+DUPLICATE_KEY = 11000
+RETRIES = 3  # rounds for documents that changed between our read and write
+
+
+# ---------------- what to fix ---------------- #
+
+def _canon(changes, path, old, key):
+    if old is None:
+        return
+    new = key(old)
+    if new is not None and (type(new) is not type(old) or new != old):
+        changes[path] = (old, new)
+
+
+def fix_rating(doc):
+    """{path: (old, new)} for one rating; empty when it is already canonical."""
+    changes = {}
+    _canon(changes, "user_id", doc.get("user_id"), user_key)
+    _canon(changes, "media_id", doc.get("media_id"), media_key)
+    return changes
+
+
+def fix_library(doc):
+    """String item ids; 123 and "123" in one library were the same title."""
+    items = (doc.get("profile") or {}).get("library")
+    if not items:
+        return {}
+    seen, fixed = set(), []
+    for item in items:
+        if not isinstance(item, dict) or item.get("id") is None:
+            fixed.append(item)
+            continue
+        item_id = media_key(item["id"])
+        if item_id not in seen:
+            seen.add(item_id)
+            fixed.append({**item, "id": item_id})
+    if fixed == items:
+        return {}
+    return {"profile.library": (items, fixed)}
+
+
+def fix_thread(doc):
+    changes = {}
+    _canon(changes, "user_id", doc.get("user_id"), user_key)
+    comments = doc.get("comments")
+    if comments:
+        fixed = [thread_key(c) or c for c in comments]
+        if any(type(a) is not type(b) for a, b in zip(comments, fixed)):
+            changes["comments"] = (comments, fixed)
+    return changes
+
+
+def fix_comment(doc):
+    changes = {}
+    _canon(changes, "user_id", doc.get("user_id") or None, user_key)
+    _canon(changes, "thread_id", doc.get("thread_id"), thread_key)
+    return changes
+
+
+class Step:
+    def __init__(self, name, collection, fields, fix):
+        self.name = name
+        self.collection = collection
+        self.projection = {f: 1 for f in fields}
+        self.fix = fix
+
+
+def steps_for(db):
+    return [
+        Step("ratings", db["ratings"], ["user_id", "media_id", "stars"], fix_rating),
+        Step("library", db["users"], ["profile.library"], fix_library),
+        Step("threads", db["threads"], ["user_id", "comments"], fix_thread),
+        Step("comments", db["comments"], ["user_id", "thread_id"], fix_comment),
+    ]
+
+
+# ---------------- running it ---------------- #
+
+class IdMigration:
+    def __init__(self, db, stats, batch_size=1000, pause=0.0, report_every=5.0, out=sys.stdout):
+        self.db = db
+        self.stats = stats  # MediaStats, told about merged duplicate ratings
+        self.state = db["migrations"]
+        self.steps = steps_for(db)
+        self.batch_size = batch_size
+        self.pause = pause
+        self.report_every = report_every
+        self.out = out
+
+    def status(self):
+        return (self.state.find_one({"_id": MIGRATION_ID}) or {}).get("steps", {})
+
+    def run(self, only=None, restart=False):
+        """Run (or resume) every step, or the named ones. Returns their progress."""
+        if restart:
+            self.state.delete_one({"_id": MIGRATION_ID})
+        saved = self.status()
+        results = {}
+        for step in self.steps:
+            if only and step.name not in only:
+                continue
+            progress = saved.get(step.name) or {}
+            if step.name == "ratings":
+                merged = self.ensure_unique_ratings()
+                progress = {**progress, "merged": progress.get("merged", 0) + merged}
+            results[step.name] = self._run_step(step, progress)
+        if all(p.get("done") for p in self.status().values()) and not only:
+            self.ensure_indexes()
+        return results
+
+    def _run_step(self, step, progress):
+        progress = {
+            "last_id": None, "scanned": 0, "fixed": 0, "merged": 0,
+            **progress, "done": False,
+        }
+        total = step.collection.estimated_document_count()
+        started, scanned_before = time.monotonic(), progress["scanned"]
+        last_report = started
+        while True:
+            criteria = {"_id": {"$gt": progress["last_id"]}} if progress["last_id"] else {}
+            docs = list(
+                step.collection.find(criteria, step.projection)
+                .sort("_id", ASCENDING).limit(self.batch_size)
+            )
+            if not docs:
+                break
+            fixed, merged = self._fix_batch(step, docs)
+            progress["last_id"] = docs[-1]["_id"]
+            progress["scanned"] += len(docs)
+            progress["fixed"] += fixed
+            progress["merged"] += merged
+            elapsed = time.monotonic() - started
+            progress["docs_per_second"] = round((progress["scanned"] - scanned_before) / max(elapsed, 1e-6))
+            self._save(step.name, progress)
+
+            if time.monotonic() - last_report >= self.report_every:
+                last_report = time.monotonic()
+                self._report(step.name, progress, total)
+            if self.pause:
+                time.sleep(self.pause)
+
+        progress["done"] = True
+        self._save(step.name, progress)
+        self._report(step.name, progress, total)
+        return progress
+
+    def _fix_batch(self, step, docs):
+        fixed = merged = 0
+        for _ in range(RETRIES):
+            pending = [(d, step.fix(d)) for d in docs]
+            pending = [(d, c) for d, c in pending if c]
+            if not pending:
+                break
+            ops = [
+                UpdateOne(
+                    {"_id": d["_id"], **{path: old for path, (old, _) in c.items()}},
+                    {"$set": {path: new for path, (_, new) in c.items()}},
+                )
+                for d, c in pending
+            ]
+            written = dropped = 0
+            try:
+                written = step.collection.bulk_write(ops, ordered=False).modified_count
+            except BulkWriteError as e:
+                written = e.details.get("nModified", 0)
+                duplicates = []
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != DUPLICATE_KEY or step.name != "ratings":
+                        raise
+                    duplicates.append(pending[error["index"]])
+                dropped = self._merge_ratings(step.collection, duplicates)
+            fixed += written
+            merged += dropped
+            if written + dropped == len(pending):
+                break
+            # some changed since we read them: read again and retry
+            docs = list(step.collection.find(
+                {"_id": {"$in": [d["_id"] for d, _ in pending]}}, step.projection
+            ))
+        return fixed, merged
+
+    def _merge_ratings(self, ratings, duplicates):
+        """Drop legacy ratings whose canonical (user, media) pair already exists."""
+        merged = 0
+        for doc, changes in duplicates:
+            old = {path: before for path, (before, _) in changes.items()}
+            if ratings.delete_one({"_id": doc["_id"], **old}).deleted_count:
+                merged += 1
+                stars = valid_stars(doc.get("stars"))
+                if stars is not None:
+                    self.stats.removed(media_key(doc["media_id"]), stars)
+        return merged
+
+    def ensure_unique_ratings(self):
+        """
+        Merge ratings that already share the exact same (user_id, media_id),
+        then build the unique index the ratings step merges twins on.
+        Returns how many were merged; raises if the index still can't be built.
+        """
+        ratings = self.db["ratings"]
+        merged = 0
+        for _ in range(RETRIES):  # the app may write a new duplicate meanwhile
+            merged += self._merge_exact_duplicates(ratings)
+            try:
+                ratings.create_index(
+                    [("user_id", ASCENDING), ("media_id", ASCENDING)],
+                    unique=True, name="user_media_unique",
+                )
+                return merged
+            except OperationFailure as e:
+                if e.code != DUPLICATE_KEY:
+                    raise
+                error = e
+        raise RuntimeError(f"ratings unique index could not be built: {error}")
+
+    def _merge_exact_duplicates(self, ratings):
+        """Keep the newest of each group of identical (user_id, media_id) ratings."""
+        groups = ratings.aggregate([
+            {"$group": {
+                "_id": {"user_id": "$user_id", "media_id": "$media_id"},
+                "ids": {"$push": "$_id"},
+                "n": {"$sum": 1},
+            }},
+            {"$match": {"n": {"$gt": 1}}},
+        ], allowDiskUse=True)
+        merged = 0
+        for group in groups:
+            for rating_id in sorted(group["ids"])[:-1]:
+                doc = ratings.find_one_and_delete(
+                    {"_id": rating_id}, projection={"media_id": 1, "stars": 1}
+                )
+                if doc is None:
+                    continue
+                merged += 1
+                stars = valid_stars(doc.get("stars"))
+                if stars is not None:
+                    self.stats.removed(media_key(doc["media_id"]), stars)
+        if merged:
+            print(f"ratings: {merged:,} exact duplicates merged", file=self.out, flush=True)
+        return merged
+
+    def ensure_indexes(self):
+        """The indexes the one-form reads use."""
+        self.db["comments"].create_index([("thread_id", ASCENDING)], name="thread_id")
+        self.db["threads"].create_index([("user_id", ASCENDING)], name="user_id")
+        self.ensure_unique_ratings()
+
+    def _save(self, name, progress):
+        self.state.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {f"steps.{name}": progress, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def _report(self, name, progress, total):
+        rate = progress.get("docs_per_second") or 0
+        left = max(total - progress["scanned"], 0)
+        eta = "done" if progress["done"] else f"~{left / rate:,.0f}s left" if rate else "?"
+        print(
+            f"{name}: {progress['scanned']:,} / ~{total:,} scanned, {progress['fixed']:,} fixed, "
+            f"{progress['merged']:,} merged, {rate:,} docs/s ({eta})",
+            file=self.out, flush=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite stored ids into their canonical form.")
+    parser.add_argument("--only", help="comma-separated steps: ratings,library,threads,comments")
+    parser.add_argument("--batch", type=int, default=1000, help="documents per batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--restart", action="store_true", help="forget saved progress")
+    parser.add_argument("--status", action="store_true", help="print saved progress and exit")
+    args = parser.parse_args()
+
+    from config import db  # only needed when run for real
+    from media_stats import MediaStats
+
+    migration = IdMigration(db, MediaStats(db["media_stats"]), args.batch, args.pause)
+    if args.status:
+        for name, progress in migration.status().items():
+            print(f"{name}: {'done' if progress.get('done') else 'in progress'}, "
+                  f"{progress.get('scanned', 0):,} scanned, {progress.get('fixed', 0):,} fixed, "
+                  f"{progress.get('merged', 0):,} merged, {progress.get('docs_per_second', 0):,} docs/s")
+        return
+    only = set(args.only.split(",")) if args.only else None
+    migration.run(only=only, restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
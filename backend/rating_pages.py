@@ -0,0 +1,189 @@
+# backend/rating_pages.py
+#
+# Paging and streaming for rating lists (per media and per user), and any
+# other list that brings its own table of sorts (see user_library.py).
+#
+# Pages use keyset pagination: the cursor holds the sort-key values of the
+# last rating returned, and the next page asks for "after those values", so
+# page 500 costs the same as page 1 (no skip). Every sort ends in _id to
+# break ties. Cursors are opaque base64 JSON; clients just pass them back.
+#
+# Without paging params a list is streamed (JSON array or NDJSON) straight
+# from the Mongo cursor instead of being built in memory first.
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Response, current_app, jsonify, stream_with_context
+from pymongo import ASCENDING, DESCENDING
+
+SORTS = {
+    "newest": [("date_created", DESCENDING), ("_id", DESCENDING)],
+    "oldest": [("date_created", ASCENDING), ("_id", ASCENDING)],
+    "highest": [("stars", DESCENDING), ("date_created", DESCENDING), ("_id", DESCENDING)],
+}
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_indexes_ready = set()
+
+
+class BadCursor(ValueError):
+    pass
+
+
+def ensure_list_indexes(collection, owner_field):
+    """Compound indexes matching every sort, prefixed by media_id or user_id."""
+    if owner_field in _indexes_ready:
+        return
+    for name, keys in SORTS.items():
+        if name == "oldest":
+            continue  # "newest" read backwards
+        collection.create_index([(owner_field, ASCENDING)] + keys, name=f"{owner_field}_{name}")
+    _indexes_ready.add(owner_field)
+
+
+# ---------------- cursors ---------------- #
+
+def _encode_value(value):
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$oid" in value:
+        return ObjectId(value["$oid"])
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc, sort, sorts=SORTS):
+    values = [_encode_value(doc.get(field)) for field, _ in sorts[sort]]
+    raw = json.dumps({"s": sort, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort, sorts=SORTS):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = [_decode_value(v) for v in data["v"]]
+    except (ValueError, KeyError, TypeError) as e:
+        raise BadCursor(str(e))
+    if data.get("s") != sort or len(values) != len(sorts[sort]):
+        raise BadCursor("cursor belongs to a different sort")
+    return values
+
+
+def after_cursor(sort, values, sorts=SORTS):
+    """
+    Mongo filter for "strictly after these sort-key values", e.g. for
+    newest: date < d OR (date == d AND _id < id).
+
+    Mongo sorts null / missing values (old ratings without date_created)
+    below everything else, but $lt / $gt never match them, so nulls get
+    their own conditions.
+    """
+    keys = sorts[sort]
+    branches = []
+    for i, (field, direction) in enumerate(keys):
+        branch = {f: values[j] for j, (f, _) in enumerate(keys[:i])}
+        value = values[i]
+        if direction == DESCENDING:
+            if value is None:
+                continue  # nothing sorts below null
+            branch["$or"] = [{field: {"$lt": value}}, {field: None}]
+        else:
+            branch[field] = {"$ne": None} if value is None else {"$gt": value}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+# ---------------- request handling ---------------- #
+
+def wants_page(args):
+    return any(args.get(k) for k in ("limit", "cursor", "sort"))
+
+
+def wants_ndjson(request):
+    return (
+        request.args.get("format") == "ndjson"
+        or request.accept_mimetypes.best == "application/x-ndjson"
+    )
+
+
+def read_page_args(args, sorts=SORTS, default_sort="newest"):
+    """(sort, limit, cursor values or None) from query args; raises BadCursor."""
+    sort = args.get("sort", default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    try:
+        limit = min(max(int(args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    cursor = args.get("cursor")
+    return sort, limit, decode_cursor(cursor, sort, sorts) if cursor else None
+
+
+def fetch_page(collection, criteria, sort, limit, after=None, sorts=SORTS):
+    """One page of raw documents plus the cursor for the next (None at the end)."""
+    if after is not None:
+        criteria = {"$and": [criteria, after_cursor(sort, after, sorts)]}
+    docs = list(collection.find(criteria).sort(sorts[sort]).limit(limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1], sort, sorts) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def stream_list(cursor, shape, ndjson=False):
+    """Stream shaped documents as NDJSON or as one JSON array, as Mongo yields them."""
+    dumps = current_app.json.dumps
+
+    def ndjson_lines():
+        for doc in cursor:
+            yield dumps(shape(doc)) + "\n"
+
+    def json_array():
+        yield "["
+        for i, doc in enumerate(cursor):
+            yield ("," if i else "") + dumps(shape(doc))
+        yield "]\n"
+
+    body = ndjson_lines() if ndjson else json_array()
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(stream_with_context(body), mimetype=mimetype)
+
+
+def rating_list_response(request, collection, criteria, owner_field, shape):
+    """
+    The response for a rating list route:
+      no paging args        -> every rating, newest first, streamed
+      limit / cursor / sort -> one page, next page's cursor in X-Next-Cursor
+    Either way ?format=ndjson (or Accept: application/x-ndjson) gives NDJSON.
+    """
+    ensure_list_indexes(collection, owner_field)
+    return list_response(request, collection, criteria, shape)
+
+
+def list_response(request, collection, criteria, shape, sorts=SORTS,
+                  default_sort="newest", stream_sort="newest"):
+    """rating_list_response for any collection whose sorts have indexes already."""
+    ndjson = wants_ndjson(request)
+    if not wants_page(request.args):
+        return stream_list(collection.find(criteria).sort(sorts[stream_sort]), shape, ndjson)
+
+    try:
+        sort, limit, after = read_page_args(request.args, sorts, default_sort)
+    except BadCursor as e:
+        return jsonify({"error": "invalid_cursor", "detail": str(e)}), 400
+
+    docs, next_cursor = fetch_page(collection, criteria, sort, limit, after, sorts)
+    response = stream_list(docs, shape, ndjson)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
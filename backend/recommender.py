@@ -0,0 +1,314 @@
+# backend/recommender.py
+#
+# Item-item collaborative filtering over "ratings".
+# Build with: python recommender.py [--changed] [--neighbors 50]
+#
+# Offline, every rating is one cell of a sparse user x media matrix,
+# centered on that user's own mean star (so a harsh and a generous rater
+# agree about what they liked). Two media are similar when the same users
+# rated them the same way: the cosine of their columns, shrunk towards 0
+# when only a few users rated both. Each media's top neighbours go to
+# "recommendations":
+#     {_id: media_id, similar: [{id, sim, title, type, year, coverUrl}], built_at}
+#     {_id: "_meta", built_at, seen_until}
+#
+# Online, a user's recommendations are the neighbours of what they rated
+# (weighted by how much they liked it) and of their library, minus what
+# they already rated: three indexed reads, no matrix in the web worker.
+#
+# Similarities are computed a block of media at a time, so memory is
+# bounded by the block rather than the catalog squared. --changed only
+# recomputes media whose media_stats moved since the last build.
+# NumPy + SciPy do the products; without them a plain-Python version
+# handles small catalogs.
+
+import argparse
+import heapq
+import sys
+import time
+from array import array
+from datetime import datetime
+
+from pymongo import ReplaceOne
+
+from media_catalog import NO_COVER
+from media_stats import valid_stars
+from rating_pages import SORTS, ensure_list_indexes
+
+try:  # NumPy / SciPy are optional; plain Python is fine for a small catalog
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+META_ID = "_meta"
+NEUTRAL_STARS = 3  # ratings above this count for a media, below against
+LIBRARY_WEIGHT = 1.0  # a library item counts like a 4-star rating
+RECENT_RATINGS = 100  # how many of a user's ratings seed their recommendations
+WRITE_BATCH = 1000
+
+
+# ---------------- matrix ---------------- #
+
+def load_ratings(cursor):
+    """
+    (user ids, media ids, rows, cols, stars) from rating documents, with
+    rows / cols indexing into the id lists. Kept in compact arrays.
+    """
+    users, media = {}, {}
+    rows, cols, stars = array("i"), array("i"), array("f")
+    for r in cursor:
+        value = valid_stars(r.get("stars"))
+        if value is None or r.get("media_id") in (None, ""):
+            continue
+        rows.append(users.setdefault(str(r["user_id"]), len(users)))
+        cols.append(media.setdefault(str(r["media_id"]), len(media)))
+        stars.append(value)
+    return list(users), list(media), rows, cols, stars
+
+
+def item_neighbors(n_users, n_media, rows, cols, stars, targets, k=50, shrink=10, block=2000):
+    """
+    Yield (media index, [(neighbour index, similarity), ...] best first)
+    for every media index in `targets`. Only positive similarities are kept.
+    """
+    if not len(targets):
+        return iter(())
+    if np is not None:
+        return _neighbors_scipy(n_users, n_media, rows, cols, stars, targets, k, shrink, block)
+    return _neighbors_python(rows, cols, stars, targets, k, shrink)
+
+
+def _neighbors_scipy(n_users, n_media, rows, cols, stars, targets, k, shrink, block):
+    rows = np.frombuffer(rows, dtype=np.intc)
+    cols = np.frombuffer(cols, dtype=np.intc)
+    stars = np.frombuffer(stars, dtype=np.float32)
+
+    user_sum = np.bincount(rows, weights=stars, minlength=n_users)
+    user_count = np.bincount(rows, minlength=n_users)
+    centered = (stars - (user_sum / np.maximum(user_count, 1))[rows]).astype(np.float32)
+
+    X = sparse.csc_matrix((centered, (rows, cols)), shape=(n_users, n_media))
+    X.eliminate_zeros()  # users who gave everything the same star say nothing
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    X = (X @ sparse.diags(inverse.astype(np.float32))).tocsc()
+    B = X.copy()
+    B.data[:] = 1  # who rated what, for the shrinkage
+    XT, BT = X.T.tocsr(), B.T.tocsr()
+
+    targets = np.asarray(targets, dtype=np.intc)
+    for start in range(0, len(targets), block):
+        ids = targets[start:start + block]
+        support = (BT @ B[:, ids]).T.tocsr()
+        support.data = support.data / (support.data + shrink)
+        sims = (XT @ X[:, ids]).T.multiply(support).tocsr()
+        for row, m in enumerate(ids):
+            lo, hi = sims.indptr[row], sims.indptr[row + 1]
+            js, ss = sims.indices[lo:hi], sims.data[lo:hi]
+            keep = (js != m) & (ss > 0)
+            js, ss = js[keep], ss[keep]
+            if len(ss) > k:
+                top = np.argpartition(-ss, k)[:k]
+                js, ss = js[top], ss[top]
+            order = np.argsort(-ss, kind="stable")
+            yield int(m), list(zip(js[order].tolist(), ss[order].tolist()))
+
+
+def _neighbors_python(rows, cols, stars, targets, k, shrink):
+    totals = {}
+    for u, s in zip(rows, stars):
+        entry = totals.setdefault(u, [0, 0.0])
+        entry[0] += 1
+        entry[1] += s
+    by_user, by_media, squares = {}, {}, {}
+    for u, m, s in zip(rows, cols, stars):
+        x = s - totals[u][1] / totals[u][0]
+        if x:
+            by_user.setdefault(u, []).append((m, x))
+            by_media.setdefault(m, []).append((u, x))
+            squares[m] = squares.get(m, 0.0) + x * x
+
+    for m in targets:
+        dots, support = {}, {}
+        for u, x in by_media.get(m, []):
+            for j, y in by_user[u]:
+                if j != m:
+                    dots[j] = dots.get(j, 0.0) + x * y
+                    support[j] = support.get(j, 0) + 1
+        sims = (
+            (j, dot / (squares[m] * squares[j]) ** 0.5 * support[j] / (support[j] + shrink))
+            for j, dot in dots.items()
+        )
+        best = heapq.nlargest(k, (p for p in sims if p[1] > 0), key=lambda p: p[1])
+        yield m, best
+
+
+# ---------------- build / serve ---------------- #
+
+class Recommender:
+    def __init__(self, collection, ratings, stats, neighbors=50, shrink=10):
+        self.collection = collection
+        self.ratings = ratings
+        self.stats = stats  # media_stats: card fields, and which media changed
+        self.neighbors = neighbors
+        self.shrink = shrink
+
+    def build(self, changed_only=False, block=2000, report_every=5.0, out=sys.stdout):
+        """Recompute neighbours (all of them, or only for changed media). Returns stats."""
+        started = time.monotonic()
+        stamp = datetime.utcnow()
+        self.stats.create_index("updated_at")
+        # taken before reading, so anything rated during the build is seen next time
+        latest = self.stats.find_one(
+            {"updated_at": {"$exists": True}}, {"updated_at": 1}, sort=[("updated_at", -1)]
+        )
+        meta = self.collection.find_one({"_id": META_ID}) or {}
+
+        user_ids, media_ids, rows, cols, stars = load_ratings(
+            self.ratings.find({}, {"user_id": 1, "media_id": 1, "stars": 1, "_id": 0})
+            .batch_size(10_000)
+        )
+        print(
+            f"{len(stars):,} ratings, {len(user_ids):,} users, {len(media_ids):,} media "
+            f"loaded in {time.monotonic() - started:.1f}s",
+            file=out, flush=True,
+        )
+
+        if changed_only and meta.get("seen_until"):
+            changed = {
+                d["_id"] for d in self.stats.find(
+                    {"updated_at": {"$gte": meta["seen_until"]}}, {"_id": 1}
+                )
+            }
+            targets = [i for i, m in enumerate(media_ids) if m in changed]
+        else:
+            changed_only = False
+            targets = list(range(len(media_ids)))
+
+        cards = {
+            d["_id"]: d for d in self.stats.find(
+                {}, {"title": 1, "type": 1, "year": 1, "cover_url": 1}
+            )
+        }
+        written, ops, last_report = 0, [], time.monotonic()
+        for m, similar in item_neighbors(
+            len(user_ids), len(media_ids), rows, cols, stars, targets,
+            k=self.neighbors, shrink=self.shrink, block=block,
+        ):
+            ops.append(ReplaceOne({"_id": media_ids[m]}, {
+                "similar": [
+                    neighbor_card(media_ids[j], sim, cards.get(media_ids[j], {}))
+                    for j, sim in similar
+                ],
+                "built_at": stamp,
+            }, upsert=True))
+            if len(ops) >= WRITE_BATCH:
+                self.collection.bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+                if time.monotonic() - last_report >= report_every:
+                    last_report = time.monotonic()
+                    print(f"{written:,} / {len(targets):,} media", file=out, flush=True)
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+        if not changed_only:
+            # media nobody rates any more
+            self.collection.delete_many({"_id": {"$ne": META_ID}, "built_at": {"$lt": stamp}})
+
+        self.collection.update_one({"_id": META_ID}, {"$set": {
+            "built_at": stamp,
+            "seen_until": latest["updated_at"] if latest else stamp,
+        }}, upsert=True)
+        result = {
+            "ratings": len(stars),
+            "users": len(user_ids),
+            "media": len(media_ids),
+            "written": written,
+            "changed_only": changed_only,
+            "seconds": round(time.monotonic() - started, 1),
+        }
+        print(f"{written:,} media written in {result['seconds']}s", file=out, flush=True)
+        return result
+
+    def recommend(self, user_id, library_ids=(), limit=20):
+        """
+        Cards for titles like the ones this user rated highly or keeps in
+        their library, best first, each with the seed it came from ("because").
+        """
+        ensure_list_indexes(self.ratings, "user_id")
+        recent = list(
+            self.ratings.find({"user_id": user_id}, {"media_id": 1, "stars": 1})
+            .sort(SORTS["newest"]).limit(RECENT_RATINGS)
+        )
+        seeds = {str(i): LIBRARY_WEIGHT for i in library_ids}
+        for r in recent:
+            stars = valid_stars(r.get("stars"))
+            if stars is not None:
+                seeds[str(r["media_id"])] = stars - NEUTRAL_STARS
+        if not seeds:
+            return []
+
+        scores, because, cards = {}, {}, {}
+        for doc in self.collection.find({"_id": {"$in": list(seeds)}}, {"similar": 1}):
+            weight = seeds[doc["_id"]]
+            for n in doc.get("similar", []):
+                if n["id"] in seeds:
+                    continue
+                contribution = weight * n["sim"]
+                scores[n["id"]] = scores.get(n["id"], 0.0) + contribution
+                if contribution > because.get(n["id"], (0, None))[0]:
+                    because[n["id"]] = (contribution, doc["_id"])
+                cards[n["id"]] = n
+
+        best = heapq.nlargest(
+            limit * 2, (m for m, s in scores.items() if s > 0), key=scores.get
+        )
+        # older ratings than RECENT_RATINGS can still be among the picks
+        rated = {
+            r["media_id"] for r in self.ratings.find(
+                {"user_id": user_id, "media_id": {"$in": best}}, {"media_id": 1}
+            )
+        }
+        items = []
+        for m in best:
+            if m in rated:
+                continue
+            card = {key: value for key, value in cards[m].items() if key != "sim"}
+            items.append({**card, "score": round(scores[m], 4), "because": because[m][1]})
+            if len(items) == limit:
+                break
+        return items
+
+
+def neighbor_card(media_id, sim, stats_doc):
+    return {
+        "id": media_id,
+        "sim": round(float(sim), 4),
+        "title": stats_doc.get("title") or "",
+        "type": stats_doc.get("type") or "",
+        "year": stats_doc.get("year") or "",
+        "coverUrl": stats_doc.get("cover_url") or NO_COVER,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild item-item recommendations.")
+    parser.add_argument("--changed", action="store_true",
+                        help="only media whose ratings changed since the last build")
+    parser.add_argument("--neighbors", type=int, default=None)
+    parser.add_argument("--block", type=int, default=2000, help="media per similarity block")
+    args = parser.parse_args()
+
+    from config import RECS_NEIGHBORS, RECS_SHRINK, db  # only needed when run for real
+
+    recommender = Recommender(
+        db["recommendations"], db["ratings"], db["media_stats"],
+        neighbors=args.neighbors or RECS_NEIGHBORS, shrink=RECS_SHRINK,
+    )
+    recommender.build(changed_only=args.changed, block=args.block)
+
+
+if __name__ == "__main__":
+    main()
@@ -46,7 +46,6 @@ def register():
                 "bio": user.profile.bio,
                 "avatar_url": user.profile.avatar_url,
                 "wishlist": [],
-                "library": [],
             },
         }
     )
@@ -0,0 +1,56 @@
+# backend/routes/cover_routes.py
+
+import requests
+from flask import Blueprint, jsonify, request, send_file
+
+from config import COVER_CACHE_DIR, COVER_CACHE_MAX_MB
+from cover_cache import CoverCache, CoverNotFound, CoverUnusable
+
+cover_bp = Blueprint("covers", __name__)
+
+cover_cache = CoverCache(COVER_CACHE_DIR, COVER_CACHE_MAX_MB * 1024 * 1024)
+
+# The bytes behind a key never change, so browsers and CDNs may keep them
+COVER_MAX_AGE = 365 * 24 * 3600
+
+
+@cover_bp.get("/covers/<key>")
+def get_cover(key):
+    """
+    Serve a cover image from the local cache, fetching it once on a miss.
+    Optional: w (160 / 320 / 640) and format=webp; both need Pillow,
+    otherwise the original image is returned.
+    """
+    try:
+        width = int(request.args["w"]) if request.args.get("w") else None
+    except ValueError:
+        return jsonify({"error": "invalid_width"}), 400
+    webp = request.args.get("format") == "webp"
+
+    for attempt in range(2):  # another request's eviction may delete the file under us
+        try:
+            path, etag, mimetype = cover_cache.path_for(key, width=width, webp=webp)
+            # send_file answers If-None-Match with 304 and hands the file to the
+            # server's sendfile support instead of reading it into Python
+            response = send_file(
+                path, mimetype=mimetype, etag=etag, conditional=True, max_age=COVER_MAX_AGE
+            )
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+        except CoverNotFound:
+            return jsonify({"error": "cover_not_found"}), 404
+        except CoverUnusable as e:
+            return jsonify({"error": "cover_unusable", "detail": str(e)}), 502
+        except requests.RequestException as e:
+            return jsonify({"error": "cover_fetch_failed", "detail": str(e)}), 502
+
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@cover_bp.get("/covers/stats")
+def cover_stats():
+    return jsonify(cover_cache.stats())
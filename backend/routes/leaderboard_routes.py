@@ -0,0 +1,62 @@
+# backend/routes/leaderboard_routes.py
+
+from flask import Blueprint, jsonify, request
+
+from config import (
+    LEADERBOARD_PRIOR_VOTES,
+    LEADERBOARD_REBUILD,
+    LEADERBOARD_REFRESH,
+    db,
+)
+from leaderboards import MEDIA_TYPES, Leaderboards
+
+leaderboard_bp = Blueprint("leaderboards", __name__)
+
+leaderboards = Leaderboards(
+    db["leaderboards"],
+    db["media_stats"],
+    prior_votes=LEADERBOARD_PRIOR_VOTES,
+    refresh_every=LEADERBOARD_REFRESH,
+    rebuild_every=LEADERBOARD_REBUILD,
+)
+
+DEFAULT_LIMIT = 20
+
+
+@leaderboard_bp.get("/leaderboards")
+def get_leaderboard():
+    """
+    Top-rated titles by Bayesian-weighted average.
+    Optional: type=game|movie, year=YYYY, limit (up to the board depth).
+    """
+    media_type = request.args.get("type", "").strip().capitalize() or None
+    if media_type == "All":
+        media_type = None
+    if media_type is not None and media_type not in MEDIA_TYPES:
+        return jsonify({"error": "invalid_type"}), 400
+
+    year = request.args.get("year", "").strip() or None
+    if year is not None and not (len(year) == 4 and year.isdigit()):
+        return jsonify({"error": "invalid_year"}), 400
+
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), leaderboards.depth)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    try:
+        board = leaderboards.get(media_type, year)
+    except Exception as e:
+        return jsonify({"error": "leaderboards_unavailable", "detail": str(e)}), 503
+
+    response = jsonify({
+        "type": media_type,
+        "year": year,
+        "items": board["items"][:limit],
+        "built_at": board["built_at"].isoformat() + "Z",
+        "prior_votes": leaderboards.prior_votes,
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,121 @@
+# backend/routes/media_routes.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import Blueprint, jsonify, request
+
+from config import db, OMDB_API_KEY, OMDB_API_URL, SIMILAR_INDEX_PATH, TOP_TITLES_REFRESH
+from media_catalog import canonical_media_id, shape_movie
+from routes.leaderboard_routes import leaderboards
+from similar_titles import PRECOMPUTED, SimilarTitles
+from top_titles import TopTitles
+from upstream import omdb
+
+media_bp = Blueprint("media", __name__)
+
+# The curated homepage list (used to be fetched by every browser)
+TOP_MOVIE_IDS = [
+    "tt0111161", "tt0068646", "tt0071562", "tt0468569", "tt0050083",
+    "tt0108052", "tt0167260", "tt0110912", "tt0060196", "tt0137523",
+    "tt0120737", "tt0816692", "tt0109830", "tt1375666", "tt0167261",
+    "tt0080684", "tt0133093", "tt0099685", "tt0073486", "tt0114369",
+]
+OMDB_WORKERS = 5  # parallel OMDb lookups while building the list
+TOP_LIST_SIZE = 20
+SIMILAR_LIMIT = 20
+
+
+def omdb_movie_card(imdb_id):
+    """One movie by IMDb id, shaped like a search result (None if unavailable)."""
+    try:
+        r = omdb.get(
+            OMDB_API_URL,
+            params={"apikey": OMDB_API_KEY, "i": imdb_id, "plot": "short"},
+        )
+        r.raise_for_status()
+        m = r.json()
+    except (requests.RequestException, ValueError):
+        return None
+    if m.get("Response") != "True":
+        return None
+    return shape_movie(m)
+
+
+def build_top_movies():
+    with ThreadPoolExecutor(max_workers=OMDB_WORKERS, thread_name_prefix="top-movies") as pool:
+        cards = [c for c in pool.map(omdb_movie_card, TOP_MOVIE_IDS) if c]
+    if not cards:
+        # don't replace a good list with an empty one when OMDb is down
+        raise RuntimeError("OMDb returned none of the top movies")
+    return cards
+
+
+def build_top_rated():
+    """Best Bayesian-weighted titles across everything our users rated."""
+    items = [i for i in leaderboards.get()["items"] if i["title"]]
+    return items[:TOP_LIST_SIZE]
+
+
+top_titles = TopTitles(
+    db["top_titles"],
+    {"movies": build_top_movies, "rated": build_top_rated},
+    refresh_every=TOP_TITLES_REFRESH,
+)
+
+similar_titles = SimilarTitles(db["similar_titles"], db["media_items"], SIMILAR_INDEX_PATH)
+
+
+@media_bp.get("/media/top")
+def get_top_titles():
+    """
+    Precomputed homepage list. ?list=movies (default, curated) or rated
+    (from our own ratings). Served from memory; never waits on OMDb unless
+    the list has never been built.
+    """
+    name = request.args.get("list", "movies")
+    if name not in top_titles.builders:
+        return jsonify({"error": "unknown_list"}), 400
+
+    try:
+        entry = top_titles.get(name)
+    except Exception as e:
+        return jsonify({"error": "top_titles_unavailable", "detail": str(e)}), 503
+
+    response = jsonify({
+        "list": name,
+        "items": entry["items"],
+        "built_at": entry["built_at"].isoformat() + "Z",
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@media_bp.get("/media/<media_id>/similar")
+def get_similar_titles(media_id):
+    """
+    Titles like this one by their metadata (title and summary words,
+    platforms, year, type), best first. media_id is the catalog id
+    ("game:1942"), or the bare id with ?type=game|movie. Optional: limit.
+    """
+    if ":" not in media_id:
+        media_id = canonical_media_id({"type": request.args.get("type"), "id": media_id})
+    try:
+        limit = min(max(int(request.args.get("limit", SIMILAR_LIMIT)), 1), PRECOMPUTED)
+    except ValueError:
+        limit = SIMILAR_LIMIT
+
+    try:
+        items = similar_titles.similar(media_id, limit)
+    except Exception as e:
+        return jsonify({"error": "similar_unavailable", "detail": str(e)}), 503
+    if items is None:
+        return jsonify({"error": "media_not_found"}), 404
+
+    response = jsonify({"media_id": media_id, "items": items})
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    response.add_etag()
+    return response.make_conditional(request)
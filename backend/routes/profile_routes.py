@@ -3,16 +3,28 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from config import db
+from ids import media_key, user_key
+from known_titles import remember_title
+from rating_pages import (
+    DEFAULT_LIMIT, MAX_LIMIT, SORTS as RATING_SORTS,
+    encode_cursor, ensure_list_indexes, list_response, rating_list_response,
+)
+from user_library import ITEM_FIELDS, SORTS as LIBRARY_SORTS, Library, shape_item
 
 profile_bp = Blueprint("profile_bp", __name__)
 
+# one document per library entry (see user_library.py)
+library = Library(db["library"], db["users"], db["migrations"])
+
+PROFILE_LIBRARY_ITEMS = 20  # newest entries shown with the profile; the rest are paged
+
 # ------------------ PROFILE INFO ------------------ #
 
 @profile_bp.get("/profile/<user_id>")
 def get_profile(user_id):
     """Return basic profile info for a user."""
     try:
-        user_doc = db["users"].find_one({"_id": ObjectId(user_id)})
+        user_doc = db["users"].find_one({"_id": ObjectId(user_id)}, {"profile.library": 0})
     except Exception:
         return jsonify({"error": "invalid_id"}), 400
     
@@ -26,7 +38,8 @@ def get_profile(user_id):
         "bio": profile.get("bio", ""),
         "avatar_url": profile.get("avatar_url", ""),
         "wishlist": profile.get("wishlist", []),
-        "library": profile.get("library", []),
+        "library": library.newest(user_doc["_id"], PROFILE_LIBRARY_ITEMS),
+        "library_count": library.count(user_doc["_id"]),
     })
 
 
@@ -60,7 +73,7 @@ def add_to_library(user_id):
     """
     Add a media item into the user's library (watchlist).
     Expects JSON with: id, title, type, optional year & coverUrl.
-    Prevents duplicates per user + media id.
+    Prevents duplicates per user + media id (one upsert on a unique index).
     """
     data = request.get_json() or {}
 
@@ -68,84 +81,50 @@ def add_to_library(user_id):
         return jsonify({"error": "missing_fields"}), 400
 
     media = {
-        "id": data.get("id"),
+        "id": media_key(data.get("id")),
         "title": data.get("title"),
         "type": data.get("type"),
         "year": data.get("year", ""),
         "coverUrl": data.get("coverUrl", ""),
     }
 
-    # Ensure profile structure exists
-    db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$setOnInsert": {
-                "profile": {
-                    "bio": "",
-                    "avatar_url": "",
-                    "wishlist": [],
-                    "library": [],
-                }
-            }
-        },
-        upsert=True,
-    )
-
-    # 🔍 check if this media is already in the user's library
-    existing = db["users"].find_one(
-        {
-            "_id": ObjectId(user_id),
-            "profile.library.id": media["id"],  # check by media id
-        }
-    )
-    if existing:
+    if not library.add(user_key(user_id), media):
         return jsonify({"error": "already_in_library"}), 409
 
-    # Push item into library array
-    result = db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$push": {"profile.library": media}},
-    )
-
-    if result.modified_count == 0:
-        return jsonify({"error": "user_not_found"}), 404
-
+    remember_title(media["title"], media["type"], weight=2)
     return jsonify({"message": "Added to watchlist", "item": media}), 201
 
 
 @profile_bp.get("/profile/<user_id>/library")
 def get_library(user_id):
-    """Return the list of items in the user's library."""
-    user_doc = db["users"].find_one(
-        {"_id": ObjectId(user_id)}, {"_id": 0, "profile.library": 1}
-    )
-    if not user_doc:
+    """
+    Return the items in the user's library, oldest first, or one page of
+    them with limit / cursor / sort=newest|oldest|title|type (next page's
+    cursor in X-Next-Cursor).
+    """
+    uid = user_key(user_id)
+    if not db["users"].find_one({"_id": uid}, {"_id": 1}):
         return jsonify({"error": "User not found"}), 404
 
-    return jsonify(user_doc.get("profile", {}).get("library", []))
+    return list_response(
+        request, library.collection, library.criteria(uid), shape_item,
+        sorts=LIBRARY_SORTS, stream_sort="oldest",
+    )
 
 
-@profile_bp.delete("/profile/<user_id>/library/<item_id>")
-def delete_from_library(user_id, item_id):
-    """
-    Remove a media item from the user's library by its id.
-    Supports ids stored as strings or numbers.
-    """
-    # support both "123" and 123
-    possible_ids = [item_id]
-    try:
-      possible_ids.append(int(item_id))
-    except ValueError:
-      pass
+@profile_bp.get("/profile/<user_id>/library/count")
+def get_library_count(user_id):
+    """How many items are in the user's library."""
+    return jsonify({"count": library.count(user_key(user_id))}), 200
 
-    result = db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$pull": {"profile.library": {"id": {"$in": possible_ids}}}},
-    )
 
-    if result.modified_count == 0:
+@profile_bp.delete("/profile/<user_id>/library/<item_id>")
+def delete_from_library(user_id, item_id):
+    """Remove a media item from the user's library by its id."""
+    uid = user_key(user_id)
+    if not library.remove(uid, item_id):
         # Either user doesn't exist or item wasn't in library
-        user_exists = db["users"].find_one({"_id": ObjectId(user_id)})
+        user_exists = db["users"].find_one({"_id": uid}, {"_id": 1})
         if not user_exists:
             return jsonify({"error": "user_not_found"}), 404
         return jsonify({"error": "item_not_found"}), 404
@@ -156,36 +135,117 @@ def delete_from_library(user_id, item_id):
 
 # ------------------ USER'S RATINGS ------------------ #
 
+def shape_user_rating(r):
+    return {
+        "rating_id": str(r["_id"]),
+        "media_id": r.get("media_id", ""),
+        "title": r.get("title", ""),
+        "cover_url": r.get("cover_url", ""),
+        "type": r.get("type", ""),
+        "year": r.get("year", ""),
+        "stars": r.get("stars", 0),
+        "review_text": r.get("review_text", ""),
+        "date_created": r.get("date_created"),
+    }
+
+
 @profile_bp.get("/profile/<user_id>/ratings")
 def get_user_ratings(user_id):
     """
     Return all ratings for a given user, formatted for the Profile page.
-    Handles user_id stored as ObjectId or as a plain string.
+    Optional: limit, cursor, sort=newest|oldest|highest and format=ndjson.
     """
-    # figure out how user_id is stored in the ratings collection
-    if ObjectId.is_valid(user_id):
-        uid = ObjectId(user_id)
-    else:
-        uid = user_id
-
-    cursor = db["ratings"].find({"user_id": uid})
-
-    ratings = []
-    for r in cursor:
-        ratings.append(
-            {
-                "rating_id": str(r["_id"]),
-                "media_id": r.get("media_id", ""),
-                "title": r.get("title", ""),
-                "cover_url": r.get("cover_url", ""),
-                "type": r.get("type", ""),
-                "year": r.get("year", ""),
-                "stars": r.get("stars", 0),
-                "review_text": r.get("review_text", ""),
-                "date_created": r.get("date_created"),
-            }
-        )
-
-    return jsonify(ratings), 200
+    return rating_list_response(
+        request, db["ratings"], {"user_id": user_key(user_id)}, "user_id", shape_user_rating
+    )
+
+
+# ------------------ PROFILE PAGE ------------------ #
+
+RATING_FIELDS = ("media_id", "title", "cover_url", "type", "year", "stars", "review_text", "date_created")
+
+
+def _first_page(collection, uid, sort, fields, limit):
+    """$lookup stages for the first page of a user's list (one extra doc tells if there's more) and its size."""
+    return [
+        {"$lookup": {
+            "from": collection,
+            "pipeline": [
+                {"$match": {"user_id": uid}},
+                {"$sort": dict(sort)},
+                {"$limit": limit + 1},
+                {"$project": {f: 1 for f in fields}},
+            ],
+            "as": collection,
+        }},
+        {"$lookup": {
+            "from": collection,
+            "pipeline": [{"$match": {"user_id": uid}}, {"$count": "n"}],
+            "as": f"{collection}_count",
+        }},
+    ]
+
 
+def _page(docs, sort, sorts, limit, shape):
+    """(shaped items, cursor for the next page or None) from a limit+1 page."""
+    next_cursor = encode_cursor(docs[limit - 1], sort, sorts) if len(docs) > limit else None
+    return [shape(d) for d in docs[:limit]], next_cursor
+
+
+@profile_bp.get("/profile/<user_id>/overview")
+def get_profile_overview(user_id):
+    """
+    Everything the Profile page shows on load in one response: the profile,
+    the newest library items and ratings (?limit=, default 20) with their
+    totals, and the cursors for their next pages (pass them to
+    /profile/<id>/library?sort=newest and /profile/<id>/ratings?sort=newest).
+    One aggregation, so one round trip to Mongo.
+    """
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"error": "invalid_id"}), 400
+    uid = ObjectId(user_id)
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    library.ensure_indexes()
+    ensure_list_indexes(db["ratings"], "user_id")
+    pipeline = [
+        {"$match": {"_id": uid}},
+        {"$project": {
+            "username": 1, "email": 1,
+            "profile.bio": 1, "profile.avatar_url": 1, "profile.wishlist": 1,
+            "embedded": {"$isArray": "$profile.library"},
+        }},
+        *_first_page("library", uid, LIBRARY_SORTS["newest"], ("media_id", "added_at") + ITEM_FIELDS, limit),
+        *_first_page("ratings", uid, RATING_SORTS["newest"], RATING_FIELDS, limit),
+    ]
+    user_doc = next(db["users"].aggregate(pipeline), None)
+    if user_doc and user_doc.get("embedded"):
+        # library not moved to its collection yet: move it, then read again
+        library.move_embedded(uid)
+        user_doc = next(db["users"].aggregate(pipeline), None)
+    if not user_doc:
+        return jsonify({"error": "user_not_found"}), 404
 
+    library_items, library_cursor = _page(
+        user_doc["library"], "newest", LIBRARY_SORTS, limit, shape_item
+    )
+    ratings, ratings_cursor = _page(
+        user_doc["ratings"], "newest", RATING_SORTS, limit, shape_user_rating
+    )
+    profile = user_doc.get("profile", {})
+    return jsonify({
+        "username": user_doc["username"],
+        "email": user_doc["email"],
+        "bio": profile.get("bio", ""),
+        "avatar_url": profile.get("avatar_url", ""),
+        "wishlist": profile.get("wishlist", []),
+        "library": library_items,
+        "library_count": (user_doc["library_count"] or [{"n": 0}])[0]["n"],
+        "library_cursor": library_cursor,
+        "ratings": ratings,
+        "ratings_count": (user_doc["ratings_count"] or [{"n": 0}])[0]["n"],
+        "ratings_cursor": ratings_cursor,
+    })
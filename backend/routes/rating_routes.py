@@ -3,11 +3,42 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
 
 from config import db  # uses the Mongo connection from config.py
+from ids import media_key, user_key
+from known_titles import remember_title
+from media_stats import MediaStats, valid_stars
+from rating_pages import rating_list_response
 
 rating_bp = Blueprint("ratings_bp", __name__)
 
+# count / sum / histogram per media, kept in step with every rating write
+media_stats = MediaStats(db["media_stats"])
+
+# card fields a rating copies from the media it rates
+RATING_CARD_FIELDS = ("title", "cover_url", "type", "year")
+
+LOOKUP_MAX_IDS = 100  # a couple of search pages' worth of cards
+
+_unique_index = None  # None = not tried yet, False = duplicates already exist
+
+
+def ensure_rating_indexes() -> bool:
+    """One rating per (user, media), enforced by Mongo instead of a pre-check."""
+    global _unique_index
+    if _unique_index is None:
+        try:
+            db["ratings"].create_index(
+                [("user_id", 1), ("media_id", 1)], unique=True, name="user_media_unique"
+            )
+            _unique_index = True
+        except OperationFailure:
+            # old duplicate ratings block the index; keep checking by hand
+            _unique_index = False
+    return _unique_index
+
 
 @rating_bp.post("/ratings")
 def submit_rating():
@@ -22,59 +53,180 @@ def submit_rating():
         return jsonify({"error": "missing_fields"}), 400
     
     # Convert media_id to string (it might be a number)
-    media_id = str(media_id)
+    media_id = media_key(media_id)
 
-    # handle both ObjectId and string user_id
-    try:
-        uid = ObjectId(user_id)
-    except Exception:
-        uid = user_id
+    stars = valid_stars(stars)
+    if stars is None:
+        return jsonify({"error": "invalid_stars"}), 400
 
-    # prevent duplicate rating for same user + media
-    existing = db["ratings"].find_one({"user_id": uid, "media_id": media_id})
-    if existing:
-        return jsonify({
-            "error": "already_rated",
-            "rating_id": str(existing["_id"])
-        }), 409
+    uid = user_key(user_id)
+
+    if not ensure_rating_indexes():
+        # no unique index to lean on: prevent duplicates the slow way
+        existing = db["ratings"].find_one({"user_id": uid, "media_id": media_id}, {"_id": 1})
+        if existing:
+            return already_rated(existing)
 
     rating_doc = {
-        "user_id": ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id,
+        "user_id": uid,
         "media_id": media_id,
         "title": data.get("title", ""),
         "cover_url": data.get("cover_url", ""),
         "type": data.get("type", ""),
         "year": data.get("year", ""),
-        "stars": int(stars),
+        "stars": stars,
         "review_text": review_text,
         "date_created": datetime.utcnow(),
     }
 
-    result = db["ratings"].insert_one(rating_doc)
+    try:
+        result = db["ratings"].insert_one(rating_doc)
+    except DuplicateKeyError:
+        existing = db["ratings"].find_one({"user_id": uid, "media_id": media_id}, {"_id": 1})
+        return already_rated(existing)
+
+    media_stats.added(media_id, stars, rating_doc["date_created"], rating_doc)
+    # rated titles are the most useful typeahead suggestions
+    remember_title(rating_doc["title"], rating_doc["type"], weight=3)
     return jsonify({"rating_id": str(result.inserted_id)}), 201
 
 
+def already_rated(existing):
+    return jsonify({
+        "error": "already_rated",
+        "rating_id": str(existing["_id"]) if existing else None,
+    }), 409
+
+
+@rating_bp.put("/ratings/by-user/<user_id>/<media_id>")
+def upsert_rating(user_id, media_id):
+    """
+    Create this user's rating of a media, or update it if it exists, in one
+    atomic write. Returns 201 {"status": "created"} or 200 {"status": "updated"}.
+    """
+    data = request.json or {}
+    if not data.get("stars"):
+        return jsonify({"error": "missing_stars"}), 400
+    stars = valid_stars(data.get("stars"))
+    if stars is None:
+        return jsonify({"error": "invalid_stars"}), 400
+
+    ensure_rating_indexes()
+    now = datetime.utcnow()
+    new_id = ObjectId()
+    card = {f: data[f] for f in RATING_CARD_FIELDS if f in data}
+    update = {
+        "$set": {
+            "stars": stars,
+            "review_text": data.get("review_text", ""),
+            "date_updated": now,
+            **card,
+        },
+        "$setOnInsert": {
+            "_id": new_id,
+            "date_created": now,
+            **{f: "" for f in RATING_CARD_FIELDS if f not in card},
+        },
+    }
+    media_id = media_key(media_id)
+    query = {"user_id": user_key(user_id), "media_id": media_id}
+
+    def write():
+        return db["ratings"].find_one_and_update(
+            query,
+            update,
+            upsert=True,
+            projection={"stars": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    try:
+        before = write()
+    except DuplicateKeyError:
+        # a concurrent first rating won the insert; ours is now an update
+        before = write()
+
+    if before is None:
+        media_stats.added(media_id, stars, now, card)
+        remember_title(card.get("title", ""), card.get("type", ""), weight=3)
+        return jsonify({"rating_id": str(new_id), "status": "created"}), 201
+
+    old_stars = valid_stars(before.get("stars"))
+    if old_stars is None:
+        media_stats.added(media_id, stars, now, card)
+    else:
+        media_stats.changed(media_id, old_stars, stars)
+    return jsonify({"rating_id": str(before["_id"]), "status": "updated"}), 200
+
+
+def shape_rating(r):
+    return {
+        "_id": str(r["_id"]),
+        "user_id": str(r["user_id"]),
+        "media_id": str(r["media_id"]),
+        "title": r.get("title", ""),
+        "cover_url": r.get("cover_url", ""),
+        "type": r.get("type", ""),
+        "year": r.get("year", ""),
+        "stars": r.get("stars"),
+        "review_text": r.get("review_text", ""),
+        "date_created": r.get("date_created"),
+    }
+
+
 @rating_bp.get("/ratings/<media_id>")
 def get_ratings(media_id):
+    """
+    Ratings for a media, streamed. Optional: limit, cursor and
+    sort=newest|oldest|highest for pages; format=ndjson for NDJSON.
+    """
     # media_id is stored as string in ratings, so we just query by that
-    ratings = list(db["ratings"].find({"media_id": media_id}))
-
-    fixed = []
-    for r in ratings:
-        fixed.append({
-            "_id": str(r["_id"]),
-            "user_id": str(r["user_id"]),
-            "media_id": str(r["media_id"]),
-            "title": r.get("title", ""),
-            "cover_url": r.get("cover_url", ""),
-            "type": r.get("type", ""),
-            "year": r.get("year", ""),
-            "stars": r.get("stars"),
-            "review_text": r.get("review_text", ""),
-            "date_created": r.get("date_created"),
-        })
-
-    return jsonify(fixed), 200
+    return rating_list_response(
+        request, db["ratings"], {"media_id": media_id}, "media_id", shape_rating
+    )
+
+
+@rating_bp.get("/ratings/<media_id>/summary")
+def get_rating_summary(media_id):
+    """Count, average, 1-5 histogram and last rating time, from media_stats."""
+    return jsonify(media_stats.summary(media_id)), 200
+
+
+@rating_bp.post("/ratings/lookup")
+def lookup_ratings():
+    """
+    Rating info for a page of cards in one request.
+    Body: {"media_ids": [...], "user_id": optional}
+    Returns {media_id: {count, average, histogram, last_rated, mine}},
+    where "mine" is the user's own rating (or None). Two Mongo queries total.
+    """
+    data = request.json or {}
+    media_ids = data.get("media_ids")
+    if not isinstance(media_ids, list) or not media_ids:
+        return jsonify({"error": "missing_media_ids"}), 400
+    if len(media_ids) > LOOKUP_MAX_IDS:
+        return jsonify({"error": "too_many_media_ids", "max": LOOKUP_MAX_IDS}), 400
+
+    # dict.fromkeys keeps the order and drops repeats
+    media_ids = list(dict.fromkeys(media_key(m) for m in media_ids))
+    results = media_stats.summaries(media_ids)
+    for summary in results.values():
+        summary["mine"] = None
+
+    user_id = data.get("user_id")
+    if user_id:
+        mine = db["ratings"].find(
+            {"user_id": user_key(user_id), "media_id": {"$in": media_ids}},
+            {"media_id": 1, "stars": 1, "review_text": 1},
+        )
+        for r in mine:
+            results[r["media_id"]]["mine"] = {
+                "rating_id": str(r["_id"]),
+                "stars": r.get("stars"),
+                "review_text": r.get("review_text", ""),
+            }
+
+    return jsonify(results), 200
 
 
 @rating_bp.delete("/ratings/<rating_id>")
@@ -84,11 +236,17 @@ def delete_rating(rating_id):
     except Exception:
         return jsonify({"error": "invalid_id"}), 400
 
-    result = db["ratings"].delete_one({"_id": rid})
+    deleted = db["ratings"].find_one_and_delete(
+        {"_id": rid}, projection={"media_id": 1, "stars": 1}
+    )
 
-    if result.deleted_count == 0:
+    if deleted is None:
         return jsonify({"error": "not_found"}), 404
 
+    stars = valid_stars(deleted.get("stars"))
+    if stars is not None:
+        media_stats.removed(media_key(deleted["media_id"]), stars)
+
     return jsonify({"status": "deleted"}), 200
 
 
@@ -105,13 +263,25 @@ def update_rating(rating_id):
 
     if not stars:
         return jsonify({"error": "missing_stars"}), 400
+    stars = valid_stars(stars)
+    if stars is None:
+        return jsonify({"error": "invalid_stars"}), 400
 
-    result = db["ratings"].update_one(
+    # the old document comes back so the stats can move its star
+    before = db["ratings"].find_one_and_update(
         {"_id": rid},
-        {"$set": {"stars": int(stars), "review_text": review_text}},
+        {"$set": {"stars": stars, "review_text": review_text}},
+        projection={"media_id": 1, "stars": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.modified_count == 0:
+    if before is None:
         return jsonify({"error": "not_found"}), 404
 
+    old_stars = valid_stars(before.get("stars"))
+    if old_stars is None:
+        media_stats.added(media_key(before["media_id"]), stars, datetime.utcnow())
+    else:
+        media_stats.changed(media_key(before["media_id"]), old_stars, stars)
+
     return jsonify({"status": "updated"}), 200
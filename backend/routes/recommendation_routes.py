@@ -0,0 +1,46 @@
+# backend/routes/recommendation_routes.py
+
+from flask import Blueprint, jsonify, request
+
+from config import RECS_NEIGHBORS, RECS_SHRINK, db
+from ids import user_key
+from recommender import Recommender
+from routes.leaderboard_routes import leaderboards
+from routes.profile_routes import library
+
+recommendation_bp = Blueprint("recommendations", __name__)
+
+recommender = Recommender(
+    db["recommendations"], db["ratings"], db["media_stats"],
+    neighbors=RECS_NEIGHBORS, shrink=RECS_SHRINK,
+)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+RECENT_LIBRARY = 100  # newest library entries that seed recommendations
+
+
+@recommendation_bp.get("/recommendations/<user_id>")
+def get_recommendations(user_id):
+    """
+    Titles like the ones this user rated highly or keeps in their library.
+    Users with nothing to go on yet get the top-rated board instead
+    ("source": "popular" rather than "similar"). Optional: limit.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    uid = user_key(user_id)
+    library_ids = library.media_ids(uid, RECENT_LIBRARY)
+    items = recommender.recommend(uid, library_ids, limit)
+    source = "similar"
+    if not items:
+        source = "popular"
+        try:
+            items = leaderboards.get()["items"][:limit]
+        except Exception:
+            items = []
+
+    return jsonify({"user_id": user_id, "source": source, "items": items}), 200
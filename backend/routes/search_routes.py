@@ -1,12 +1,47 @@
 # backend/routes/search_routes.py
 
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 
 import requests
 from flask import Blueprint, request, jsonify
+from pymongo.errors import PyMongoError
 
-from config import CLIENT_ID, CLIENT_SECRET, OMDB_API_KEY
+from config import (
+    db,
+    CLIENT_ID,
+    CLIENT_SECRET,
+    OMDB_API_KEY,
+    TWITCH_TOKEN_URL,
+    IGDB_API_URL,
+    OMDB_API_URL,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_FRESH_TTL,
+    SEARCH_CACHE_STALE_TTL,
+    CATALOG_MIN_RESULTS,
+    TOKEN_STORE,
+    TOKEN_STORE_PATH,
+    COVER_PROXY,
+)
+from cover_cache import cover_key
+from igdb_scheduler import IgdbBusy, IgdbScheduler
+from media_catalog import MediaCatalog, shape_game, shape_movie
+from search_cache import SearchCache, normalize_query
+from shared_state import FileTokenStore, MongoTokenStore, QuotaLedger
+from search_filters import (
+    BadFilters,
+    DEFAULT_FILTERS,
+    filters_key,
+    igdb_where,
+    matches_filters,
+    parse_search_filters,
+    sort_items,
+)
+from single_flight import SingleFlight
+from fuzzy_index import did_you_mean, did_you_mean_index
+from known_titles import remember_title, start_background_build
+from title_index import suggest_index
+from upstream import igdb, omdb, twitch, upstream_status
 
 # Blueprint just for search-related routes
 search_bp = Blueprint("search", __name__)
@@ -14,138 +49,463 @@ search_bp = Blueprint("search", __name__)
 # Small cache so we don't ask Twitch/IGDB for a token every request
 _token_cache = {"value": None, "expires_at": 0}
 
+# The same token shared by every worker, so scaling out doesn't multiply
+# token requests; the local _token_cache above sits in front of it.
+token_store = (
+    FileTokenStore(TOKEN_STORE_PATH)
+    if TOKEN_STORE == "file"
+    else MongoTokenStore(db["shared_state"])
+)
+TOKEN_WAIT = 5  # seconds to wait for another worker's refresh
+
+# IGDB requests made by all workers, per second
+igdb_quota = QuotaLedger(db["api_usage"])
+
+# Shared worker pool for fanning one search out to IGDB and OMDb at once.
+# Bounded so a burst of searches can't open unlimited upstream connections.
+SEARCH_WORKERS = 8
+SEARCH_TIMEOUT = 10  # seconds to wait for all sources before answering
+_search_pool = ThreadPoolExecutor(
+    max_workers=SEARCH_WORKERS, thread_name_prefix="search"
+)
+
+# Cached upstream results (memory LRU + shared "search_cache" collection)
+search_cache = SearchCache(
+    db["search_cache"],
+    max_entries=SEARCH_CACHE_SIZE,
+    fresh_ttl=SEARCH_CACHE_FRESH_TTL,
+    stale_ttl=SEARCH_CACHE_STALE_TTL,
+)
+
+# Every title upstream has ever returned, text-indexed for local search
+media_catalog = MediaCatalog(db["media_items"])
+
+# Identical upstream calls running at the same time share one request
+in_flight = SingleFlight()
+
+
+def _token_is_fresh(now) -> bool:
+    return bool(_token_cache["value"]) and _token_cache["expires_at"] > now + 60
+
 
 def get_access_token() -> str:
     """Get or refresh the IGDB OAuth token."""
-    now = time.time()
-    if _token_cache["value"] and _token_cache["expires_at"] > now + 60:
+    if _token_is_fresh(time.time()):
+        return _token_cache["value"]
+    # many threads can notice the expiry at once; only one of them refreshes
+    return in_flight.do("twitch_token", _refresh_access_token)
+
+
+def _refresh_access_token() -> str:
+    """
+    Get a fresh token into _token_cache, in order of preference:
+    the shared store, a refresh we hold the lease for, or (if another worker
+    holds it) that worker's result once it lands.
+    """
+    if _token_is_fresh(time.time()):
+        # another thread refreshed it just before we got here
         return _token_cache["value"]
 
-    url = "https://id.twitch.tv/oauth2/token"
+    try:
+        if _load_shared_token():
+            return _token_cache["value"]
+
+        if token_store.try_lease():
+            try:
+                token, expires_at = _fetch_twitch_token()
+                token_store.write(token, expires_at)
+            except PyMongoError:
+                pass  # keep the token we just fetched, it just isn't shared
+            finally:
+                try:
+                    token_store.release()
+                except PyMongoError:
+                    pass  # the lease runs out on its own
+            return token
+
+        give_up_at = time.time() + TOKEN_WAIT
+        while time.time() < give_up_at:
+            time.sleep(0.1)
+            if _load_shared_token():
+                return _token_cache["value"]
+    except PyMongoError:
+        pass  # shared store is down; fall back to a per-worker token
+
+    return _fetch_twitch_token()[0]
+
+
+def _load_shared_token() -> bool:
+    """Copy the shared token into _token_cache if it is still fresh."""
+    value, expires_at = token_store.read()
+    if value and expires_at > time.time() + 60:
+        _token_cache["value"] = value
+        _token_cache["expires_at"] = expires_at
+        return True
+    return False
+
+
+def _fetch_twitch_token():
+    """Ask Twitch for a new token; returns (token, expires_at)."""
+    now = time.time()
+    url = TWITCH_TOKEN_URL
     params = {
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET,
         "grant_type": "client_credentials",
     }
-    r = requests.post(url, params=params, timeout=15)
+    r = twitch.post(url, params=params, idempotent=True)
     r.raise_for_status()
     data = r.json()
 
     _token_cache["value"] = data["access_token"]
     _token_cache["expires_at"] = now + data.get("expires_in", 3600)
-    return _token_cache["value"]
+    return _token_cache["value"], _token_cache["expires_at"]
 
 
-def igdb_search_games(query: str, token: str):
-    """Ask IGDB for games that match the search text."""
-    url = "https://api.igdb.com/v4/games"
+def igdb_post(path: str, body: str):
+    """Send one APICalypse body to an IGDB endpoint and return its JSON."""
+    token = get_access_token()
     headers = {
         "Client-ID": CLIENT_ID,
         "Authorization": f"Bearer {token}",
     }
+    # IGDB queries are reads, so it is safe to retry even though they are POSTs
+    r = igdb.post(f"{IGDB_API_URL}/{path}", headers=headers, data=body, idempotent=True)
+    r.raise_for_status()
+    return r.json()
+
+
+# All IGDB traffic is queued here: 4 req/s across workers, batched via multiquery
+igdb_scheduler = IgdbScheduler(igdb_post, ledger=igdb_quota)
+
+
+def igdb_search_games(query: str, filters=DEFAULT_FILTERS):
+    """Ask IGDB for one page of games that match the search text and filters."""
+    page_size = filters["page_size"]
+    where = igdb_where(filters)
+    safe_query = query.replace('"', "")  # a quote would end IGDB's search string
     body = (
-        f'search "{query}"; '
+        f'search "{safe_query}"; '
         "fields name, first_release_date, platforms.name, summary, cover.image_id; "
-        "limit 12;"
+        + (f"where {' & '.join(where)}; " if where else "")
+        + f"limit {page_size}; offset {(filters['page'] - 1) * page_size};"
     )
-    r = requests.post(url, headers=headers, data=body, timeout=20)
-    r.raise_for_status()
-    return r.json()
+    return igdb_scheduler.query("games", body)
 
 
-def fmt_unix_date(ts):
-    """Turn IGDB's Unix timestamp into YYYY-MM-DD."""
-    if not ts:
-        return None
+def local_matches(query: str, media_type: str, filters=DEFAULT_FILTERS):
+    """
+    Catalog page if the catalog has enough matches to skip upstream, else None.
+    The catalog only holds titles earlier upstream pages brought in, so past
+    page 1 it answers only when it can fill the whole requested page.
+    """
+    page, page_size = filters["page"], filters["page_size"]
+    needed = CATALOG_MIN_RESULTS if page == 1 else page * page_size
     try:
-        return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
-    except Exception:
+        if media_catalog.count(query, media_type, filters) < needed:
+            return None
+        return media_catalog.search(query, media_type, filters)
+    except PyMongoError:
         return None
 
 
-def cover_url(image_id):
-    """Build the IGDB cover URL or a placeholder."""
-    return (
-        f"https://images.igdb.com/igdb/image/upload/t_cover_small_2x/{image_id}.jpg"
-        if image_id
-        else "https://placehold.co/200x280?text=No+Cover"
+def finish_page(items, filters):
+    """Apply whatever filters/sort the upstream couldn't do itself."""
+    return sort_items([it for it in items if matches_filters(it, filters)], filters["sort"])
+
+
+def remember_in_catalog(items):
+    """Upsert fresh upstream results into media_items (best effort)."""
+    for item in items:
+        remember_title(item.get("title"), item.get("type", ""))
+    try:
+        media_catalog.upsert_many(items)
+    except PyMongoError:
+        pass
+
+
+def fetch_games(query: str, filters=DEFAULT_FILTERS):
+    """Search IGDB and return results already shaped as cards."""
+    key = ("igdb", normalize_query(query), filters_key(filters))
+    return in_flight.do(key, _fetch_games, query, filters)
+
+
+def _fetch_games(query: str, filters):
+    games = [shape_game(g) for g in igdb_search_games(query, filters)]
+    remember_in_catalog(games)
+    return games
+
+
+def find_games(query: str, filters=DEFAULT_FILTERS):
+    """Game search: local catalog first, then the cache, then IGDB."""
+    if filters["type"] not in (None, "Game"):
+        return []
+    local = local_matches(query, "Game", filters)
+    if local is not None:
+        return local
+    games = search_cache.get_or_fetch(
+        "igdb", query, lambda q: fetch_games(q, filters), variant=filters_key(filters)
     )
+    return finish_page(games, filters)
+
+
+def list_headers(query, items, filters):
+    """
+    Extra info for the list endpoints, whose body must stay a plain list:
+    paging, plus a corrected spelling when nothing was found.
+    """
+    headers = {"X-Page": str(filters["page"]), "X-Page-Size": str(filters["page_size"])}
+    if not items:
+        start_background_build(db)
+        corrected = did_you_mean_index.correct(query)
+        if corrected:
+            headers["X-Did-You-Mean"] = corrected
+    return headers
+
+
+def suggest_correction(query, filters):
+    """
+    "Did you mean" for an empty search: the corrected query, known titles
+    that match it, and catalog cards for it when we have them, so the
+    retry doesn't need another upstream call.
+    """
+    start_background_build(db)
+    correction = did_you_mean(query, media_type=filters["type"])
+    if correction is None:
+        return None
+    try:
+        cards = media_catalog.search(correction["query"], filters["type"], filters)
+    except PyMongoError:
+        cards = []
+    if cards:
+        correction["results"] = with_cover_urls(cards)
+    return correction
+
+
+def with_cover_urls(items):
+    """
+    Point each coverUrl at our /covers proxy instead of IGDB / Amazon when
+    COVER_PROXY is on (or the caller asks with covers=proxy). Only the
+    response changes; cached and catalog copies keep the upstream URL.
+    """
+    if not (COVER_PROXY or request.args.get("covers") == "proxy"):
+        return items
+    base = request.host_url.rstrip("/")
+    shaped = []
+    for item in items:
+        key = cover_key(item.get("coverUrl"))
+        shaped.append({**item, "coverUrl": f"{base}/covers/{key}"} if key else item)
+    return shaped
 
 
 @search_bp.get("/search")
 def search_games():
-    """Search for games using IGDB."""
+    """
+    Search for games using IGDB.
+    Optional: type, year_from, year_to, platform, sort, page, page_size.
+    """
     q = (request.args.get("q") or "").strip()
     if not q:
         return jsonify([])
 
     try:
-        token = get_access_token()
-        raw = igdb_search_games(q, token)
-
-        items = []
-        for g in raw:
-            items.append(
-                {
-                    "id": g.get("id"),
-                    "title": g.get("name"),
-                    "year": fmt_unix_date(g.get("first_release_date")) or "—",
-                    "platforms": [
-                        p.get("name")
-                        for p in (g.get("platforms") or [])
-                        if p.get("name")
-                    ],
-                    "summary": g.get("summary") or "No summary available.",
-                    "coverUrl": cover_url((g.get("cover") or {}).get("image_id")),
-                    "type": "Game",
-                }
-            )
-        return jsonify(items)
+        filters = parse_search_filters(request.args)
+    except BadFilters as e:
+        return jsonify({"error": "invalid_filters", "detail": str(e)}), 400
+    try:
+        games = find_games(q, filters)
+        return jsonify(with_cover_urls(games)), 200, list_headers(q, games, filters)
     except requests.HTTPError as e:
         return jsonify({"error": "igdb_http_error", "detail": str(e)}), 502
+    except IgdbBusy as e:
+        return jsonify({"error": "igdb_busy", "detail": str(e)}), 503
     except Exception as e:
         return jsonify({"error": "server_error", "detail": str(e)}), 500
 
 
-def omdb_search_movies(query: str):
-    """Ask OMDb for movies that match the search text."""
-    url = f"https://www.omdbapi.com/?apikey={OMDB_API_KEY}&s={query}"
-    r = requests.get(url, timeout=15)
+def omdb_search_movies(query: str, filters=DEFAULT_FILTERS):
+    """
+    Ask OMDb for movies that match the search text.
+    OMDb pages are always 10 long; it can only filter on one exact year.
+    """
+    url = OMDB_API_URL
+    params = {"apikey": OMDB_API_KEY, "s": query, "page": filters["page"]}
+    if filters["type"] == "Movie":
+        params["type"] = "movie"  # otherwise series and episodes come back too, as before
+    if filters["year_from"] is not None and filters["year_from"] == filters["year_to"]:
+        params["y"] = filters["year_from"]
+    r = omdb.get(url, params=params)
     r.raise_for_status()
     data = r.json()
 
     if data.get("Response") != "True":
         return []
 
-    results = []
-    for m in data.get("Search", []):
-        results.append(
-            {
-                "id": m.get("imdbID"),
-                "title": m.get("Title"),
-                "year": m.get("Year"),
-                "platforms": ["Theaters", "Streaming"],
-                "summary": "No summary available.",
-                "coverUrl": (
-                    m.get("Poster")
-                    if m.get("Poster") != "N/A"
-                    else "https://placehold.co/200x280?text=No+Cover"
-                ),
-                "type": "Movie",
-            }
-        )
-    return results
+    return [shape_movie(m) for m in data.get("Search", [])]
 
 
 @search_bp.get("/movies")
 def search_movies():
-    """Search for movies using OMDb."""
+    """Search for movies using OMDb. Takes the same filters as /search."""
     q = (request.args.get("q") or "").strip()
     if not q:
         return jsonify([])
 
     try:
-        results = omdb_search_movies(q)
-        return jsonify(results)
+        filters = parse_search_filters(request.args)
+    except BadFilters as e:
+        return jsonify({"error": "invalid_filters", "detail": str(e)}), 400
+    try:
+        results = find_movies(q, filters)
+        return jsonify(with_cover_urls(results)), 200, list_headers(q, results, filters)
     except Exception as e:
         return jsonify({"error": "server_error", "detail": str(e)}), 500
+
+
+def fetch_movies(query: str, filters=DEFAULT_FILTERS):
+    """Search OMDb and add what it returns to the local catalog."""
+    key = ("omdb", normalize_query(query), filters_key(filters))
+    return in_flight.do(key, _fetch_movies, query, filters)
+
+
+def _fetch_movies(query: str, filters):
+    movies = omdb_search_movies(query, filters)
+    remember_in_catalog(movies)
+    return movies
+
+
+def find_movies(query: str, filters=DEFAULT_FILTERS):
+    """Movie search: local catalog first, then the cache, then OMDb."""
+    if filters["type"] not in (None, "Movie"):
+        return []
+    local = local_matches(query, "Movie", filters)
+    if local is not None:
+        return local
+    movies = search_cache.get_or_fetch(
+        "omdb", query, lambda q: fetch_movies(q, filters), variant=filters_key(filters)
+    )
+    return finish_page(movies, filters)
+
+
+# Each source the combined search fans out to: name -> (media type, search)
+SEARCH_SOURCES = {
+    "igdb": ("Game", find_games),
+    "omdb": ("Movie", find_movies),
+}
+
+
+def _timed_search(fn, query, filters):
+    """Run one source search on a worker, returning (items, elapsed ms)."""
+    started = time.monotonic()
+    items = fn(query, filters)
+    return items, round((time.monotonic() - started) * 1000)
+
+
+@search_bp.get("/search/all")
+def search_all():
+    """
+    Search games and movies in one request.
+    Both upstreams are called at the same time, so the wait is roughly the
+    slower of the two instead of their sum. If one source fails or is too
+    slow we still return what the other found, plus a status per source.
+
+    Takes the same filters as /search; "page" is applied per source and a
+    type filter skips the other source entirely.
+    """
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"results": [], "sources": {}})
+
+    try:
+        filters = parse_search_filters(request.args)
+    except BadFilters as e:
+        return jsonify({"error": "invalid_filters", "detail": str(e)}), 400
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    futures = {
+        name: _search_pool.submit(_timed_search, fn, q, filters)
+        for name, (media_type, fn) in SEARCH_SOURCES.items()
+        if filters["type"] in (None, media_type)
+    }
+
+    results = []
+    sources = {}
+    seen = set()
+    for name, future in futures.items():
+        try:
+            items, elapsed_ms = future.result(
+                timeout=max(0, deadline - time.monotonic())
+            )
+        except (FuturesTimeout, IgdbBusy):
+            future.cancel()
+            sources[name] = {"status": "timeout"}
+            continue
+        except requests.HTTPError as e:
+            sources[name] = {"status": "error", "error": "http_error", "detail": str(e)}
+            continue
+        except Exception as e:
+            sources[name] = {"status": "error", "error": "server_error", "detail": str(e)}
+            continue
+
+        sources[name] = {
+            "status": "ok",
+            "count": len(items),
+            "elapsed_ms": elapsed_ms,
+        }
+        for item in items:
+            # ids are only unique per type (IGDB ints vs IMDb strings)
+            key = (item["type"], str(item["id"]))
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append(item)
+
+    if not any(src["status"] == "ok" for src in sources.values()):
+        return jsonify({"error": "upstream_unavailable", "sources": sources}), 502
+
+    if filters["sort"] != "relevance":
+        results = sort_items(results, filters["sort"])
+
+    body = {
+        "results": with_cover_urls(results),
+        "sources": sources,
+        "page": filters["page"],
+        "page_size": filters["page_size"],
+    }
+    if not results:
+        body["did_you_mean"] = suggest_correction(q, filters)
+    return jsonify(body)
+
+
+@search_bp.get("/search/suggest")
+def search_suggest():
+    """
+    Typeahead suggestions from titles we already know (ratings, libraries,
+    cached searches). Answered from memory; never calls IGDB or OMDb.
+    """
+    start_background_build(db)
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify([])
+
+    try:
+        limit = min(max(int(request.args.get("limit", 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    media_type = parse_search_filters({"type": request.args.get("type")})["type"]
+    return jsonify(suggest_index.suggest(q, limit=limit, media_type=media_type))
+
+
+@search_bp.get("/search/cache/stats")
+def search_cache_stats():
+    """Hit / miss / stale counters for tuning the cache TTLs."""
+    stats = search_cache.snapshot()
+    stats["upstream_calls"] = in_flight.snapshot()
+    stats["upstreams"] = upstream_status()
+    stats["igdb_scheduler"] = igdb_scheduler.snapshot()
+    stats["suggest_index"] = suggest_index.stats()
+    stats["did_you_mean_index"] = did_you_mean_index.stats()
+    try:
+        stats["igdb_requests_last_minute"] = igdb_quota.usage("igdb")
+    except PyMongoError:
+        stats["igdb_requests_last_minute"] = None
+    return jsonify(stats)
@@ -0,0 +1,127 @@
+# backend/routes/transfer_routes.py
+
+from bson import ObjectId
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from config import IMPORT_BATCH_SIZE, IMPORT_MAX_MB, db
+from ids import user_key
+from rating_pages import SORTS, ensure_list_indexes
+from routes.profile_routes import library
+from routes.rating_routes import ensure_rating_indexes, media_stats
+from user_library import SORTS as LIBRARY_SORTS, shape_item
+from user_transfer import (
+    LIBRARY_COLUMNS,
+    RATING_COLUMNS,
+    ImportJobs,
+    LibraryImporter,
+    RatingImporter,
+    UploadTooLarge,
+    export_library_item,
+    export_lines,
+    export_rating,
+    shape_job,
+    spool_upload,
+    upload_format,
+)
+
+transfer_bp = Blueprint("transfer_bp", __name__)
+
+import_jobs = ImportJobs(db["import_jobs"], batch_size=IMPORT_BATCH_SIZE)
+
+MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def start_import(user_id, importer):
+    """
+    Spool the upload (multipart "file" field or the raw body) and queue
+    the job. Answers 202 with the job id and where to poll it.
+    """
+    upload = request.files.get("file")
+    fmt = upload_format(
+        request.args.get("format"),
+        upload.filename if upload else "",
+        upload.mimetype if upload else request.mimetype,
+    )
+    try:
+        path = spool_upload(
+            upload.stream if upload else request.stream, fmt, IMPORT_MAX_MB * 1024 * 1024
+        )
+    except UploadTooLarge as e:
+        return jsonify({"error": "upload_too_large", "detail": str(e)}), 413
+
+    job_id = import_jobs.start(importer, user_id, fmt, path)
+    return jsonify({
+        "job_id": str(job_id),
+        "status": "queued",
+        "status_url": f"/imports/{job_id}",
+    }), 202
+
+
+# ------------------ IMPORT ------------------ #
+
+@transfer_bp.post("/profile/<user_id>/ratings/import")
+def import_ratings(user_id):
+    """
+    Import ratings from NDJSON or CSV (columns as in the export:
+    media_id, stars, then optional title, type, year, cover_url,
+    review_text, date_created). A rating for a media the user already
+    rated replaces it. Runs in the background; poll GET /imports/<job_id>.
+    """
+    ensure_rating_indexes()
+    return start_import(user_id, RatingImporter(db, media_stats, user_key(user_id)))
+
+
+@transfer_bp.post("/profile/<user_id>/library/import")
+def import_library(user_id):
+    """
+    Import library items from NDJSON or CSV (id, title, type, optional
+    year and coverUrl). Items already in the library are refreshed.
+    """
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"error": "invalid_id"}), 400
+    uid = ObjectId(user_id)
+    if not db["users"].find_one({"_id": uid}, {"_id": 1}):
+        return jsonify({"error": "user_not_found"}), 404
+    return start_import(user_id, LibraryImporter(library, uid))
+
+
+@transfer_bp.get("/imports/<job_id>")
+def get_import(job_id):
+    """Progress of an import: status, rows read, written, failed, first errors."""
+    doc = import_jobs.get(job_id)
+    if doc is None:
+        return jsonify({"error": "job_not_found"}), 404
+    return jsonify(shape_job(doc)), 200
+
+
+# ------------------ EXPORT ------------------ #
+
+def export_response(rows, columns, name):
+    fmt = "csv" if request.args.get("format") == "csv" else "ndjson"
+    body = export_lines(rows, fmt, columns)
+    response = Response(stream_with_context(body), mimetype=MIMETYPES[fmt])
+    extension = "csv" if fmt == "csv" else "jsonl"
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.{extension}"'
+    return response
+
+
+@transfer_bp.get("/profile/<user_id>/ratings/export")
+def export_ratings(user_id):
+    """Every rating of a user, newest first, streamed as NDJSON (or ?format=csv)."""
+    ensure_list_indexes(db["ratings"], "user_id")
+    cursor = db["ratings"].find({"user_id": user_key(user_id)}).sort(SORTS["newest"])
+    return export_response((export_rating(r) for r in cursor), RATING_COLUMNS, "ratings")
+
+
+@transfer_bp.get("/profile/<user_id>/library/export")
+def export_library(user_id):
+    """The user's library, streamed as NDJSON (or ?format=csv)."""
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"error": "invalid_id"}), 400
+    uid = ObjectId(user_id)
+    if not db["users"].find_one({"_id": uid}, {"_id": 1}):
+        return jsonify({"error": "user_not_found"}), 404
+    cursor = library.collection.find(library.criteria(uid)).sort(LIBRARY_SORTS["oldest"])
+    return export_response(
+        (export_library_item(shape_item(d)) for d in cursor), LIBRARY_COLUMNS, "library"
+    )
@@ -0,0 +1,189 @@
+# backend/search_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import PyMongoError
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so "  Halo  2" and "halo 2" share a key."""
+    return " ".join((query or "").lower().split())
+
+
+class SearchCache:
+    """
+    Two-tier cache for upstream search results.
+
+    Tier 1 is a small in-process LRU (fast, per worker). Tier 2 is a Mongo
+    collection shared by every worker; a TTL index on "expires_at" lets Mongo
+    delete old entries by itself.
+
+    Entry age decides what we do:
+      - younger than fresh_ttl  -> serve it (hit)
+      - younger than stale_ttl  -> serve it now, refresh in the background
+      - older than that         -> fetch again, but if upstream fails we
+                                   still answer with the old data
+    """
+
+    def __init__(self, collection, max_entries=500, fresh_ttl=900,
+                 stale_ttl=86400, keep_for=7 * 86400, refresh_workers=2):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.keep_for = keep_for
+
+        self._memory = OrderedDict()  # key -> (fetched_at, results)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="search-cache"
+        )
+        self._indexes_ready = False
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "stale_fallbacks": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "mongo_errors": 0,
+        }
+
+    # ---------------- public API ---------------- #
+
+    def get_or_fetch(self, source: str, query: str, fetch, variant=""):
+        """
+        Return cached results for (source, query), calling fetch(query) when
+        needed. variant separates different filter/page combinations.
+        """
+        key = f"{source}:{normalize_query(query)}"
+        if variant:
+            key = f"{key}|{variant}"
+        entry = self._lookup(key)
+
+        if entry is not None:
+            fetched_at, results = entry
+            age = time.time() - fetched_at
+            if age < self.fresh_ttl:
+                self._count("hits")
+                return results
+            if age < self.stale_ttl:
+                self._count("stale")
+                self._refresh_later(key, source, query, fetch)
+                return results
+
+        self._count("misses")
+        try:
+            results = fetch(query)
+        except Exception:
+            if entry is None:
+                raise
+            # upstream is down but we have something old -> better than a 502
+            self._count("stale_fallbacks")
+            return entry[1]
+
+        self.put(key, source, query, results)
+        return results
+
+    def put(self, key, source, query, results, fetched_at=None):
+        """Store results in both tiers."""
+        fetched_at = fetched_at or time.time()
+        self._remember(key, fetched_at, results)
+
+        try:
+            self._ensure_indexes()
+            fetched_dt = datetime.fromtimestamp(fetched_at, tz=timezone.utc)
+            self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "source": source,
+                    "query": normalize_query(query),
+                    "results": results,
+                    "fetched_at": fetched_dt,
+                    "expires_at": fetched_dt + timedelta(seconds=self.keep_for),
+                },
+                upsert=True,
+            )
+        except PyMongoError:
+            self._count("mongo_errors")
+
+    def snapshot(self):
+        """Counters plus current sizes, for the stats endpoint."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["refreshing"] = len(self._refreshing)
+        lookups = stats["hits"] + stats["stale"] + stats["misses"]
+        stats["hit_ratio"] = (
+            round((stats["hits"] + stats["stale"]) / lookups, 3) if lookups else None
+        )
+        stats["fresh_ttl"] = self.fresh_ttl
+        stats["stale_ttl"] = self.stale_ttl
+        return stats
+
+    # ---------------- helpers ---------------- #
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        try:
+            doc = self.collection.find_one({"_id": key}, {"results": 1, "fetched_at": 1})
+        except PyMongoError:
+            self._count("mongo_errors")
+            return None
+        if not doc:
+            return None
+
+        fetched_at = doc["fetched_at"]
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        entry = (fetched_at.timestamp(), doc.get("results", []))
+        self._remember(key, *entry)
+        return entry
+
+    def _remember(self, key, fetched_at, results):
+        with self._lock:
+            self._memory[key] = (fetched_at, results)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _refresh_later(self, key, source, query, fetch):
+        """Kick off one background refresh per key (duplicates are skipped)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresh_pool.submit(self._refresh, key, source, query, fetch)
+
+    def _refresh(self, key, source, query, fetch):
+        try:
+            results = fetch(query)
+            self.put(key, source, query, results)
+            self._count("refreshes")
+        except Exception:
+            self._count("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        # Mongo removes documents once expires_at is in the past
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self._indexes_ready = True
@@ -0,0 +1,120 @@
+# backend/search_filters.py
+#
+# Parsing and applying the search query parameters:
+#   type=Game|Movie, year_from, year_to, platform, sort, page, page_size
+# Filters are pushed down to IGDB / OMDb / Mongo where possible; the helpers
+# here apply whatever the upstream couldn't do itself.
+
+from datetime import datetime, timezone
+
+from media_catalog import release_year
+
+# relevance keeps upstream order; "-year" means newest first
+SORT_KEYS = ("relevance", "title", "year", "-year")
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 50
+
+
+class BadFilters(ValueError):
+    pass
+
+
+def _int_arg(args, name):
+    try:
+        return int(args.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _year_arg(args, name):
+    year = _int_arg(args, name)
+    return year if year is not None and 1800 <= year <= 2200 else None
+
+
+def parse_search_filters(args) -> dict:
+    """
+    Read filters from request.args (or any dict), falling back to defaults.
+    Raises BadFilters for a year range that can't match anything.
+    """
+    media_type = (args.get("type") or "").strip().capitalize()
+    if media_type not in ("Game", "Movie"):
+        media_type = None
+
+    sort = (args.get("sort") or "relevance").strip().lower()
+    if sort not in SORT_KEYS:
+        sort = "relevance"
+
+    year_from, year_to = _year_arg(args, "year_from"), _year_arg(args, "year_to")
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise BadFilters(f"year_from ({year_from}) is after year_to ({year_to})")
+
+    page = _int_arg(args, "page") or 1
+    page_size = _int_arg(args, "page_size") or DEFAULT_PAGE_SIZE
+
+    return {
+        "type": media_type,
+        "year_from": year_from,
+        "year_to": year_to,
+        "platform": (args.get("platform") or "").strip().lower() or None,
+        "sort": sort,
+        "page": max(page, 1),
+        "page_size": min(max(page_size, 1), MAX_PAGE_SIZE),
+    }
+
+
+DEFAULT_FILTERS = parse_search_filters({})
+
+
+def filters_key(filters) -> str:
+    """Stable cache-key suffix; empty for the default filters."""
+    if filters == DEFAULT_FILTERS:
+        return ""
+    return "|".join(f"{k}={filters[k]}" for k in sorted(filters) if filters[k] is not None)
+
+
+def matches_filters(item, filters) -> bool:
+    """Same rules the frontend's applyFilters used: unknown years pass."""
+    if filters["type"] and (item.get("type") or "").lower() != filters["type"].lower():
+        return False
+
+    year = release_year(item.get("year"))
+    if year is not None:
+        if filters["year_from"] is not None and year < filters["year_from"]:
+            return False
+        if filters["year_to"] is not None and year > filters["year_to"]:
+            return False
+
+    if filters["platform"]:
+        platforms = item.get("platforms") or []
+        if not any(filters["platform"] in (p or "").lower() for p in platforms):
+            return False
+    return True
+
+
+def sort_items(items, sort):
+    """Sort a page of cards; "relevance" keeps the order we got them in."""
+    if sort == "title":
+        return sorted(items, key=lambda it: (it.get("title") or "").lower())
+    if sort in ("year", "-year"):
+        known = [it for it in items if release_year(it.get("year")) is not None]
+        unknown = [it for it in items if release_year(it.get("year")) is None]
+        known.sort(key=lambda it: release_year(it.get("year")), reverse=sort == "-year")
+        return known + unknown  # undated titles always go last
+    return list(items)
+
+
+def _year_start(year) -> int:
+    return int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def igdb_where(filters) -> list:
+    """IGDB "where" clauses for the year range and platform."""
+    clauses = []
+    if filters["year_from"] is not None:
+        clauses.append(f"first_release_date >= {_year_start(filters['year_from'])}")
+    if filters["year_to"] is not None:
+        clauses.append(f"first_release_date < {_year_start(filters['year_to'] + 1)}")
+    if filters["platform"]:
+        platform = filters["platform"].replace('"', "")
+        clauses.append(f'platforms.name ~ *"{platform}"*')
+    return clauses
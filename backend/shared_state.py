@@ -0,0 +1,170 @@
+# backend/shared_state.py
+#
+# State that every gunicorn worker (and every restart) should share instead
+# of keeping its own copy: the IGDB/Twitch OAuth token and IGDB quota usage.
+#
+# Two token backends with the same small interface:
+#   MongoTokenStore - one document with an atomic lease; works across hosts
+#   FileTokenStore  - a JSON file plus an flock() lock; single host only
+
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Who holds a lease, so a worker only ever writes a token it fetched itself
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MongoTokenStore:
+    """
+    Token document in Mongo:
+        {_id, value, expires_at, lease_owner, lease_until}
+    Only the worker holding the lease calls Twitch; everyone else waits for
+    the new value to show up.
+    """
+
+    def __init__(self, collection, key="igdb_token"):
+        self.collection = collection
+        self.key = key
+
+    def read(self):
+        """Return (value, expires_at as unix time) or (None, 0)."""
+        doc = self.collection.find_one({"_id": self.key}, {"value": 1, "expires_at": 1})
+        if not doc or not doc.get("value"):
+            return None, 0
+        return doc["value"], doc.get("expires_at", 0)
+
+    def try_lease(self, seconds=30) -> bool:
+        """Atomically claim the right to refresh. False if someone else holds it."""
+        now = time.time()
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "_id": self.key,
+                    "$or": [
+                        {"lease_until": {"$exists": False}},
+                        {"lease_until": {"$lt": now}},
+                        {"lease_owner": WORKER_ID},
+                    ],
+                },
+                {"$set": {"lease_owner": WORKER_ID, "lease_until": now + seconds}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # the document exists and its lease is held -> the upsert collided
+            return False
+        return doc is not None and doc.get("lease_owner") == WORKER_ID
+
+    def write(self, value, expires_at):
+        self.collection.update_one(
+            {"_id": self.key, "lease_owner": WORKER_ID},
+            {
+                "$set": {"value": value, "expires_at": expires_at},
+                "$unset": {"lease_owner": "", "lease_until": ""},
+            },
+        )
+
+    def release(self):
+        self.collection.update_one(
+            {"_id": self.key, "lease_owner": WORKER_ID},
+            {"$unset": {"lease_owner": "", "lease_until": ""}},
+        )
+
+
+class FileTokenStore:
+    """
+    Token kept in a JSON file (put it on /dev/shm to keep it in memory).
+    The lease is an exclusive flock() on a sibling ".lock" file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock_fd = None
+
+    def read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None, 0
+        return data.get("value"), data.get("expires_at", 0)
+
+    def try_lease(self, seconds=30) -> bool:
+        import fcntl  # POSIX only, so only imported when this backend is used
+
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def write(self, value, expires_at):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"value": value, "expires_at": expires_at}, f)
+        os.replace(tmp, self.path)  # readers never see a half-written file
+        self.release()
+
+    def release(self):
+        if self._lock_fd is None:
+            return
+        import fcntl
+
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+
+class QuotaLedger:
+    """
+    Per-second request counters shared by all workers, e.g. for IGDB.
+    Each second is one small document; a TTL index throws old ones away.
+    """
+
+    def __init__(self, collection, keep_seconds=3600):
+        self.collection = collection
+        self.keep_seconds = keep_seconds
+        self._indexes_ready = False
+
+    def add(self, source, n=1) -> int:
+        """Record n requests in the current second; returns that second's total."""
+        if not self._indexes_ready:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self.collection.create_index([("source", 1), ("second", 1)])
+            self._indexes_ready = True
+
+        second = int(time.time())
+        doc = self.collection.find_one_and_update(
+            {"_id": f"{source}:{second}"},
+            {
+                "$inc": {"count": n},
+                "$setOnInsert": {
+                    "source": source,
+                    "second": second,
+                    "expires_at": datetime.now(timezone.utc)
+                    + timedelta(seconds=self.keep_seconds),
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["count"]
+
+    def usage(self, source, window=60):
+        """Requests across all workers in the last `window` seconds."""
+        since = int(time.time()) - window
+        total = 0
+        for doc in self.collection.find(
+            {"source": source, "second": {"$gt": since}}, {"count": 1}
+        ):
+            total += doc.get("count", 0)
+        return total
@@ -0,0 +1,422 @@
+# backend/similar_titles.py
+#
+# Content-based "more like this" over the catalog in "media_items".
+# Build with: python similar_titles.py [--out PATH] [--popular 20000]
+#
+# Every title is a sparse vector of hashed features: the words of its
+# title and summary, each platform, its type, release year and decade,
+# weighted by TF-IDF and scaled to unit length. Two titles are similar
+# when the cosine of their vectors is high.
+#
+# The vectors go to one file the web workers memory-map instead of
+# building anything themselves:
+#     MAGIC | header length | JSON header | flat arrays
+# with the titles' ids (sorted, found by bisect), each title's own
+# features, and the inverted index: feature -> titles that have it,
+# strongest first. A query sums the postings of the title's own features
+# (at most MAX_POSTINGS each), so it reads thousands of entries rather
+# than the whole catalog.
+#
+# The answers for the most rated titles are also written to
+# "similar_titles" ({_id: media_id, items, built_at}), so the busiest
+# pages are one indexed read. NumPy does the sums when it is installed;
+# plain Python handles small catalogs.
+
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+from pymongo import ReplaceOne
+
+from media_catalog import CARD_FIELDS, canonical_media_id, release_year
+
+try:  # NumPy is optional; plain Python is fine for a small catalog
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"RRSIM001"
+DIMS = 1 << 20  # hashed feature space, so the vocabulary never has to be stored
+MAX_FEATURES = 32  # strongest features kept per title
+MAX_POSTINGS = 20_000  # strongest titles read per feature when querying
+PRECOMPUTED = 50  # answers stored per popular title
+RELOAD_CHECK = 60  # seconds between looks for a rebuilt index file
+WRITE_BATCH = 500
+
+NO_SUMMARY = "No summary available."
+TITLE_WEIGHT = 3.0
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "he", "her", "his", "in", "into", "is", "it", "its", "of", "on", "or",
+    "she", "that", "the", "their", "they", "this", "to", "was", "who",
+    "will", "with", "you", "your",
+}
+
+
+# ---------------- features ---------------- #
+
+def words(text):
+    return [
+        w for w in re.findall(r"[a-z0-9]+", (text or "").lower())
+        if len(w) > 1 and w not in STOP_WORDS
+    ]
+
+
+def features(card):
+    """Hashed feature -> term weight (before IDF) for one catalog card."""
+    counts = {}
+
+    def add(token, weight=1.0):
+        f = zlib.crc32(token.encode("utf-8")) & (DIMS - 1)
+        counts[f] = counts.get(f, 0.0) + weight
+
+    for word in words(card.get("title")):
+        add(word, TITLE_WEIGHT)
+    if card.get("summary") != NO_SUMMARY:
+        for word in words(card.get("summary")):
+            add(word)
+    for platform in card.get("platforms") or []:
+        add(f"platform:{str(platform).lower()}")
+    if card.get("type"):
+        add(f"type:{str(card['type']).lower()}")
+    year = release_year(card.get("year"))
+    if year:
+        add(f"year:{year}")
+        add(f"decade:{year // 10}")
+    # sublinear, so a word repeated down a long summary doesn't swamp the rest
+    return {f: 1.0 + math.log(c) for f, c in counts.items()}
+
+
+def vector(card, idf):
+    """[(feature, weight)] by feature, unit length, at most MAX_FEATURES long."""
+    weights = [(f, tf * idf[f]) for f, tf in features(card).items()]
+    weights = heapq.nlargest(MAX_FEATURES, weights, key=lambda p: p[1])
+    norm = math.sqrt(sum(w * w for _, w in weights))
+    return sorted((f, w / norm) for f, w in weights) if norm else []
+
+
+# ---------------- build ---------------- #
+
+def build_index(read, path, out=sys.stdout):
+    """
+    Write the index for the cards `read()` yields to `path`. read is called
+    twice (document frequencies, then vectors) and must yield cards sorted
+    by media_id. The file is replaced atomically. Returns stats.
+    """
+    started = time.monotonic()
+    df, n = array("i", bytes(4 * DIMS)), 0
+    for card in read():
+        for f in features(card):
+            df[f] += 1
+        n += 1
+    idf = array("f", (math.log((n + 1) / (d + 1)) + 1 for d in df))
+
+    ids, id_ptr = bytearray(), array("q", [0])
+    doc_ptr, doc_feat, doc_w = array("q", [0]), array("i"), array("f")
+    last = None
+    for card in read():
+        media_id = card.get("media_id") or canonical_media_id(card)
+        if last is not None and media_id <= last:
+            raise ValueError("cards must come sorted by media_id, without repeats")
+        last = media_id
+        ids += media_id.encode("utf-8")
+        id_ptr.append(len(ids))
+        for f, w in vector(card, idf):
+            doc_feat.append(f)
+            doc_w.append(w)
+        doc_ptr.append(len(doc_feat))
+    titles = len(id_ptr) - 1
+
+    feat_ptr, post_doc, post_w = invert(titles, doc_ptr, doc_feat, doc_w)
+    write_index(path, {
+        "ids": array("B", ids), "id_ptr": id_ptr,
+        "doc_ptr": doc_ptr, "doc_feat": doc_feat, "doc_w": doc_w,
+        "feat_ptr": feat_ptr, "post_doc": post_doc, "post_w": post_w,
+    }, {"titles": titles, "dims": DIMS, "built_at": datetime.utcnow().isoformat() + "Z"})
+
+    result = {
+        "titles": titles,
+        "features": len(doc_feat),
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    print(
+        f"{titles:,} titles indexed ({result['bytes'] / 2**20:,.1f} MB) in {result['seconds']}s",
+        file=out, flush=True,
+    )
+    return result
+
+
+def invert(titles, doc_ptr, doc_feat, doc_w):
+    """Postings per feature, highest weight first: (feat_ptr, post_doc, post_w)."""
+    if np is not None:
+        feats = np.frombuffer(doc_feat, dtype=np.int32)
+        weights = np.frombuffer(doc_w, dtype=np.float32)
+        docs = np.repeat(
+            np.arange(titles, dtype=np.int32), np.diff(np.frombuffer(doc_ptr, dtype=np.int64))
+        )
+        order = np.lexsort((-weights, feats))
+        feat_ptr = np.zeros(DIMS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(feats, minlength=DIMS), out=feat_ptr[1:])
+        return (
+            array("q", feat_ptr.tobytes()),
+            array("i", docs[order].tobytes()),
+            array("f", weights[order].tobytes()),
+        )
+
+    postings = {}
+    for d in range(titles):
+        for i in range(doc_ptr[d], doc_ptr[d + 1]):
+            postings.setdefault(doc_feat[i], []).append((-doc_w[i], d))
+    feat_ptr, post_doc, post_w = array("q", bytes(8 * (DIMS + 1))), array("i"), array("f")
+    for f in range(DIMS):
+        for w, d in sorted(postings.get(f, ())):
+            post_doc.append(d)
+            post_w.append(-w)
+        feat_ptr[f + 1] = len(post_doc)
+    return feat_ptr, post_doc, post_w
+
+
+def _aligned(offset):
+    return -(-offset // 8) * 8
+
+
+def write_index(path, arrays, meta):
+    layout, offset = {}, 0
+    for name, values in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = [values.typecode, offset, len(values)]
+        offset += len(values) * values.itemsize
+    header = json.dumps({**meta, "byteorder": sys.byteorder, "arrays": layout}).encode()
+    start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(start + layout[name][1])
+            values.tofile(f)
+    os.replace(tmp, path)  # workers still reading the old file keep their mapping
+
+
+# ---------------- query ---------------- #
+
+class _Ids:
+    """The sorted media ids in the file, as a sequence bisect can search."""
+
+    def __init__(self, blob, ptr):
+        self.blob, self.ptr = blob, ptr
+
+    def __len__(self):
+        return len(self.ptr) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.ptr[i]:self.ptr[i + 1]]).decode("utf-8")
+
+
+class SimilarIndex:
+    """A built index, memory-mapped read-only. Safe to share between threads."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a similar-titles index")
+        size = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(self._map[len(MAGIC) + 8:len(MAGIC) + 8 + size])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {header['byteorder']}-endian machine")
+
+        start = _aligned(len(MAGIC) + 8 + size)
+        view = memoryview(self._map)
+        for name, (typecode, offset, length) in header["arrays"].items():
+            itemsize = array(typecode).itemsize
+            values = view[start + offset:start + offset + length * itemsize].cast(typecode)
+            setattr(self, name, np.frombuffer(values, dtype=typecode) if np is not None else values)
+        self.titles = header["titles"]
+        self.built_at = header["built_at"]
+        self._ids = _Ids(self.ids, self.id_ptr)
+
+    def __len__(self):
+        return self.titles
+
+    def position(self, media_id):
+        i = bisect_left(self._ids, media_id)
+        return i if i < self.titles and self._ids[i] == media_id else None
+
+    def similar(self, media_id, limit=20):
+        """[(media_id, cosine)] best first, or None when media_id isn't indexed."""
+        d = self.position(media_id)
+        if d is None:
+            return None
+        lo, hi = int(self.doc_ptr[d]), int(self.doc_ptr[d + 1])
+        query = zip(self.doc_feat[lo:hi].tolist(), self.doc_w[lo:hi].tolist())
+        if np is not None:
+            best = self._top_numpy(d, query, limit)
+        else:
+            best = self._top_python(d, query, limit)
+        return [(self._ids[j], round(score, 4)) for j, score in best]
+
+    def _postings(self, f):
+        lo = int(self.feat_ptr[f])
+        hi = min(int(self.feat_ptr[f + 1]), lo + MAX_POSTINGS)
+        return self.post_doc[lo:hi], self.post_w[lo:hi]
+
+    def _top_numpy(self, d, query, limit):
+        docs, weights = [], []
+        for f, w in query:
+            js, ws = self._postings(f)
+            docs.append(js)
+            weights.append(ws * w)
+        if not docs:
+            return []
+        scores = np.bincount(
+            np.concatenate(docs), weights=np.concatenate(weights), minlength=self.titles
+        )
+        scores[d] = 0
+        found = np.flatnonzero(scores > 0)
+        if len(found) > limit:
+            found = found[np.argpartition(-scores[found], limit)[:limit]]
+        found = found[np.argsort(-scores[found], kind="stable")]
+        return list(zip(found.tolist(), scores[found].tolist()))
+
+    def _top_python(self, d, query, limit):
+        scores = {}
+        for f, w in query:
+            js, ws = self._postings(f)
+            for j, x in zip(js, ws):
+                scores[j] = scores.get(j, 0.0) + w * x
+        scores.pop(d, None)
+        return heapq.nlargest(limit, scores.items(), key=lambda p: (p[1], -p[0]))
+
+
+# ---------------- serve ---------------- #
+
+class SimilarTitles:
+    """
+    The web side: opens the index file on first use (and again after a
+    rebuild replaces it) and answers from "similar_titles" when the title
+    was precomputed.
+    """
+
+    def __init__(self, collection, catalog, path, reload_check=RELOAD_CHECK):
+        self.collection = collection  # precomputed answers
+        self.catalog = catalog  # media_items, for the cards
+        self.path = path
+        self.reload_check = reload_check
+        self._index = None
+        self._stamp = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def index(self):
+        """The current SimilarIndex. RuntimeError if none has been built."""
+        now = time.monotonic()
+        if self._index is None or now - self._checked >= self.reload_check:
+            with self._lock:
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None and (stat.st_ino, stat.st_mtime_ns) != self._stamp:
+                    self._index = SimilarIndex(self.path)
+                    self._stamp = (stat.st_ino, stat.st_mtime_ns)
+                self._checked = now
+        if self._index is None:
+            raise RuntimeError(f"no similar-titles index at {self.path}")
+        return self._index
+
+    def similar(self, media_id, limit=20):
+        """Catalog cards like media_id, best first (None if it isn't indexed)."""
+        doc = self.collection.find_one({"_id": media_id}, {"items": 1})
+        if doc is not None:
+            return doc["items"][:limit]
+        found = self.index().similar(media_id, limit)
+        if found is None:
+            return None
+        return self.cards(found)
+
+    def cards(self, found):
+        fields = {**{f: 1 for f in CARD_FIELDS}, "media_id": 1, "_id": 0}
+        cards = {
+            c["media_id"]: c for c in self.catalog.find(
+                {"media_id": {"$in": [m for m, _ in found]}}, fields
+            )
+        }
+        return [{**cards[m], "score": score} for m, score in found if m in cards]
+
+    def precompute(self, media_ids, limit=PRECOMPUTED, out=sys.stdout):
+        """Store the answers for media_ids (popular titles) against a fresh index."""
+        index = SimilarIndex(self.path)
+        stamp, written, ops = datetime.utcnow(), 0, []
+        for media_id in media_ids:
+            found = index.similar(media_id, limit)
+            if found is None:
+                continue
+            ops.append((media_id, found))
+            if len(ops) >= WRITE_BATCH:
+                written += self._store(ops, stamp)
+                ops = []
+        if ops:
+            written += self._store(ops, stamp)
+        # titles that dropped out of the popular set, or answers from an older index
+        self.collection.delete_many({"built_at": {"$lt": stamp}})
+        print(f"{written:,} popular titles precomputed", file=out, flush=True)
+        return written
+
+    def _store(self, batch, stamp):
+        found_all = [pair for _, found in batch for pair in found]
+        cards = {c["media_id"]: c for c in self.cards(found_all)}
+        self.collection.bulk_write([
+            ReplaceOne({"_id": media_id}, {
+                "items": [{**cards[m], "score": s} for m, s in found if m in cards],
+                "built_at": stamp,
+            }, upsert=True)
+            for media_id, found in batch
+        ], ordered=False)
+        return len(batch)
+
+
+def popular_media_ids(stats, limit):
+    """Catalog ids of the most rated titles, from media_stats."""
+    cursor = stats.find({"count": {"$gt": 0}}, {"type": 1}).sort("count", -1).limit(limit)
+    return [canonical_media_id({"type": d.get("type"), "id": d["_id"]}) for d in cursor]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the similar-titles index.")
+    parser.add_argument("--out", help="index file (default: SIMILAR_INDEX_PATH)")
+    parser.add_argument("--popular", type=int, default=None,
+                        help="most rated titles to precompute answers for")
+    args = parser.parse_args()
+
+    from config import SIMILAR_INDEX_PATH, SIMILAR_POPULAR, db  # only needed when run for real
+
+    path = args.out or SIMILAR_INDEX_PATH
+    catalog = db["media_items"]
+    fields = {**{f: 1 for f in CARD_FIELDS}, "media_id": 1, "_id": 0}
+    build_index(
+        lambda: catalog.find({"media_id": {"$exists": True}}, fields)
+        .sort("media_id", 1).batch_size(5000),
+        path,
+    )
+    similar = SimilarTitles(db["similar_titles"], catalog, path)
+    popular = args.popular if args.popular is not None else SIMILAR_POPULAR
+    similar.precompute(popular_media_ids(db["media_stats"], popular))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/single_flight.py
+
+import threading
+
+
+class _Call:
+    """One in-progress call that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one.
+
+    The first thread to ask for a key runs the function; threads asking for
+    the same key while it is running wait and get the same result (or the
+    same exception). Once the call finishes the key is forgotten, so the next
+    request after that starts a new call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats["shared"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
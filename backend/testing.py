@@ -226,6 +226,33 @@ def test_library_get(user_id):
     assert isinstance(r.json, list)
     print("✓ Library GET passed")
 
+def test_library_pages(user_id):
+    for media_id, title in [("p1", "Alpha"), ("p2", "Beta")]:
+        client.post(f"/profile/{user_id}/library/add", json={"id": media_id, "title": title, "type": "Game"})
+    r = client.get(f"/profile/{user_id}/library?limit=1&sort=title")
+    assert r.status_code == 200 and len(r.json) == 1 and r.headers.get("X-Next-Cursor")
+    r = client.get(f"/profile/{user_id}/library?limit=1&sort=title&cursor={r.headers['X-Next-Cursor']}")
+    assert r.status_code == 200 and len(r.json) == 1
+    count = client.get(f"/profile/{user_id}/library/count").json["count"]
+    assert count >= 2 and client.get(f"/profile/{user_id}").json["library_count"] == count
+    for media_id in ("p1", "p2"):
+        client.delete(f"/profile/{user_id}/library/{media_id}")
+    print("✓ Library pages / count passed")
+
+def test_profile_overview(user_id):
+    client.post(f"/profile/{user_id}/library/add", json={"id": "ov1", "title": "Overview", "type": "Game"})
+    r = client.get(f"/profile/{user_id}/overview?limit=1")
+    assert r.status_code == 200
+    assert r.json["username"] and "password" not in r.json
+    assert len(r.json["library"]) == 1 and r.json["library"][0]["id"] == "ov1"
+    assert r.json["library_count"] == client.get(f"/profile/{user_id}/library/count").json["count"]
+    assert isinstance(r.json["ratings"], list) and "ratings_count" in r.json
+    if r.json["library_count"] > 1:
+        assert r.json["library_cursor"]
+    assert client.get(f"/profile/{ObjectId()}/overview").status_code == 404
+    client.delete(f"/profile/{user_id}/library/ov1")
+    print("✓ Profile overview passed")
+
 def test_library_get_empty():
     email = unique_email()
     reg = client.post("/register", json={"username": "empty", "email": email, "password": "pass"})
@@ -287,12 +314,117 @@ def test_ratings_submit_missing_stars(user_id):
     assert r.status_code == 400
     print("✓ Rating missing stars passed")
 
+def test_ratings_submit_invalid_stars(user_id):
+    r = client.post("/ratings", json={"user_id": user_id, "media_id": "998", "stars": 9})
+    assert r.status_code == 400
+    assert r.json["error"] == "invalid_stars"
+    print("✓ Rating invalid stars passed")
+
+def test_ratings_upsert_by_user(user_id):
+    url = f"/ratings/by-user/{user_id}/997"
+    r = client.put(url, json={"stars": 3, "title": "Upsert Test", "type": "Game"})
+    assert r.status_code == 201
+    assert r.json["status"] == "created"
+    r2 = client.put(url, json={"stars": 5})
+    assert r2.status_code == 200
+    assert r2.json == {"rating_id": r.json["rating_id"], "status": "updated"}
+    r3 = client.post("/ratings", json={"user_id": user_id, "media_id": "997", "stars": 1})
+    assert r3.status_code == 409
+    assert r3.json["rating_id"] == r.json["rating_id"]
+    client.delete(f"/ratings/{r.json['rating_id']}")
+    print("✓ Ratings upsert by user passed")
+
+def test_ratings_lookup(user_id, media_id):
+    r = client.post("/ratings/lookup", json={"media_ids": [media_id, "nothing_xyz"], "user_id": user_id})
+    assert r.status_code == 200
+    assert r.json[media_id]["mine"]["stars"] == 4
+    assert r.json["nothing_xyz"]["count"] == 0 and r.json["nothing_xyz"]["mine"] is None
+    assert client.post("/ratings/lookup", json={}).status_code == 400
+    print("✓ Ratings batch lookup passed")
+
+def test_ratings_import_export(user_id):
+    import time
+    from datetime import datetime
+    rows = ('{"media_id": "996", "stars": 5, "title": "Imported", "date_created": "2024-01-01T10:00:00+05:00"}\n'
+            '{"media_id": "996x", "stars": 9}\n')
+    r = client.post(f"/profile/{user_id}/ratings/import", data=rows)
+    assert r.status_code == 202
+    for _ in range(50):
+        job = client.get(r.json["status_url"]).json
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "done" and job["written"] == 1
+    assert job["errors"] == [{"row": 2, "error": "invalid_stars"}]
+    imported = db["ratings"].find_one({"user_id": ObjectId(user_id), "media_id": "996"})
+    assert imported["date_created"] == datetime(2024, 1, 1, 5, 0)  # stored as naive UTC
+    r = client.get(f"/profile/{user_id}/ratings/export?format=csv")
+    assert r.mimetype == "text/csv"
+    assert "996,Imported" in r.get_data(as_text=True)
+    assert client.get("/imports/not-a-job").status_code == 404
+    print("✓ Ratings import / export passed")
+
+def test_recommendations(user_id):
+    from array import array
+    from recommender import item_neighbors
+    # users 0 and 1 like media 0 and 1 together and dislike media 2
+    rows, cols = array("i", [0, 0, 0, 1, 1, 1]), array("i", [0, 1, 2, 0, 1, 2])
+    stars = array("f", [5, 5, 1, 4, 5, 2])
+    neighbors = dict(item_neighbors(2, 3, rows, cols, stars, [0, 1, 2], k=2, shrink=0))
+    assert [j for j, _ in neighbors[0]] == [1]
+    r = client.get(f"/recommendations/{user_id}?limit=5")
+    assert r.status_code == 200
+    assert r.json["source"] in ("similar", "popular") and len(r.json["items"]) <= 5
+    print("✓ Recommendations passed")
+
+def test_ratings_summary(media_id):
+    r = client.get(f"/ratings/{media_id}/summary")
+    assert r.status_code == 200
+    assert r.json["count"] >= 1
+    assert r.json["histogram"]["4"] >= 1
+    assert 1 <= r.json["average"] <= 5
+    print("✓ Ratings summary passed")
+
 def test_ratings_get(media_id):
     r = client.get(f"/ratings/{media_id}")
     assert r.status_code == 200
     assert isinstance(r.json, list)
     print("✓ Ratings GET passed")
 
+def test_ratings_get_paged(media_id):
+    from datetime import datetime
+    r = client.get(f"/ratings/{media_id}?format=ndjson")
+    assert r.mimetype == "application/x-ndjson"
+    assert client.get(f"/ratings/{media_id}?cursor=not-a-cursor").status_code == 400
+
+    paged_id = f"paged-{uuid.uuid4().hex[:8]}"
+    same_day = datetime(2024, 5, 1)
+    rows = [(5, datetime(2024, 4, 1)), (3, same_day), (5, same_day), (4, datetime(2024, 6, 1)),
+            (2, None)]  # an old rating saved without date_created
+    ids = db["ratings"].insert_many([
+        {"user_id": ObjectId(), "media_id": paged_id, "stars": stars, "date_created": created}
+        for stars, created in rows
+    ]).inserted_ids
+    try:
+        for sort in ("newest", "highest"):
+            seen, cursor = [], None
+            for _ in range(len(rows) + 1):
+                url = f"/ratings/{paged_id}?limit=1&sort={sort}" + (f"&cursor={cursor}" if cursor else "")
+                r = client.get(url)
+                assert r.status_code == 200 and len(r.json) == 1
+                seen.append(r.json[0]["_id"])
+                cursor = r.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            assert len(seen) == len(set(seen)) == len(rows)  # disjoint and complete
+            everything = client.get(f"/ratings/{paged_id}?limit=100&sort={sort}").json
+            assert seen == [x["_id"] for x in everything]  # same order as one page
+        stars = [x["stars"] for x in client.get(f"/ratings/{paged_id}?limit=100&sort=highest").json]
+        assert stars == sorted(stars, reverse=True)
+        print("✓ Ratings paged / NDJSON passed")
+    finally:
+        db["ratings"].delete_many({"_id": {"$in": ids}})
+
 def test_ratings_get_no_ratings():
     r = client.get("/ratings/nonexistent_media_xyz")
     assert r.status_code == 200
@@ -320,6 +452,21 @@ def test_ratings_delete(rating_id):
     assert r.json["status"] == "deleted"
     print("✓ Ratings delete passed")
 
+def test_ratings_delete_legacy_stars():
+    media_id = f"legacy-{uuid.uuid4().hex[:8]}"
+    client.post("/ratings", json={"user_id": str(ObjectId()), "media_id": media_id, "stars": 4})
+    # an old document that stored its stars as a string
+    rid = db["ratings"].insert_one({"user_id": ObjectId(), "media_id": media_id, "stars": "2"}).inserted_id
+    db["media_stats"].update_one({"_id": media_id}, {"$inc": {"count": 1, "sum": 2, "hist.2": 1}})
+    try:
+        assert client.delete(f"/ratings/{rid}").status_code == 200
+        summary = client.get(f"/ratings/{media_id}/summary").json
+        assert summary["count"] == 1 and summary["average"] == 4
+        print("✓ Ratings delete legacy stars passed")
+    finally:
+        db["ratings"].delete_many({"media_id": media_id})
+        db["media_stats"].delete_one({"_id": media_id})
+
 def test_ratings_delete_invalid():
     r = client.delete("/ratings/invalid_id")
     assert r.status_code == 400
@@ -373,6 +520,331 @@ def test_movies_no_param():
     assert r.json == []
     print("✓ Movies no param passed")
 
+def test_search_all():
+    r = client.get("/search/all?q=Halo")
+    assert r.status_code in [200, 502]
+    assert "sources" in r.json
+    if r.status_code == 200:
+        assert isinstance(r.json["results"], list)
+        assert set(r.json["sources"]) == {"igdb", "omdb"}
+    print("✓ Combined search passed")
+
+def test_search_all_empty():
+    r = client.get("/search/all?q=")
+    assert r.status_code == 200
+    assert r.json == {"results": [], "sources": {}}
+    print("✓ Combined search empty query passed")
+
+def test_search_cache_stats():
+    client.get("/movies?q=Inception")
+    r = client.get("/search/cache/stats")
+    assert r.status_code == 200
+    for key in ["hits", "misses", "stale", "memory_entries"]:
+        assert key in r.json
+    print("✓ Search cache stats passed")
+
+def test_search_local_catalog():
+    from routes.search_routes import media_catalog
+    word = f"retrotest{uuid.uuid4().hex[:8]}"
+    games = [
+        {"id": f"{word}-{i}", "title": f"{word} Quest {i}", "year": "1998-01-01",
+         "platforms": ["N64"], "summary": "Local only.", "coverUrl": "", "type": "Game"}
+        for i in range(5)
+    ]
+    media_catalog.upsert_many(games)
+    try:
+        r = client.get(f"/search?q={word}")
+        assert r.status_code == 200
+        assert {g["id"] for g in r.json} == {g["id"] for g in games}
+        print("✓ Search from local catalog passed")
+    finally:
+        db["media_items"].delete_many({"title": {"$regex": f"^{word}"}})
+
+def test_search_local_catalog_deep_page():
+    from unittest import mock
+    from routes import search_routes
+    word = f"retrotest{uuid.uuid4().hex[:8]}"
+    games = [
+        {"id": f"{word}-{i}", "title": f"{word} Quest {i}", "year": "1998-01-01",
+         "platforms": ["N64"], "summary": "Local only.", "coverUrl": "", "type": "Game"}
+        for i in range(12)
+    ]
+    search_routes.media_catalog.upsert_many(games)
+    try:
+        filters = search_routes.parse_search_filters({"page": "1", "page_size": "10"})
+        assert len(search_routes.local_matches(word, "Game", filters)) == 10
+        filters = search_routes.parse_search_filters({"page": "2", "page_size": "10"})
+        assert search_routes.local_matches(word, "Game", filters) is None
+        upstream = [{"id": "deep-1", "title": f"{word} Deep", "type": "Game", "platforms": []}]
+        with mock.patch.object(search_routes.search_cache, "get_or_fetch", return_value=upstream) as fetch:
+            r = client.get(f"/search?q={word}&page=2&page_size=10")
+        assert r.status_code == 200 and fetch.called
+        assert [g["id"] for g in r.json] == ["deep-1"]
+        print("✓ Search deep page past the local catalog passed")
+    finally:
+        db["media_items"].delete_many({"title": {"$regex": f"^{word}"}})
+
+def test_single_flight_shares_calls():
+    import threading, time
+    from single_flight import SingleFlight
+    flight = SingleFlight()
+    calls = []
+
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["Halo"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("halo", slow_search)))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [["Halo"]] * 10
+    print("✓ Single-flight coalescing passed")
+
+def test_circuit_breaker_opens():
+    from upstream import CircuitBreaker
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    print("✓ Circuit breaker opens after repeated failures passed")
+
+def test_search_filters_parse():
+    from search_filters import parse_search_filters, matches_filters
+    f = parse_search_filters({"type": "game", "year_from": "1990", "year_to": "1999",
+                              "platform": "Nintendo 64", "page": "2", "page_size": "500"})
+    assert f["type"] == "Game" and f["page"] == 2 and f["page_size"] == 50
+    assert matches_filters({"type": "Game", "year": "1998-11-21", "platforms": ["Nintendo 64"]}, f)
+    assert not matches_filters({"type": "Game", "year": "2005", "platforms": ["Nintendo 64"]}, f)
+    assert not matches_filters({"type": "Game", "year": "1998", "platforms": ["PlayStation"]}, f)
+    print("✓ Search filter parsing passed")
+
+def test_search_all_type_filter():
+    r = client.get("/search/all?q=Halo&type=Movie&page=2")
+    assert r.status_code in [200, 502]
+    assert "igdb" not in r.json["sources"]
+    r = client.get("/search/all?q=Halo&year_from=2005&year_to=1999")
+    assert r.status_code == 400 and r.json["error"] == "invalid_filters"
+    print("✓ Combined search type filter passed")
+
+def test_shared_token_lease():
+    from shared_state import MongoTokenStore
+    store = MongoTokenStore(db["shared_state"], key=f"test_token_{uuid.uuid4().hex[:8]}")
+    try:
+        assert store.try_lease()
+        db["shared_state"].update_one({"_id": store.key}, {"$set": {"lease_owner": "other-worker"}})
+        assert not store.try_lease()
+        print("✓ Shared token lease passed")
+    finally:
+        db["shared_state"].delete_one({"_id": store.key})
+
+def test_token_kept_when_store_write_fails():
+    import time
+    from unittest import mock
+    from pymongo.errors import PyMongoError
+    from routes import search_routes
+    store = mock.Mock()
+    store.read.return_value = (None, 0)
+    store.try_lease.return_value = True
+    store.write.side_effect = PyMongoError("store down")
+    fetched = ("fresh-token", time.time() + 3600)
+    saved = dict(search_routes._token_cache)
+    search_routes._token_cache.update(value=None, expires_at=0)
+    try:
+        with mock.patch.object(search_routes, "token_store", store), \
+             mock.patch.object(search_routes, "_fetch_twitch_token", return_value=fetched) as fetch:
+            assert search_routes._refresh_access_token() == "fresh-token"
+        assert fetch.call_count == 1 and store.release.called
+        print("✓ Token kept when the shared store write fails passed")
+    finally:
+        search_routes._token_cache.update(saved)
+
+def test_igdb_scheduler_batches():
+    import threading
+    from igdb_scheduler import IgdbScheduler
+    sent = []
+
+    def fake_post(path, body):
+        sent.append(path)
+        if path == "multiquery":
+            return [{"name": f"q{i}", "result": [i]} for i in range(body.count("query games"))]
+        return []
+
+    scheduler = IgdbScheduler(fake_post)
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(scheduler.query("games", f'search "g{i}";')))
+        for i in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 20
+    assert len(sent) < 20  # burst was packed into multiquery calls
+    print("✓ IGDB scheduler batching passed")
+
+def test_prefix_index():
+    from title_index import PrefixIndex
+    index = PrefixIndex()
+    index.add("The Legend of Zelda: Ocarina of Time", "Game", weight=5)
+    index.add("Zelda II", "Game", weight=1)
+    index.add("Zero Dark Thirty", "Movie", weight=9)
+    assert [s["title"] for s in index.suggest("zel")][0].startswith("The Legend")
+    assert index.suggest("ocar")[0]["type"] == "Game"
+    assert [s["title"] for s in index.suggest("ze", media_type="Movie")] == ["Zero Dark Thirty"]
+    assert index.stats()["memory_bytes"] > 0
+    small = PrefixIndex(max_titles=2)
+    small.add("Alpha", "Game", weight=1)
+    small.add("Beta", "Game", weight=1)
+    small.add("Alpha", "Game", weight=5)  # now Beta is the least popular
+    small.add("Gamma", "Game", weight=2)
+    assert [s["title"] for s in small.suggest("a")] == ["Alpha"] and not small.suggest("beta")
+    small.add("Delta", "Game", weight=1)  # less popular than everything kept
+    assert len(small) == 2 and not small.suggest("delta")
+    print("✓ Prefix index passed")
+
+def test_search_suggest():
+    r = client.get("/search/suggest?q=ha")
+    assert r.status_code == 200
+    assert isinstance(r.json, list)
+    assert client.get("/search/suggest?q=").json == []
+    print("✓ Search suggest passed")
+
+def test_fuzzy_did_you_mean():
+    from fuzzy_index import FuzzyIndex
+    index = FuzzyIndex()
+    index.add_many([
+        ("The Legend of Zelda: Ocarina of Time", "Game", 1),
+        ("Halo: Combat Evolved", "Game", 1),
+        ("Inception", "Movie", 1),
+    ])
+    assert index.correct("zelda ocarnia") == "zelda ocarina"
+    assert index.correct("halo") is None
+    assert index.titles_matching("zelda ocarina")[0]["title"].startswith("The Legend")
+    small = FuzzyIndex(max_titles=2)
+    small.add_many([("Ocarina", "Game", 5), ("Majora", "Game", 1), ("Twilight", "Game", 2)])
+    assert len(small) == 2 and small.correct("majorra") is None  # evicted with its words
+    assert small.correct("twilihgt") == "twilight"
+    print("✓ Fuzzy did-you-mean passed")
+
+def test_cover_proxy():
+    import tempfile
+    from unittest import mock
+    from cover_cache import CoverCache, CoverUnusable, cover_key
+    assert cover_key("https://images.igdb.com/igdb/image/upload/t_cover_big/co1abc.jpg") == "igdb-co1abc"
+    assert cover_key("https://placehold.co/200x280?text=No+Cover") is None
+
+    cache = CoverCache(tempfile.mkdtemp(), max_bytes=10)
+    fake = mock.Mock(status_code=200, content=b"0123456789", headers={"Content-Type": "image/png"})
+    with mock.patch("cover_cache.images.get", return_value=fake) as get:
+        path, etag, mimetype = cache.path_for("igdb-co1abc")
+        assert cache.path_for("igdb-co1abc")[1] == etag and mimetype == "image/png"
+        assert get.call_count == 1  # second read came from disk
+    with open(path, "rb") as f:
+        assert f.read() == b"0123456789"
+
+    error_page = mock.Mock(status_code=200, content=b"<html>", headers={"Content-Type": "text/html"})
+    with mock.patch("cover_cache.images.get", return_value=error_page):
+        try:
+            cache.path_for("igdb-co2bad")
+            assert False, "an HTML body must not be served as a cover"
+        except CoverUnusable:
+            pass
+    assert cache._digest_for("igdb-co2bad") == ("", "")  # nothing cached
+
+    r = client.get("/covers/evil-..")
+    assert r.status_code == 404
+    print("✓ Cover proxy passed")
+
+def test_media_top():
+    r = client.get("/media/top")
+    assert r.status_code in [200, 503]
+    if r.status_code == 200:
+        assert isinstance(r.json["items"], list)
+        r2 = client.get("/media/top", headers={"If-None-Match": r.headers["ETag"]})
+        assert r2.status_code == 304
+    assert client.get("/media/top?list=nope").status_code == 400
+    print("✓ Top titles passed")
+
+def test_leaderboards():
+    from leaderboards import rank
+    boards, _, _ = rank(["Game", "Game", "Game", "Movie"], ["2001", "2001", "1990", ""],
+                        [1, 200, 300, 50], [5, 920, 900, 150], prior_votes=10, depth=5)
+    assert boards["all:all"][0] == 1  # many 4.6s beat a single 5
+    assert boards["Game:2001"] == [1, 0] and "Movie:all" in boards
+    r = client.get("/leaderboards?type=movie&year=1999&limit=5")
+    assert r.status_code in [200, 503]
+    if r.status_code == 200:
+        assert r.json["type"] == "Movie" and len(r.json["items"]) <= 5
+    assert client.get("/leaderboards?type=book").status_code == 400
+    assert client.get("/leaderboards?year=99").status_code == 400
+    print("✓ Leaderboards passed")
+
+def test_similar_titles():
+    import os, tempfile
+    from similar_titles import SimilarIndex, build_index
+    cards = [
+        {"media_id": "game:1", "title": "Super Mario 64", "summary": "3D platforming in a castle",
+         "platforms": ["N64"], "year": "1996", "type": "Game"},
+        {"media_id": "game:2", "title": "Super Mario Sunshine", "summary": "3D platforming on an island",
+         "platforms": ["GameCube"], "year": "2002", "type": "Game"},
+        {"media_id": "movie:tt1", "title": "Heat", "summary": "Cops and robbers",
+         "platforms": ["Theaters"], "year": "1995", "type": "Movie"},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similar.bin")
+        build_index(lambda: iter(cards), path)
+        index = SimilarIndex(path)
+        assert index.similar("game:1", 2)[0][0] == "game:2"
+        assert index.similar("game:404") is None
+        del index
+    assert client.get("/media/game:404-missing/similar").status_code in [404, 503]
+    print("✓ Similar titles passed")
+
+def test_ingest_normalize():
+    from ingest_catalog import normalize_record
+    game = normalize_record({"id": "7", "name": "Halo", "first_release_date": "1005000000",
+                             "platforms": "Xbox|PC", "cover_image_id": "co9"})
+    assert game["id"] == 7 and game["type"] == "Game"
+    assert game["platforms"] == ["Xbox", "PC"] and game["year"] == "2001-11-05"
+    movie = normalize_record({"imdbID": "tt1", "Title": "Heat", "Year": "1995", "Poster": "N/A"})
+    assert movie["type"] == "Movie" and "placehold" in movie["coverUrl"]
+    assert normalize_record({"nonsense": True}) is None
+    print("✓ Catalog ingest normalize passed")
+
+def test_fake_upstream():
+    from fake_upstream import create_fake_app
+    fake = create_fake_app().test_client()
+    r = fake.post("/v4/multiquery", data='query games "q0" { search "halo"; limit 2; };')
+    assert r.json[0]["name"] == "q0" and len(r.json[0]["result"]) == 2
+    r = fake.get("/omdb/?s=matrix")
+    assert r.json["Response"] == "True"
+    assert all("Matrix" in m["Title"] for m in r.json["Search"])
+    assert create_fake_app(error_rate=1.0).test_client().post("/oauth2/token").status_code == 503
+    print("✓ Fake upstream passed")
+
+def test_migrate_ids_fixers():
+    from migrate_ids import fix_comment, fix_library, fix_rating
+    uid = ObjectId()
+    assert fix_rating({"user_id": str(uid), "media_id": 7}) == {
+        "user_id": (str(uid), uid), "media_id": (7, "7")}
+    assert fix_rating({"user_id": uid, "media_id": "7"}) == {}
+    library = [{"id": 123, "title": "A"}, {"id": "123", "title": "A"}, {"id": "tt1", "title": "B"}]
+    assert fix_library({"profile": {"library": library}})["profile.library"][1] == [
+        {"id": "123", "title": "A"}, {"id": "tt1", "title": "B"}]
+    assert fix_comment({"user_id": None, "thread_id": str(uid)}) == {"thread_id": (str(uid), uid)}
+    print("✓ Id migration fixers passed")
+
 # ==================== ERROR HANDLING ====================
 def test_invalid_route():
     r = client.get("/nonexistent/route")
@@ -446,6 +918,8 @@ def run_all_tests():
     test_library_add_missing_type(user_id); test_count += 1
     test_library_add_duplicate(user_id); test_count += 1
     test_library_get(user_id); test_count += 1
+    test_library_pages(user_id); test_count += 1
+    test_profile_overview(user_id); test_count += 1
     test_library_get_empty(); test_count += 1
     test_library_get_invalid_user(); test_count += 1
     test_library_delete(user_id); test_count += 1
@@ -459,12 +933,20 @@ def run_all_tests():
     test_ratings_submit_missing_user_id(); test_count += 1
     test_ratings_submit_missing_media_id(user_id); test_count += 1
     test_ratings_submit_missing_stars(user_id); test_count += 1
+    test_ratings_submit_invalid_stars(user_id); test_count += 1
     test_ratings_get("999"); test_count += 1
+    test_ratings_get_paged("999"); test_count += 1
     test_ratings_get_no_ratings(); test_count += 1
     test_ratings_update(rating_id); test_count += 1
     test_ratings_update_invalid(); test_count += 1
     test_ratings_update_missing_stars(rating_id); test_count += 1
+    test_ratings_summary("999"); test_count += 1
+    test_ratings_lookup(user_id, "999"); test_count += 1
+    test_ratings_upsert_by_user(user_id); test_count += 1
+    test_ratings_import_export(user_id); test_count += 1
+    test_recommendations(user_id); test_count += 1
     test_ratings_delete(rating_id); test_count += 1
+    test_ratings_delete_legacy_stars(); test_count += 1
     test_ratings_delete_invalid(); test_count += 1
     test_get_user_ratings(user_id); test_count += 1
     
@@ -477,6 +959,28 @@ def run_all_tests():
     test_movies(); test_count += 1
     test_movies_empty(); test_count += 1
     test_movies_no_param(); test_count += 1
+    test_search_all(); test_count += 1
+    test_search_all_empty(); test_count += 1
+    test_search_cache_stats(); test_count += 1
+    test_search_local_catalog(); test_count += 1
+    test_search_local_catalog_deep_page(); test_count += 1
+    test_single_flight_shares_calls(); test_count += 1
+    test_circuit_breaker_opens(); test_count += 1
+    test_search_filters_parse(); test_count += 1
+    test_search_all_type_filter(); test_count += 1
+    test_shared_token_lease(); test_count += 1
+    test_token_kept_when_store_write_fails(); test_count += 1
+    test_igdb_scheduler_batches(); test_count += 1
+    test_prefix_index(); test_count += 1
+    test_search_suggest(); test_count += 1
+    test_fuzzy_did_you_mean(); test_count += 1
+    test_cover_proxy(); test_count += 1
+    test_media_top(); test_count += 1
+    test_leaderboards(); test_count += 1
+    test_similar_titles(); test_count += 1
+    test_ingest_normalize(); test_count += 1
+    test_fake_upstream(); test_count += 1
+    test_migrate_ids_fixers(); test_count += 1
     
     # Error handling tests
     print("\n--- Error Handling Tests ---")
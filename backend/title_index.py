@@ -0,0 +1,174 @@
+# backend/title_index.py
+#
+# In-memory prefix index of titles we already know (ratings, libraries,
+# cached search results) for the /search/suggest typeahead.
+#
+# Layout: one sorted list of (key, title_id) pairs, searched with bisect.
+# Every title is indexed under its full name and under each later word
+# ("legend of zelda" and "zelda"), so typing "zel" finds it too.
+
+import re
+import sys
+import threading
+from bisect import bisect_left, insort
+from heapq import heappop, heappush, heapreplace
+
+# Words that are not worth starting a suggestion from
+SKIP_WORDS = {"the", "a", "an", "of", "and", "in", "on", "to", "for"}
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(re.findall(r"\w+", (title or "").lower()))
+
+
+def index_keys(normalized: str):
+    """The full title plus every suffix that starts at a meaningful word."""
+    words = normalized.split()
+    keys = {normalized}
+    for i in range(1, len(words)):
+        if words[i] not in SKIP_WORDS:
+            keys.add(" ".join(words[i:]))
+    return keys
+
+
+class PrefixIndex:
+    """
+    add() is incremental and thread-safe; suggest() is a bisect plus a short
+    scan, well under a millisecond for typical prefixes. One- and two-letter
+    prefixes match too much to scan every time, so their answers are cached
+    until a new title arrives. When more than max_titles are stored, the
+    least popular titles are evicted.
+    """
+
+    def __init__(self, max_titles=200_000, scan_limit=2_000):
+        self.max_titles = max_titles
+        self.scan_limit = scan_limit
+        self._keys = []  # sorted [(key, title_id)]
+        self._titles = {}  # title_id -> {"title", "type", "weight"}
+        # (weight, title_id), least popular first, one per title; a weight
+        # here can be older (lower) than the title's and is refreshed on pop
+        self._by_weight = []
+        self._short_answers = {}  # (prefix, limit, type) -> suggestions
+        self._bytes = 0  # running size of the pairs and entries, see memory_bytes
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def add(self, title, media_type="", weight=1):
+        """Add a title, or bump its popularity if we already have it."""
+        with self._lock:
+            for key in self._add_title(title, media_type, weight):
+                insort(self._keys, key)
+
+    def add_many(self, rows):
+        """Bulk add (title, type, weight) rows with a single sort at the end."""
+        with self._lock:
+            new_keys = []
+            for title, media_type, weight in rows:
+                new_keys.extend(self._add_title(title, media_type, weight))
+            if new_keys:
+                self._keys.extend(new_keys)
+                self._keys.sort()
+
+    def _add_title(self, title, media_type, weight):
+        """Record the title; returns the (key, title_id) pairs still to index."""
+        normalized = normalize_title(title)
+        if not normalized:
+            return []
+        title_id = f"{(media_type or '').lower()}:{normalized}"
+
+        entry = self._titles.get(title_id)
+        if entry is not None:
+            entry["weight"] += weight
+            return []
+
+        if len(self._titles) >= self.max_titles:
+            if not self._evict_below(weight):
+                return []  # everything stored is more popular than this one
+
+        entry = {"title": title, "type": media_type, "weight": weight}
+        self._titles[title_id] = entry
+        heappush(self._by_weight, (weight, title_id))
+        self._short_answers.clear()
+        pairs = [(key, title_id) for key in index_keys(normalized)]
+        self._bytes += _entry_bytes(title_id, entry) + sum(_pair_bytes(p) for p in pairs)
+        return pairs
+
+    def suggest(self, prefix, limit=8, media_type=None):
+        """Most popular titles with a word starting with `prefix`."""
+        prefix = normalize_title(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            cache_key = (prefix, limit, media_type)
+            if cache_key in self._short_answers:
+                return [dict(e) for e in self._short_answers[cache_key]]
+
+            seen = {}
+            i = bisect_left(self._keys, (prefix,))
+            end = min(len(self._keys), i + self.scan_limit)
+            while i < end and self._keys[i][0].startswith(prefix):
+                title_id = self._keys[i][1]
+                entry = self._titles[title_id]
+                if media_type is None or entry["type"] == media_type:
+                    seen[title_id] = entry
+                i += 1
+
+            ranked = [
+                dict(e)
+                for e in sorted(seen.values(), key=lambda e: (-e["weight"], len(e["title"])))[:limit]
+            ]
+            if len(prefix) <= 2:
+                self._short_answers[cache_key] = ranked
+            return [dict(e) for e in ranked]
+
+    def _evict_below(self, weight) -> bool:
+        """Drop the least popular title if it is less popular than `weight`."""
+        while True:
+            heap_weight, victim_id = self._by_weight[0]
+            victim = self._titles[victim_id]
+            if victim["weight"] == heap_weight:
+                break
+            heapreplace(self._by_weight, (victim["weight"], victim_id))  # bumped since
+        if victim["weight"] >= weight:
+            return False
+        heappop(self._by_weight)
+        del self._titles[victim_id]
+        self._short_answers.clear()
+        self._bytes -= _entry_bytes(victim_id, victim)
+        for key in index_keys(victim_id.split(":", 1)[1]):
+            pos = bisect_left(self._keys, (key, victim_id))
+            if pos < len(self._keys) and self._keys[pos] == (key, victim_id):
+                self._bytes -= _pair_bytes(self._keys.pop(pos))
+        return True
+
+    def memory_bytes(self) -> int:
+        """
+        Rough size of the index (lists, tuples, strings and entry dicts).
+        Kept up to date by add and evict, so reading it doesn't walk the keys.
+        """
+        with self._lock:
+            return sys.getsizeof(self._keys) + sys.getsizeof(self._titles) + self._bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "titles": len(self._titles),
+                "keys": len(self._keys),
+                "memory_bytes": self.memory_bytes(),
+                "max_titles": self.max_titles,
+            }
+
+
+def _pair_bytes(pair):
+    return sys.getsizeof(pair) + sys.getsizeof(pair[0])
+
+
+def _entry_bytes(title_id, entry):
+    return sys.getsizeof(title_id) + sys.getsizeof(entry) + sys.getsizeof(entry["title"])
+
+
+# The one index each worker keeps (filled by known_titles)
+suggest_index = PrefixIndex()
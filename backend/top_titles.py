@@ -0,0 +1,131 @@
+# backend/top_titles.py
+#
+# Precomputed homepage lists ("top movies", "top rated") so a visitor costs
+# one cheap request instead of a burst of OMDb calls.
+#
+# Each list is one document in "top_titles":
+#     {_id: name, items, built_at, lease_owner, lease_until}
+# Every worker keeps the payload in memory. A background thread rebuilds
+# stale lists on a schedule; only the worker holding a list's lease calls
+# the builder, the rest pick the result up from Mongo.
+
+import threading
+import time
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from shared_state import WORKER_ID
+from single_flight import SingleFlight
+
+
+class TopTitles:
+    def __init__(self, collection, builders, refresh_every=6 * 3600):
+        self.collection = collection
+        self.builders = builders  # name -> function returning a list of cards
+        self.refresh_every = refresh_every
+        self._memory = {}  # name -> {"items", "built_at"}
+        self._builds = SingleFlight()
+        self._scheduler_started = threading.Event()
+
+    def get(self, name):
+        """{"items", "built_at"} for a list: memory, then Mongo, then a build."""
+        self.start_scheduler()
+        entry = self._memory.get(name)
+        if entry is not None:
+            return entry
+        try:
+            entry = self._load(name)
+        except PyMongoError:
+            entry = None
+        if entry is None:
+            entry = self._builds.do(name, self.refresh, name)
+        return entry
+
+    def refresh(self, name):
+        """Rebuild one list if we can take its lease, then reload it."""
+        leased = self._try_lease(name)
+        if leased:
+            try:
+                items = self.builders[name]()
+                self.collection.update_one(
+                    {"_id": name},
+                    {"$set": {"items": items, "built_at": datetime.utcnow()}},
+                    upsert=True,
+                )
+            finally:
+                self._release(name)
+        entry = self._load(name)
+        if entry is None and not leased:
+            # first build anywhere and someone else is doing it: wait briefly
+            for _ in range(50):
+                time.sleep(0.2)
+                entry = self._load(name)
+                if entry is not None:
+                    break
+        if entry is None:
+            raise RuntimeError(f"top list {name!r} is not built yet")
+        return entry
+
+    def _load(self, name):
+        doc = self.collection.find_one({"_id": name}, {"items": 1, "built_at": 1})
+        if not doc or "items" not in doc:
+            return None
+        entry = {"items": doc["items"], "built_at": doc["built_at"]}
+        self._memory[name] = entry
+        return entry
+
+    def _is_stale(self, entry):
+        age = (datetime.utcnow() - entry["built_at"]).total_seconds()
+        return age > self.refresh_every
+
+    # ---------------- schedule ---------------- #
+
+    def start_scheduler(self):
+        """Refresh every list in a background thread, once per worker."""
+        if self._scheduler_started.is_set():
+            return
+        self._scheduler_started.set()
+        threading.Thread(target=self._run, name="top-titles", daemon=True).start()
+
+    def _run(self):
+        # check often enough that a list is never much older than refresh_every
+        interval = max(60, self.refresh_every // 10)
+        while True:
+            for name in self.builders:
+                try:
+                    entry = self._load(name)
+                    if entry is None or self._is_stale(entry):
+                        self._builds.do(name, self.refresh, name)
+                except Exception:
+                    pass  # keep serving the last good payload; retry next round
+            time.sleep(interval)
+
+    # ---------------- lease ---------------- #
+
+    def _try_lease(self, name, seconds=120) -> bool:
+        now = time.time()
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "_id": name,
+                    "$or": [
+                        {"lease_until": {"$exists": False}},
+                        {"lease_until": {"$lt": now}},
+                        {"lease_owner": WORKER_ID},
+                    ],
+                },
+                {"$set": {"lease_owner": WORKER_ID, "lease_until": now + seconds}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        return doc is not None and doc.get("lease_owner") == WORKER_ID
+
+    def _release(self, name):
+        self.collection.update_one(
+            {"_id": name, "lease_owner": WORKER_ID},
+            {"$unset": {"lease_owner": "", "lease_until": ""}},
+        )
@@ -0,0 +1,159 @@
+# backend/upstream.py
+#
+# One place for every outbound HTTP call (Twitch, IGDB, OMDb, Firebase).
+# Each provider gets its own keep-alive session and connection pool, retries
+# idempotent calls with jittered backoff, and a circuit breaker that fails
+# fast while the provider is down instead of tying up a worker per timeout.
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds. Connecting should be quick; reads can take longer.
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Statuses worth retrying: rate limited or a temporary server-side problem
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without calling upstream while a provider's breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls go through; consecutive failures are counted
+    open      -> calls fail straight away for reset_timeout seconds
+    half-open -> one trial call; success closes it, failure opens it again
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class UpstreamClient:
+    """A pooled, retrying, circuit-broken HTTP client for one provider."""
+
+    def __init__(self, name, pool_size=10, retries=2, backoff=0.25,
+                 timeout=DEFAULT_TIMEOUT, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        # keep-alive connections are reused across requests and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        """
+        Send a request. Idempotent calls (GET by default, or idempotent=True)
+        are retried on connection errors, timeouts and 429/5xx responses.
+        The response is returned as-is; callers still call raise_for_status().
+        """
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD")
+        attempts = 1 + (self.retries if idempotent else 0)
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+            last_try = attempt == attempts - 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.breaker.record_failure()
+                if last_try:
+                    raise
+                self._sleep(attempt)
+                continue
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                # 4xx means upstream is healthy and simply said no
+                self.breaker.record_success()
+
+            if response.status_code in RETRY_STATUSES and not last_try:
+                self._sleep(attempt, response.headers.get("Retry-After"))
+                continue
+            return response
+
+    def _sleep(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, honouring Retry-After if sent."""
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+        time.sleep(min(delay, 5))
+
+    def status(self):
+        return {"state": self.breaker.state, "failures": self.breaker.failures}
+
+
+# One client per provider so a slow one can't starve the others' pools
+twitch = UpstreamClient("twitch", pool_size=4)
+igdb = UpstreamClient("igdb", pool_size=16)
+omdb = UpstreamClient("omdb", pool_size=16)
+firebase = UpstreamClient("firebase", pool_size=8, retries=0)
+images = UpstreamClient("images", pool_size=16)  # cover art for /covers
+
+CLIENTS = {c.name: c for c in (twitch, igdb, omdb, firebase, images)}
+
+
+def upstream_status():
+    """Breaker state for every provider, e.g. for a stats endpoint."""
+    return {name: client.status() for name, client in CLIENTS.items()}
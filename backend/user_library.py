@@ -0,0 +1,262 @@
+# backend/user_library.py
+#
+# Users' libraries (watchlists), one document per entry in "library":
+#     {_id, user_id, media_id, title, type, year, coverUrl, added_at}
+# with a unique (user_id, media_id) index, instead of an array inside the
+# user document that grew with every add and came back with every profile
+# read. Adding is one idempotent upsert; lists are keyset pages (see
+# rating_pages.py) in any of SORTS, each backed by an index.
+#
+# Older users still carry profile.library. Until the batched move has run
+# over everyone (python user_library.py --migrate), each library call
+# first moves that user's array over, so the endpoints behave the same
+# throughout. Progress of the move lives in "migrations":
+#     {_id: "library_collection", last_id, users, items, skipped, done,
+#      docs_per_second, updated_at}
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from ids import media_key
+
+MIGRATION_ID = "library_collection"
+ITEM_FIELDS = ("title", "type", "year", "coverUrl")
+SORTS = {
+    "newest": [("added_at", DESCENDING), ("_id", DESCENDING)],
+    "oldest": [("added_at", ASCENDING), ("_id", ASCENDING)],
+    "title": [("title", ASCENDING), ("_id", ASCENDING)],
+    "type": [("type", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)],
+}
+DUPLICATE_KEY = 11000
+MIGRATED_CHECK = 60  # seconds between looks at whether the move has finished
+
+
+def shape_item(doc):
+    """A library entry in the shape the embedded array had, plus when it was added."""
+    return {
+        "id": doc.get("media_id", ""),
+        **{f: doc.get(f, "") for f in ITEM_FIELDS},
+        "added_at": doc.get("added_at"),
+    }
+
+
+class Library:
+    def __init__(self, collection, users, state, migrated_check=MIGRATED_CHECK):
+        self.collection = collection
+        self.users = users
+        self.state = state  # "migrations"
+        self.migrated_check = migrated_check
+        self._migrated = False
+        self._checked = 0.0
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.collection.create_index(
+            [("user_id", ASCENDING), ("media_id", ASCENDING)],
+            unique=True, name="user_media_unique",
+        )
+        for name, keys in SORTS.items():
+            if name != "oldest":  # "newest" read backwards
+                self.collection.create_index(
+                    [("user_id", ASCENDING)] + keys, name=f"user_id_{name}"
+                )
+        self._indexes_ready = True
+
+    # ---------------- entries ---------------- #
+
+    def add(self, user_id, item):
+        """Add one entry; True if it is new, False if the user already had it."""
+        self.ensure_indexes()
+        self.move_embedded(user_id)
+        try:
+            result = self.collection.update_one(
+                {"user_id": user_id, "media_id": media_key(item["id"])},
+                {"$setOnInsert": {
+                    **{f: item.get(f, "") for f in ITEM_FIELDS},
+                    "added_at": datetime.utcnow(),
+                }},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # a concurrent add of the same title won
+        return result.upserted_id is not None
+
+    def remove(self, user_id, media_id):
+        self.move_embedded(user_id)
+        result = self.collection.delete_one({"user_id": user_id, "media_id": media_key(media_id)})
+        return result.deleted_count > 0
+
+    def criteria(self, user_id):
+        """Filter for one user's entries, after moving any embedded ones over."""
+        self.ensure_indexes()
+        self.move_embedded(user_id)
+        return {"user_id": user_id}
+
+    def count(self, user_id):
+        return self.collection.count_documents(self.criteria(user_id))
+
+    def newest(self, user_id, limit):
+        return [
+            shape_item(d) for d in
+            self.collection.find(self.criteria(user_id)).sort(SORTS["newest"]).limit(limit)
+        ]
+
+    def media_ids(self, user_id, limit):
+        """Ids of the user's most recently added entries."""
+        cursor = (
+            self.collection.find(self.criteria(user_id), {"media_id": 1, "_id": 0})
+            .sort(SORTS["newest"]).limit(limit)
+        )
+        return [d["media_id"] for d in cursor]
+
+    # ---------------- the embedded array ---------------- #
+
+    def migrated(self):
+        """True once every user's embedded library has been moved."""
+        now = time.monotonic()
+        if not self._migrated and now - self._checked >= self.migrated_check:
+            self._checked = now
+            state = self.state.find_one({"_id": MIGRATION_ID}, {"done": 1}) or {}
+            self._migrated = bool(state.get("done"))
+        return self._migrated
+
+    def move_embedded(self, user_id):
+        """Compatibility: move this user's profile.library over, if it still has one."""
+        if self.migrated():
+            return
+        doc = self.users.find_one(
+            {"_id": user_id, "profile.library": {"$exists": True}}, {"profile.library": 1}
+        )
+        if doc is not None:
+            self.move_users([doc])
+
+    def move_users(self, docs):
+        """
+        Upsert the embedded entries of these user documents (two bulk writes
+        for the lot) and drop each array, unless it changed meanwhile.
+        Returns (entries, entries skipped for having no id).
+        """
+        self.ensure_indexes()
+        moved_at = datetime.utcnow()
+        inserts, unsets, skipped = [], [], 0
+        for doc in docs:
+            items = (doc.get("profile") or {}).get("library")
+            if not isinstance(items, list):
+                items = []
+            for i, item in enumerate(items):
+                if not isinstance(item, dict) or item.get("id") in (None, ""):
+                    skipped += 1
+                    continue
+                inserts.append(UpdateOne(
+                    {"user_id": doc["_id"], "media_id": media_key(item["id"])},
+                    {"$setOnInsert": {
+                        **{f: item.get(f, "") for f in ITEM_FIELDS},
+                        # keeps the array's order: first in, oldest
+                        "added_at": moved_at - timedelta(milliseconds=len(items) - i),
+                    }},
+                    upsert=True,
+                ))
+            unsets.append(UpdateOne(
+                {"_id": doc["_id"], "profile.library": (doc.get("profile") or {}).get("library")},
+                {"$unset": {"profile.library": ""}},
+            ))
+        if inserts:
+            try:
+                self.collection.bulk_write(inserts, ordered=False)
+            except BulkWriteError as e:
+                # only concurrent upserts of the same entry are expected here
+                if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                    raise
+        if unsets:
+            self.users.bulk_write(unsets, ordered=False)
+        return len(inserts), skipped
+
+    def migrate(self, batch_size=500, pause=0.0, restart=False, report_every=5.0, out=sys.stdout):
+        """Move every user's embedded library, a batch of users at a time. Resumable."""
+        if restart:
+            self.state.delete_one({"_id": MIGRATION_ID})
+        progress = {
+            "last_id": None, "users": 0, "items": 0, "skipped": 0,
+            **(self.state.find_one({"_id": MIGRATION_ID}) or {}), "done": False,
+        }
+        progress.pop("_id", None)
+        total = self.users.count_documents({"profile.library": {"$exists": True}})
+        started, users_before, last_report = time.monotonic(), progress["users"], time.monotonic()
+        while True:
+            criteria = {"profile.library": {"$exists": True}}
+            if progress["last_id"] is not None:
+                criteria["_id"] = {"$gt": progress["last_id"]}
+            docs = list(
+                self.users.find(criteria, {"profile.library": 1})
+                .sort("_id", ASCENDING).limit(batch_size)
+            )
+            if not docs:
+                break
+            items, skipped = self.move_users(docs)
+            progress["last_id"] = docs[-1]["_id"]
+            progress["users"] += len(docs)
+            progress["items"] += items
+            progress["skipped"] += skipped
+            elapsed = max(time.monotonic() - started, 1e-6)
+            progress["docs_per_second"] = round((progress["users"] - users_before) / elapsed)
+            self._save(progress)
+            if time.monotonic() - last_report >= report_every:
+                last_report = time.monotonic()
+                self._report(progress, total, progress["users"] - users_before, out)
+            if pause:
+                time.sleep(pause)
+
+        progress["done"] = True
+        self._save(progress)
+        self._report(progress, total, progress["users"] - users_before, out)
+        return progress
+
+    def _save(self, progress):
+        self.state.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {**progress, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def _report(self, progress, total, done_this_run, out):
+        rate = progress.get("docs_per_second") or 0
+        left = max(total - done_this_run, 0)
+        eta = "done" if progress["done"] else f"~{left / rate:,.0f}s left" if rate else "?"
+        print(
+            f"library: {progress['users']:,} users moved, {progress['items']:,} entries, "
+            f"{progress['skipped']:,} skipped, {rate:,} users/s ({eta})",
+            file=out, flush=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move embedded libraries into the library collection.")
+    parser.add_argument("--migrate", action="store_true", help="run (or resume) the move")
+    parser.add_argument("--batch", type=int, default=500, help="users per batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--restart", action="store_true",
+                        help="start over, e.g. to pick up arrays old workers wrote after a run")
+    args = parser.parse_args()
+
+    from config import db  # only needed when run for real
+
+    library = Library(db["library"], db["users"], db["migrations"])
+    if args.migrate:
+        library.migrate(args.batch, args.pause, args.restart)
+    else:
+        state = db["migrations"].find_one({"_id": MIGRATION_ID}) or {}
+        print(
+            f"library: {'done' if state.get('done') else 'not finished'}, "
+            f"{state.get('users', 0):,} users, {state.get('items', 0):,} entries moved"
+        )
+
+
+if __name__ == "__main__":
+    main()
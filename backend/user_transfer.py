@@ -0,0 +1,397 @@
+# backend/user_transfer.py
+#
+# Bulk import / export of one user's ratings and library, as NDJSON or CSV.
+#
+# An upload is spooled to a temp file as it arrives, then a background
+# thread reads it one row at a time and writes batches of unordered
+# bulk_write upserts: 10k rows cost a few dozen round trips instead of the
+# 20k+ that one POST per row needs. Each job is one document in
+# "import_jobs", so any worker can answer a progress poll:
+#     {_id, kind, user_id, format, status, rows, written, failed,
+#      errors: [{row, error}], created_at, started_at, finished_at}
+#
+# Exports stream from a cursor in the same columns the import reads, so an
+# export can be imported back as is.
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ids import media_key
+from ingest_catalog import read_records
+from known_titles import remember_title
+from media_stats import valid_stars
+
+RATING_COLUMNS = (
+    "media_id", "title", "type", "year", "cover_url", "stars", "review_text", "date_created",
+)
+LIBRARY_COLUMNS = ("id", "title", "type", "year", "coverUrl")
+FORMATS = {"ndjson": ".jsonl", "csv": ".csv"}
+MAX_ERRORS_KEPT = 100  # per job; "failed" still counts every bad row
+CHUNK_BYTES = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+# ---------------- uploads ---------------- #
+
+def upload_format(requested, filename="", content_type=""):
+    """"ndjson" or "csv" from ?format=, then the file name, then the content type."""
+    if requested in FORMATS:
+        return requested
+    if (filename or "").lower().endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    return "ndjson"
+
+
+def spool_upload(stream, fmt, max_bytes):
+    """Copy an upload to a temp file chunk by chunk; returns its path."""
+    fd, path = tempfile.mkstemp(prefix="import-", suffix=FORMATS[fmt])
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"upload is larger than {max_bytes:,} bytes")
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def clean_row(raw):
+    """Header names without spaces or the BOM spreadsheet exports start with."""
+    if not isinstance(raw, dict):
+        return None
+    return {(k or "").strip().lstrip("\ufeff"): v for k, v in raw.items()}
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _parse_date(value):
+    """An ISO timestamp as naive UTC, like everything datetime.utcnow() stores."""
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    return None
+
+
+# ---------------- importers ---------------- #
+
+class RatingImporter:
+    """Upserts one user's ratings on (user_id, media_id) and keeps media_stats in step."""
+
+    kind = "ratings"
+
+    def __init__(self, db, stats, user_id):
+        self.ratings = db["ratings"]
+        self.stats = stats
+        self.user_id = user_id
+
+    def parse(self, raw):
+        """(rating fields, None) or (None, error code)."""
+        row = clean_row(raw)
+        if row is None:
+            return None, "unparseable_row"
+        media_id = _text(row.get("media_id"))
+        if not media_id:
+            return None, "missing_media_id"
+        stars = valid_stars(row.get("stars"))
+        if stars is None:
+            return None, "invalid_stars"
+        return {
+            "media_id": media_id,
+            "stars": stars,
+            "review_text": _text(row.get("review_text")),
+            "card": {f: _text(row.get(f)) for f in ("title", "cover_url", "type", "year")},
+            "date_created": _parse_date(row.get("date_created")),
+        }, None
+
+    def write(self, rows):
+        """Upsert a batch; returns (rows written, row numbers that failed)."""
+        now = datetime.utcnow()
+        rows = list({r["media_id"]: r for r in rows}.values())  # last row per media wins
+        media_ids = [r["media_id"] for r in rows]
+        # stars as they are before this batch, to move the stats (one $in query)
+        before = {
+            d["media_id"]: valid_stars(d.get("stars"))
+            for d in self.ratings.find(
+                {"user_id": self.user_id, "media_id": {"$in": media_ids}},
+                {"media_id": 1, "stars": 1},
+            )
+        }
+
+        ops = []
+        for r in rows:
+            card = {f: v for f, v in r["card"].items() if v}
+            ops.append(UpdateOne(
+                {"user_id": self.user_id, "media_id": r["media_id"]},
+                {
+                    "$set": {
+                        "stars": r["stars"],
+                        "review_text": r["review_text"],
+                        "date_updated": now,
+                        **card,
+                    },
+                    "$setOnInsert": {
+                        "date_created": r["date_created"] or now,
+                        **{f: "" for f in r["card"] if f not in card},
+                    },
+                },
+                upsert=True,
+            ))
+        failed = _failed_ops(self.ratings, ops)
+        done = [r for i, r in enumerate(rows) if i not in failed]
+
+        self.stats.apply_many(
+            [(r["media_id"], before.get(r["media_id"]), r["stars"], r["card"]) for r in done],
+            now,
+        )
+        for r in done:
+            if r["media_id"] not in before:
+                remember_title(r["card"]["title"], r["card"]["type"], weight=3)
+        return len(done), [rows[i]["row"] for i in sorted(failed)]
+
+
+class LibraryImporter:
+    """Upserts one user's library entries on (user_id, media_id)."""
+
+    kind = "library"
+
+    def __init__(self, library, user_id):
+        self.library = library  # user_library.Library
+        self.user_id = user_id
+        library.criteria(user_id)  # indexes, and any embedded entries moved first
+
+    def parse(self, raw):
+        row = clean_row(raw)
+        if row is None:
+            return None, "unparseable_row"
+        if not all(_text(row.get(f)) for f in ("id", "title", "type")):
+            return None, "missing_fields"
+        return {
+            "id": media_key(row["id"]),
+            "title": _text(row.get("title")),
+            "type": _text(row.get("type")),
+            "year": _text(row.get("year")),
+            "coverUrl": _text(row.get("coverUrl")),
+        }, None
+
+    def write(self, rows):
+        """Add / refresh a batch; returns (rows written, row numbers that failed)."""
+        now = datetime.utcnow()
+        rows = list({r["id"]: r for r in rows}.values())
+        ops = [
+            UpdateOne(
+                {"user_id": self.user_id, "media_id": r["id"]},
+                {
+                    "$set": {f: r[f] for f in LIBRARY_COLUMNS if f != "id"},
+                    "$setOnInsert": {"added_at": now},
+                },
+                upsert=True,
+            )
+            for r in rows
+        ]
+        failed, upserted = _run_ops(self.library.collection, ops)
+        for i in upserted:
+            remember_title(rows[i]["title"], rows[i]["type"], weight=2)
+        return len(rows) - len(failed), [rows[i]["row"] for i in sorted(failed)]
+
+
+def _failed_ops(collection, ops):
+    """Run an unordered bulk_write; returns the indexes of the ops that failed."""
+    return _run_ops(collection, ops)[0]
+
+
+def _run_ops(collection, ops):
+    """Unordered bulk_write; (indexes of ops that failed, indexes that inserted)."""
+    if not ops:
+        return set(), set()
+    try:
+        return set(), set(collection.bulk_write(ops, ordered=False).upserted_ids)
+    except BulkWriteError as e:
+        details = e.details or {}
+        return (
+            {err["index"] for err in details.get("writeErrors", [])},
+            {u["index"] for u in details.get("upserted", [])},
+        )
+
+
+def run_import(path, importer, batch_size=1000, on_progress=None):
+    """
+    Parse `path` row by row and write it in batches. After every batch
+    on_progress(counts, new errors) is called. Returns the final counts.
+    """
+    counts = {"rows": 0, "written": 0, "failed": 0}
+    batch, errors = [], []
+
+    def flush():
+        if batch:
+            written, failed_rows = importer.write(batch)
+            counts["written"] += written
+            counts["failed"] += len(failed_rows)
+            errors.extend({"row": n, "error": "write_failed"} for n in failed_rows)
+        if on_progress:
+            on_progress(counts, errors)
+        batch.clear()
+        errors.clear()
+
+    for n, raw in enumerate(read_records(path), start=1):
+        counts["rows"] += 1
+        fields, error = importer.parse(raw)
+        if error:
+            counts["failed"] += 1
+            errors.append({"row": n, "error": error})
+            continue
+        fields["row"] = n
+        batch.append(fields)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return counts
+
+
+# ---------------- jobs ---------------- #
+
+class ImportJobs:
+    """Background import runner with its progress kept in Mongo."""
+
+    def __init__(self, collection, batch_size=1000, workers=2):
+        self.collection = collection
+        self.batch_size = batch_size
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self, importer, user_id, fmt, path):
+        """Record a queued job for the spooled upload at `path` and start it."""
+        job_id = ObjectId()
+        self.collection.insert_one({
+            "_id": job_id,
+            "kind": importer.kind,
+            "user_id": str(user_id),
+            "format": fmt,
+            "status": "queued",
+            "rows": 0,
+            "written": 0,
+            "failed": 0,
+            "errors": [],
+            "created_at": datetime.utcnow(),
+        })
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._workers, thread_name_prefix="import")
+        self._pool.submit(self._run, job_id, importer, path)
+        return job_id
+
+    def get(self, job_id):
+        if not ObjectId.is_valid(job_id):
+            return None
+        return self.collection.find_one({"_id": ObjectId(job_id)})
+
+    def _run(self, job_id, importer, path):
+        self._set(job_id, {"status": "running", "started_at": datetime.utcnow()})
+
+        def progress(counts, errors):
+            update = {"$set": dict(counts)}
+            if errors:
+                update["$push"] = {"errors": {"$each": list(errors), "$slice": MAX_ERRORS_KEPT}}
+            self.collection.update_one({"_id": job_id}, update)
+
+        try:
+            counts = run_import(path, importer, self.batch_size, progress)
+            self._set(job_id, {**counts, "status": "done", "finished_at": datetime.utcnow()})
+        except Exception as e:  # whatever it was, the job must not look "running" forever
+            self._set(job_id, {
+                "status": "failed",
+                "detail": f"{type(e).__name__}: {e}",
+                "finished_at": datetime.utcnow(),
+            })
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _set(self, job_id, fields):
+        self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+
+def shape_job(doc):
+    return {
+        "job_id": str(doc["_id"]),
+        "kind": doc.get("kind"),
+        "user_id": doc.get("user_id"),
+        "format": doc.get("format"),
+        "status": doc.get("status"),
+        "rows": doc.get("rows", 0),
+        "written": doc.get("written", 0),
+        "failed": doc.get("failed", 0),
+        "errors": doc.get("errors", []),
+        "detail": doc.get("detail"),
+        "created_at": doc.get("created_at"),
+        "started_at": doc.get("started_at"),
+        "finished_at": doc.get("finished_at"),
+    }
+
+
+# ---------------- export ---------------- #
+
+def export_rating(doc):
+    created = doc.get("date_created")
+    return {
+        "media_id": str(doc.get("media_id", "")),
+        "title": doc.get("title", ""),
+        "type": doc.get("type", ""),
+        "year": doc.get("year", ""),
+        "cover_url": doc.get("cover_url", ""),
+        "stars": doc.get("stars"),
+        "review_text": doc.get("review_text", ""),
+        "date_created": created.isoformat() if isinstance(created, datetime) else created,
+    }
+
+
+def export_library_item(item):
+    return {f: item.get(f, "") for f in LIBRARY_COLUMNS}
+
+
+def export_lines(rows, fmt, columns):
+    """Yield NDJSON or CSV text for `rows` in chunks of about 64 KB."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore") if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            buf.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
@@ -1,6 +1,8 @@
-import requests
 import os
 
+from backend.media_catalog import MediaCatalog, canonical_media_id, shape_game
+from backend.upstream import igdb
+
 class MediaItem:
     def __init__(self, db):
         self.db = db
@@ -12,19 +14,13 @@ class MediaItem:
             "Client-ID": self.client_id,
             "Authorization": f"Bearer {self.token}"
         }
-        query = f'search "{title}"; fields name, first_release_date, genres.name, platforms.name; limit 1;'
-        res = requests.post("https://api.igdb.com/v4/games", headers=headers, data=query)
+        query = f'search "{title}"; fields id, name, first_release_date, platforms.name, summary, cover.image_id; limit 1;'
+        res = igdb.post("https://api.igdb.com/v4/games", headers=headers, data=query, idempotent=True)
 
-        if res.status_code != 200:
+        if res.status_code != 200 or not res.json():
             return None
 
-        game_data = res.json()[0]
-        media_doc = {
-            "title": game_data["name"],
-            "year": game_data.get("first_release_date"),
-            "genre": [g["name"] for g in game_data.get("genres", [])],
-            "platform": [p["name"] for p in game_data.get("platforms", [])],
-            "type": "Game"
-        }
-        self.db.save("media_items", media_doc)
-        return media_doc
+        # the same card search stores, so catalog searches can serve it as is
+        media_doc = shape_game(res.json()[0])
+        MediaCatalog(self.db.db["media_items"]).upsert_many([media_doc])
+        return {**media_doc, "media_id": canonical_media_id(media_doc)}
@@ -24,7 +24,8 @@ class Rating:
         self.db.update("ratings", {"_id": ObjectId(rating_id)}, update_fields)
 
     def get_average_rating(self, media_id):
-        ratings = self.db.find("ratings", {"media_id": ObjectId(media_id)})
-        if not ratings:
+        # media_stats keeps a running count and sum, so this is one small read
+        stats = self.db.find("media_stats", {"_id": str(media_id)})
+        if not stats or not stats[0].get("count"):
             return None
-        return round(sum(r["stars"] for r in ratings) / len(ratings), 2)
+        return round(stats[0]["sum"] / stats[0]["count"], 2)
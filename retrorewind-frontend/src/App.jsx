@@ -181,142 +181,6 @@ function Home({ auth, setAuth }) {
 
 
 
-async function updateRating(mediaId) {
-
-
-  const rating = ratings[mediaId];
-
-
-  if (!rating) return;
-
-
-
-
-
-  const ratingId = rating.rating_id || rating._id;
-
-
-
-
-
-  try {
-
-
-    const res = await fetch(`http://127.0.0.1:5000/ratings/${ratingId}`, {
-
-
-      method: "PUT",
-
-
-      headers: {
-
-
-        "Content-Type": "application/json",
-
-
-        Authorization: `Bearer ${auth.token}`
-
-
-      },
-
-
-      body: JSON.stringify({
-
-
-        stars,
-
-
-        review_text: review
-
-
-      })
-
-
-    });
-
-
-
-
-
-    if (!res.ok) {
-
-
-      const msg = await res.text();
-
-
-      alert("Failed to update rating.\n" + msg);
-
-
-      return;
-
-
-    }
-
-
-
-
-
-    // update UI
-
-
-    setRatings(prev => ({
-
-
-      ...prev,
-
-
-      [mediaId]: {
-
-
-        ...prev[mediaId],
-
-
-        stars,
-
-
-        review,
-
-
-        rating_id: ratingId
-
-
-      }
-
-
-    }));
-
-
-
-
-
-    alert("Rating updated!");
-
-
-    setShowModal(false);
-
-
-    setStars(0);
-
-
-    setReview("");
-
-
-
-
-
-  } catch (err) {
-
-
-    console.error(err);
-
-
-    alert("Server error updating rating.");
-
-
-  }
-
-
-}
   // --------------------------------------------------
 
   // MOCK data to show something if the backend isn't running.
@@ -357,14 +221,28 @@ async function updateRating(mediaId) {
     setLoading(true);
     setErr("");
     try {
-      // call our local backend (Flask) which calls IGDB and OMDb
-      const [gamesRes, moviesRes] = await Promise.all([
-        fetch(`http://127.0.0.1:5000/search?q=${encodeURIComponent(query)}`),
-        fetch(`http://127.0.0.1:5000/movies?q=${encodeURIComponent(query)}`)
-      ]);
-      const games = (await gamesRes.json()) || [];
-      const movies = (await moviesRes.json()) || [];
-      setItems(applyFilters([...games, ...movies]));  // merge + filter
+      // one call to our backend (Flask), which asks IGDB and OMDb in parallel
+      // and applies the filters there, so we don't download results to drop
+      const params = new URLSearchParams({ q: query });
+      if (typeFilter !== "All") params.set("type", typeFilter);
+      if (yearFrom) params.set("year_from", yearFrom);
+      if (yearTo) params.set("year_to", yearTo);
+      if (platformFilter.trim()) params.set("platform", platformFilter.trim());
+      const res = await fetch(`http://127.0.0.1:5000/search/all?${params}`);
+      const data = (await res.json()) || {};
+      if (res.status === 400 && data.error === "invalid_filters") {
+        setErr("\"Year from\" can't be after \"Year to\".");
+        setItems([]);
+        return;
+      }
+      if (!res.ok) throw new Error(data.error || "search_failed");
+
+      // tell the user if one of the sources didn't answer
+      const sources = Object.values(data.sources || {});
+      if (sources.some((s) => s.status !== "ok")) {
+        setErr("Some sources didn't respond — showing partial results.");
+      }
+      setItems(applyFilters(data.results || []));  // already merged server-side
     } catch (e) {
       // backend not running or failed → tell user + fall back to MOCK
       setErr("Backend not reachable — showing sample results.");
@@ -388,11 +266,6 @@ async function updateRating(mediaId) {
 
   // Ratings 
   async function submitRating() {
-     if (ratings[currentGame.id]) {
-      await updateRating(currentGame.id);
-      return;
-      }
-
     if (!auth?.userId) {
       alert("Please log in to rate items.");
       return;
@@ -404,43 +277,39 @@ async function updateRating(mediaId) {
     }
   
     try {
-      const res = await fetch("http://127.0.0.1:5000/ratings", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          user_id: auth.userId,
-          media_id: currentGame.id,
-          title: currentGame.title,
-          cover_url: currentGame.coverUrl,
-          type: currentGame.type,
-          year: currentGame.year,
-          stars,
-          review_text: review,
-        }),
-      });
-   if (!res.ok) {
+      // one call creates the rating or updates the one we already have
+      const res = await fetch(
+        `http://127.0.0.1:5000/ratings/by-user/${auth.userId}/${encodeURIComponent(currentGame.id)}`,
+        {
+          method: "PUT",
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: `Bearer ${auth.token}`,
+          },
+          body: JSON.stringify({
+            title: currentGame.title,
+            cover_url: currentGame.coverUrl,
+            type: currentGame.type,
+            year: currentGame.year,
+            stars,
+            review_text: review,
+          }),
+        }
+      );
+      if (!res.ok) {
         const message = await res.text();
         console.error("Rating submit error:", message);
         alert("Failed to submit rating.\n\nServer says: " + message);
         return;
-}
-      const data = await res.json();
-  
-      if (res.status === 409) {
-        alert("You already rated this item. You can edit or delete it from your profile.");
-        return;
-      }
-  
-      if (!res.ok) {
-        throw new Error(data.error || "Failed to submit rating.");
       }
+      const data = await res.json();
   
-      alert("Thanks for rating!");
+      alert(data.status === "updated" ? "Rating updated!" : "Thanks for rating!");
   
       // local UI-only storage for the cards
       setRatings((prev) => ({
         ...prev,
-        [currentGame.id]: { stars, review },
+        [currentGame.id]: { ...prev[currentGame.id], stars, review, rating_id: data.rating_id },
       }));
       setShowModal(false);
       setStars(0);
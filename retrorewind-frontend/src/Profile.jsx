@@ -19,7 +19,7 @@ export default function Profile({ auth }) {
     avatar_url: "",
   });
 
-  // ---------- FETCH PROFILE ----------
+  // ---------- FETCH PROFILE (profile, library, ratings in one request) ----------
   useEffect(() => {
     if (!userId || !token) {
       setLoading(false);
@@ -28,12 +28,15 @@ export default function Profile({ auth }) {
 
     async function fetchProfile() {
       try {
-        const res = await fetch(`http://127.0.0.1:5000/profile/${userId}`, {
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${token}`,
-          },
-        });
+        const res = await fetch(
+          `http://127.0.0.1:5000/profile/${userId}/overview`,
+          {
+            headers: {
+              "Content-Type": "application/json",
+              Authorization: `Bearer ${token}`,
+            },
+          }
+        );
 
         const data = await res.json();
 
@@ -59,56 +62,6 @@ export default function Profile({ auth }) {
     fetchProfile();
   }, [userId, token]);
 
-  // ---------- FETCH LIBRARY ----------
-  useEffect(() => {
-    async function fetchLibrary() {
-      try {
-        const res = await fetch(
-          `http://127.0.0.1:5000/profile/${userId}/library`,
-          {
-            headers: { Authorization: `Bearer ${token}` },
-          }
-        );
-        const data = await res.json();
-        if (res.ok) {
-          setUser((prev) => ({
-            ...(prev || {}),
-            library: data,
-          }));
-        }
-      } catch (err) {
-        console.error(err);
-      }
-    }
-
-    if (userId && token) fetchLibrary();
-  }, [userId, token]);
-
-  // ---------- FETCH RATINGS ----------
-  useEffect(() => {
-    async function fetchRatings() {
-      try {
-        const res = await fetch(
-          `http://127.0.0.1:5000/profile/${userId}/ratings`,
-          {
-            headers: { Authorization: `Bearer ${token}` },
-          }
-        );
-        const data = await res.json();
-        if (res.ok) {
-          setUser((prev) => ({
-            ...(prev || {}),
-            ratings: data,
-          }));
-        }
-      } catch (err) {
-        console.error(err);
-      }
-    }
-
-    if (userId && token) fetchRatings();
-  }, [userId, token]);
-
   // ---------- HANDLERS ----------
   function handleChange(e) {
     const { name, value } = e.target;
@@ -166,6 +119,7 @@ export default function Profile({ auth }) {
       setUser((prev) => ({
         ...(prev || {}),
         library: (prev?.library || []).filter((i) => i.id !== itemId),
+        library_count: Math.max((prev?.library_count || 1) - 1, 0),
       }));
 
       alert("Item removed!");
@@ -194,6 +148,7 @@ export default function Profile({ auth }) {
         ratings: (prev?.ratings || []).filter(
           (r) => r.rating_id !== ratingId && r._id !== ratingId
         ),
+        ratings_count: Math.max((prev?.ratings_count || 1) - 1, 0),
       }));
 
       alert("Rating deleted.");
@@ -319,7 +274,7 @@ export default function Profile({ auth }) {
       {/* Library Section */}
       <div className="w-full max-w-md bg-zinc-900 border border-zinc-800 rounded-xl p-6 shadow-md">
         <h2 className="text-xl font-semibold text-amber-400 text-center mb-4">
-          My Library
+          My Library{user.library_count ? ` (${user.library_count})` : ""}
         </h2>
         <div className="flex flex-col gap-3">
           {user.library && user.library.length > 0 ? (
@@ -356,7 +311,7 @@ export default function Profile({ auth }) {
       {/* Ratings Section */}
       <div className="w-full max-w-md bg-zinc-900 border border-zinc-800 rounded-xl p-6 shadow-md">
         <h2 className="text-xl font-semibold text-amber-400 text-center mb-4">
-          My Ratings
+          My Ratings{user.ratings_count ? ` (${user.ratings_count})` : ""}
         </h2>
         <div className="flex flex-col gap-4">
           {user.ratings && user.ratings.length > 0 ? (